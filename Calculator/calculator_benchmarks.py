@@ -0,0 +1,1425 @@
+#!/usr/bin/env python3
+"""
+Calculator Benchmarks Module
+Offline benchmark harness for operations, history persistence and parsing.
+
+Usage:
+    python calculator_benchmarks.py                     # run everything
+    python calculator_benchmarks.py --quick ops trig    # selected scenarios, small sizes
+    python calculator_benchmarks.py -o new.json --compare old.json
+
+Every scenario returns a mapping of metric name -> measurement dict, and the
+run is written as JSON so results can be compared between commits.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+from calculator_operations import BasicOperations, AdvancedOperations, StatisticalOperations
+from calculator_utils import (Calculator_Utils, count_digits, int_to_decimal_string,
+                              summarize_integer)
+from calculator_history import CalculatorHistory, ThreadSafeCalculatorHistory
+from calculator_blockstore import CODECS, BlockHistoryReader, write_block_file
+from calculator_merge import HistoryMerger
+from calculator_cache import ResultCache
+from calculator_registry import OperationRegistry, register_default_operations
+from calculator_timeseries import np as numpy
+from calculator_dataset import DatasetEvaluator
+from calculator_variables import VariableSheet
+from calculator_optimizer import OptimizedBatch
+from calculator_expressions import Expression
+from calculator_codegen import compile_formula
+from calculator_operations import FinancialOperations, MatrixOperations
+import calculator_matrix
+from calculator_grouping import GroupedAggregation
+from calculator_regression import MomentAccumulator, accumulate, spearman_correlation
+from calculator_polynomial import Polynomial
+from calculator_numerics import brent, derivative, gauss_kronrod, newton, simpson
+from calculator_simulation import CompoundGrowthModel, MonteCarloSimulation
+
+# Sample arguments for every BasicOperations / AdvancedOperations method
+OPERATION_ARGS = {
+    'add': (12.5, 7.25),
+    'subtract': (12.5, 7.25),
+    'multiply': (12.5, 7.25),
+    'divide': (12.5, 7.25),
+    'modulus': (12.5, 7.25),
+    'integer_divide': (12.5, 7.25),
+    'power': (1.5, 20),
+    'square_root': (12345.678,),
+    'factorial': (50,),
+    'logarithm': (12345.678,),
+    'sine': (37.0,),
+    'cosine': (37.0,),
+    'tangent': (37.0,),
+    'rectangle_area': (3.5, 4.25),
+    'circle_area': (3.5,),
+    'triangle_area': (3.5, 4.25),
+    'celsius_to_fahrenheit': (21.5,),
+    'fahrenheit_to_celsius': (70.7,),
+    'meters_to_feet': (12.0,),
+    'feet_to_meters': (12.0,),
+    'kg_to_pounds': (80.0,),
+    'pounds_to_kg': (176.0,),
+    'convert_units': (101.3, 'kPa', 'psi'),
+}
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """Time a zero-argument callable; returns per-call seconds (best and median)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    while number * 2 <= 1_000_000 and timer.timeit(number) < min_time:
+        number *= 2
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'seconds_per_call': min(timings),
+        'median_seconds_per_call': statistics.median(timings),
+        'calls_per_second': 1 / min(timings) if min(timings) else None,
+        'loops': number,
+    }
+
+
+def measure_once(func):
+    """Time a single call of an expensive callable"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def time_per_call(func, args_list, repeat=5):
+    """Best-of-N average time per call (in seconds) over a list of argument tuples"""
+    def run():
+        for args in args_list:
+            func(*args)
+
+    number = max(1, 20000 // len(args_list))
+    best = min(timeit.repeat(run, number=number, repeat=repeat))
+    return best / (number * len(args_list))
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the calculator's console output while benchmarking"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def make_entries(count, start_id=1):
+    """Build synthetic history entries spread over several days"""
+    rng = random.Random(42)
+    session = datetime(2024, 1, 1).isoformat()
+    base = datetime(2024, 1, 1).timestamp()
+    types = ['basic', 'advanced', 'trigonometry', 'conversion']
+    entries = []
+    for offset in range(count):
+        a, b = rng.randint(1, 999), rng.randint(1, 999)
+        entries.append({
+            'id': start_id + offset,
+            'operation': 'add',
+            'operands': [a, b],
+            'result': a + b,
+            'operation_type': types[offset % len(types)],
+            'timestamp': datetime.fromtimestamp(base + offset * 7).isoformat(),
+            'session_id': session,
+        })
+    return entries
+
+
+def write_history_file(path, entries):
+    """Write a history file in the CalculatorHistory format"""
+    with open(path, 'w') as f:
+        json.dump({
+            'last_updated': datetime.now().isoformat(),
+            'session_start': entries[0]['session_id'] if entries else None,
+            'calculations': entries,
+        }, f, indent=2)
+
+
+# Scenarios
+
+def bench_operations(config):
+    """Per-call latency of every BasicOperations/AdvancedOperations method"""
+    results = {}
+    for label, ops in [('basic', BasicOperations()), ('advanced', AdvancedOperations())]:
+        for name in sorted(dir(ops)):
+            if name.startswith('_') or not callable(getattr(ops, name)):
+                continue
+            if name not in OPERATION_ARGS:
+                results[f"ops.{label}.{name}"] = {'skipped': 'no sample arguments'}
+                continue
+            method, args = getattr(ops, name), OPERATION_ARGS[name]
+            results[f"ops.{label}.{name}"] = measure(lambda: method(*args), repeat=config['repeat'])
+    return results
+
+
+def bench_trigonometry(config):
+    """Compare computed and table-driven trigonometric functions"""
+    computed = AdvancedOperations()
+    table = AdvancedOperations(use_lookup_tables=True)
+    interpolated = AdvancedOperations(use_lookup_tables=True, interpolate=True)
+
+    integer_angles = [(float(angle),) for angle in range(0, 360)]
+    half_degree_angles = [(angle + 0.5,) for angle in range(0, 360)]
+    arbitrary_angles = [(angle + 0.37,) for angle in range(0, 360)]
+
+    results = {}
+    for func_name in ['sine', 'cosine', 'tangent']:
+        for label, angles in [('integer', integer_angles),
+                              ('half_degree', half_degree_angles),
+                              ('arbitrary', arbitrary_angles)]:
+            if func_name == 'tangent':
+                angles = [args for args in angles if args[0] % 180 != 90]
+
+            for mode, ops in [('computed', computed), ('table', table),
+                              ('interpolated', interpolated)]:
+                key = f"trig.{func_name}.{label}.{mode}"
+                seconds = time_per_call(getattr(ops, func_name), angles, repeat=config['repeat'])
+                results[key] = {'seconds_per_call': seconds}
+    return results
+
+
+def bench_parsing(config):
+    """Latency of Calculator_Utils.parse_expression"""
+    utils = Calculator_Utils()
+    results = {}
+    for expression in ['12 + 7', '3.5 * -2', '100 // 7', '2 ** 10', '1e3 / 4']:
+        results[f"parse.{expression}"] = measure(
+            lambda: utils.parse_expression(expression), repeat=config['repeat'])
+    return results
+
+
+def bench_history_append(config):
+    """Throughput of CalculatorHistory.add_calculation (time budgeted per size)"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in config['append_sizes']:
+            path = os.path.join(tmp, f"append_{size}.json")
+            with quiet():
+                history = CalculatorHistory(path)
+                deadline = time.perf_counter() + config['time_budget']
+                start = time.perf_counter()
+                done = 0
+                while done < size and time.perf_counter() < deadline:
+                    history.add_calculation(f"{done} + 1 = {done + 1}", done + 1)
+                    done += 1
+                elapsed = time.perf_counter() - start
+            results[f"history.append.{size}"] = {
+                'entries_requested': size,
+                'entries_appended': done,
+                'seconds': elapsed,
+                'entries_per_second': done / elapsed if elapsed else None,
+            }
+
+            bulk_path = os.path.join(tmp, f"bulk_{size}.json")
+            with quiet():
+                history = CalculatorHistory(bulk_path)
+                records = ((f"{i} + 1 = {i + 1}", i + 1) for i in range(size))
+                elapsed = measure_once(lambda: history.add_calculations(records))
+            results[f"history.bulk_append.{size}"] = {
+                'entries_appended': size,
+                'seconds': elapsed,
+                'entries_per_second': size / elapsed if elapsed else None,
+            }
+    return results
+
+
+def bench_history_load(config):
+    """Load time of history files of increasing size"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in config['load_sizes']:
+            path = os.path.join(tmp, f"load_{size}.json")
+            write_history_file(path, make_entries(size))
+
+            def load():
+                with quiet():
+                    CalculatorHistory(path)
+
+            timings = [measure_once(load) for _ in range(config['repeat'])]
+            results[f"history.load.{size}"] = {
+                'seconds': min(timings),
+                'file_bytes': os.path.getsize(path),
+            }
+    return results
+
+
+def bench_history_queries(config):
+    """Latency of history search and statistics"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in config['query_sizes']:
+            path = os.path.join(tmp, f"query_{size}.json")
+            write_history_file(path, make_entries(size))
+            with quiet():
+                history = CalculatorHistory(path)
+
+            results[f"history.search.{size}"] = measure(
+                lambda: history.find_calculations('= 5'), repeat=config['repeat'])
+
+            def show_statistics():
+                with quiet():
+                    history.show_statistics()
+
+            results[f"history.statistics.{size}"] = measure(show_statistics, repeat=config['repeat'])
+    return results
+
+
+def bench_statistics(config):
+    """Throughput of StatisticalOperations on large arrays"""
+    stats_ops = StatisticalOperations()
+    rng = random.Random(7)
+    results = {}
+    for size in config['array_sizes']:
+        numbers = [rng.randint(0, 1000) + rng.random() for _ in range(size)]
+        for name in ['mean', 'median', 'mode', 'standard_deviation', 'range_calc']:
+            func = getattr(stats_ops, name)
+            seconds = min(measure_once(lambda: func(numbers)) for _ in range(config['repeat']))
+            results[f"statistics.{name}.{size}"] = {
+                'seconds': seconds,
+                'elements_per_second': size / seconds if seconds else None,
+            }
+    return results
+
+
+def _stress_writer(path, worker, count):
+    """Append calculations from one process of the concurrency stress test"""
+    with quiet():
+        history = CalculatorHistory(path)
+        for index in range(count):
+            history.add_record('add', (worker, index), worker + index)
+
+
+def bench_concurrent_writers(config):
+    """Throughput of many processes appending to one history file
+    
+    Lost and duplicate entries are checked in tests/test_journal.py.
+    """
+    workers, per_worker = config['stress_workers'], config['stress_entries']
+    total = workers * per_worker
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "shared_history.json")
+        processes = [multiprocessing.Process(target=_stress_writer, args=(path, worker, per_worker))
+                     for worker in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    return {
+        f"history.concurrent_writers.{workers}x{per_worker}": {
+            'workers': workers,
+            'entries_per_worker': per_worker,
+            'seconds': elapsed,
+            'entries_per_second': total / elapsed if elapsed else None,
+            'ok': all(process.exitcode == 0 for process in processes),
+        }
+    }
+
+
+def bench_thread_contention(config):
+    """Appends from 1-32 threads sharing one ThreadSafeCalculatorHistory"""
+    results = {}
+    per_thread = config['thread_entries']
+    with tempfile.TemporaryDirectory() as tmp:
+        for thread_count in config['thread_counts']:
+            path = os.path.join(tmp, f"threads_{thread_count}.json")
+            with quiet():
+                history = ThreadSafeCalculatorHistory(path)
+
+            stop_reading = threading.Event()
+            reads = [0]
+
+            def reader():
+                while not stop_reading.is_set():
+                    history.get_recent_calculations(10)
+                    reads[0] += 1
+
+            def writer(worker):
+                for index in range(per_thread):
+                    history.add_record('add', (worker, index), worker + index)
+
+            threads = [threading.Thread(target=writer, args=(worker,))
+                       for worker in range(thread_count)]
+            reader_thread = threading.Thread(target=reader)
+            with quiet():
+                start = time.perf_counter()
+                reader_thread.start()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - start
+                stop_reading.set()
+                reader_thread.join()
+
+            total = thread_count * per_thread
+            ids = [entry['id'] for entry in history.snapshot()]
+            kept = min(total, ThreadSafeCalculatorHistory.MAX_ENTRIES)
+            results[f"history.threads.{thread_count}"] = {
+                'threads': thread_count,
+                'entries': total,
+                'seconds': elapsed,
+                'entries_per_second': total / elapsed if elapsed else None,
+                'recent_reads_per_second': reads[0] / elapsed if elapsed else None,
+                'ok': sorted(ids) == list(range(total - kept + 1, total + 1)),
+            }
+    return results
+
+
+def bench_storage(config):
+    """On-disk size and access times: indented JSON vs. compressed block files"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in config['storage_sizes']:
+            entries = make_entries(size)
+            probe_ids = random.Random(3).sample(range(1, size + 1), min(100, size))
+            day = entries[size // 2]['timestamp'][:10]
+
+            path = os.path.join(tmp, f"storage_{size}.json")
+            write_history_file(path, entries)
+
+            def load_json():
+                with open(path, 'r') as f:
+                    json.load(f)
+
+            json_bytes = os.path.getsize(path)
+            results[f"storage.json.{size}"] = {
+                'file_bytes': json_bytes,
+                'load_seconds': min(measure_once(load_json) for _ in range(config['repeat'])),
+            }
+
+            for codec in sorted(CODECS):
+                block_path = os.path.join(tmp, f"storage_{size}.{codec}.blk")
+                write_seconds = measure_once(lambda: write_block_file(block_path, entries, codec))
+                reader = BlockHistoryReader(block_path)
+
+                def load_all():
+                    list(BlockHistoryReader(block_path))
+
+                def lookups():
+                    for calc_id in probe_ids:
+                        reader.get_by_id(calc_id)
+
+                def day_query():
+                    return list(BlockHistoryReader(block_path).iter_range(day, day))
+
+                file_bytes = os.path.getsize(block_path)
+                results[f"storage.{codec}.{size}"] = {
+                    'file_bytes': file_bytes,
+                    'compression_ratio': json_bytes / file_bytes,
+                    'write_seconds': write_seconds,
+                    'open_seconds': min(measure_once(lambda: BlockHistoryReader(block_path))
+                                        for _ in range(config['repeat'])),
+                    'load_seconds': min(measure_once(load_all) for _ in range(config['repeat'])),
+                    'get_by_id_seconds': min(measure_once(lookups)
+                                             for _ in range(config['repeat'])) / len(probe_ids),
+                    'day_query_seconds': min(measure_once(day_query)
+                                             for _ in range(config['repeat'])),
+                    'ok': [entry['id'] for entry in BlockHistoryReader(block_path)]
+                          == [entry['id'] for entry in entries]
+                          and all(reader.get_by_id(calc_id)['id'] == calc_id for calc_id in probe_ids)
+                          and len(day_query()) == sum(entry['timestamp'][:10] == day
+                                                      for entry in entries),
+                }
+    return results
+
+
+def bench_merge(config):
+    """Streaming k-way merge of per-host history files with overlapping exports"""
+    results = {}
+    hosts, per_host = config['merge_hosts'], config['merge_entries']
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for host in range(hosts):
+            entries = make_entries(per_host)
+            for entry in entries:  # Hosts interleave in time and have their own sessions
+                entry['session_id'] = f"host-{host}"
+                entry['timestamp'] = entry['timestamp'][:19] + f".{host:06d}"
+            path = os.path.join(tmp, f"host_{host}.json")
+            write_history_file(path, entries)
+            paths.append(path)
+            # An export of the same host's history duplicates half of it
+            export_path = os.path.join(tmp, f"host_{host}_export.json")
+            write_history_file(export_path, entries[per_host // 2:])
+            paths.append(export_path)
+
+        for extension in ['json', 'jsonl', 'blk']:
+            output = os.path.join(tmp, f"merged.{extension}")
+            merger = HistoryMerger(paths)
+            start = time.perf_counter()
+            written = merger.write(output)
+            elapsed = time.perf_counter() - start
+
+            # Separate run: tracing allocations slows the merge down a lot
+            tracemalloc.start()
+            HistoryMerger(paths).write(output)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            if extension == 'blk':
+                merged = list(BlockHistoryReader(output))
+            else:
+                merged = list(HistoryMerger([output]).iter_merged())
+            timestamps = [entry['timestamp'] for entry in merged]
+            results[f"merge.{extension}.{hosts}x{per_host}"] = {
+                'inputs': len(paths),
+                'entries_read': merger.read,
+                'entries_written': written,
+                'duplicates': merger.duplicates,
+                'seconds': elapsed,
+                'entries_per_second': merger.read / elapsed if elapsed else None,
+                'peak_memory_bytes': peak,
+                'ok': written == hosts * per_host
+                      and [entry['id'] for entry in merged] == list(range(1, written + 1))
+                      and timestamps == sorted(timestamps),
+            }
+    return results
+
+
+def _cache_worker(path, worker, calls):
+    """Call cached operations from one process of the shared-cache test"""
+    registry = register_default_operations(OperationRegistry())
+    registry.enable_cache(ResultCache(path, min_work=0))
+    for index in range(calls):
+        n = 200 + (worker + index) % 50
+        if registry.call('power', 3, n) != 3 ** n:
+            sys.exit(1)
+
+
+def bench_result_cache(config):
+    """Cold vs. warm cached calls, LRU bound and sharing between processes"""
+    results = {}
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite")
+        registry = register_default_operations(OperationRegistry())
+        uncached = register_default_operations(OperationRegistry())
+        registry.enable_cache(ResultCache(path, max_entries=config['cache_entries']))
+
+        numbers = [rng.random() for _ in range(config['cache_array_size'])]
+        counts = [rng.randint(0, 1000) for _ in range(config['cache_array_size'])]
+        calls = {
+            'median': (numbers,),
+            'standard_deviation': (numbers,),
+            'mode': (counts,),
+        }
+        for name, args in calls.items():
+            uncached_seconds = min(measure_once(lambda: uncached.call(name, *args))
+                                   for _ in range(config['repeat']))
+            cold = measure_once(lambda: registry.call(name, *args))
+            warm = min(measure_once(lambda: registry.call(name, *args))
+                       for _ in range(config['repeat']))
+            results[f"cache.{name}"] = {
+                'uncached_seconds': uncached_seconds,
+                'cold_seconds': cold,
+                'warm_seconds': warm,
+                'speedup': uncached_seconds / warm if warm else None,
+                'ok': registry.call(name, *args) == uncached.call(name, *args),
+            }
+
+        # Fill well past the bound; the oldest entries must be evicted
+        cache = registry.result_cache
+        for n in range(1000, 1000 + 3 * config['cache_entries']):
+            registry.call('power', 1.0001, n)
+        stats = cache.stats()
+        results['cache.lru_bound'] = dict(stats, ok=stats['entries'] <= cache.max_entries + 64)
+
+        workers = config['stress_workers']
+        shared_path = os.path.join(tmp, "shared.sqlite")
+        processes = [multiprocessing.Process(target=_cache_worker,
+                                             args=(shared_path, worker, config['cache_calls']))
+                     for worker in range(workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        shared_entries = ResultCache(shared_path).stats()['entries']
+        results[f"cache.shared.{workers}x{config['cache_calls']}"] = {
+            'seconds': elapsed,
+            'entries': shared_entries,
+            'ok': shared_entries == 50 and all(process.exitcode == 0 for process in processes),
+        }
+    return results
+
+
+def bench_big_integers(config):
+    """Rendering huge integers: summaries, digit counts and full expansion"""
+    results = {}
+    utils = Calculator_Utils()
+    limit = sys.get_int_max_str_digits() if hasattr(sys, 'get_int_max_str_digits') else None
+    for digits in config['bigint_digits']:
+        value = 7 ** int(digits / 0.84509804)  # log10(7)
+        expanded = int_to_decimal_string(value)
+        results[f"bigint.{digits}"] = {
+            'digits': len(expanded),
+            'count_seconds': min(measure_once(lambda: count_digits(value))
+                                 for _ in range(config['repeat'])),
+            'summary_seconds': min(measure_once(lambda: summarize_integer(value))
+                                   for _ in range(config['repeat'])),
+            'format_seconds': min(measure_once(lambda: utils.format_number(value))
+                                  for _ in range(config['repeat'])),
+            'expand_seconds': min(measure_once(lambda: int_to_decimal_string(value))
+                                  for _ in range(config['repeat'])),
+            'ok': count_digits(value) == len(expanded)
+                  and summarize_integer(value).startswith(f"{expanded[0]}.{expanded[1:15]}"),
+        }
+        if limit is not None and digits <= 200_000:
+            sys.set_int_max_str_digits(0)
+            try:
+                results[f"bigint.{digits}"]['builtin_str_seconds'] = min(
+                    measure_once(lambda: str(value)) for _ in range(config['repeat']))
+                results[f"bigint.{digits}"]['ok'] &= str(value) == expanded
+            finally:
+                sys.set_int_max_str_digits(limit)
+    return results
+
+
+def bench_rolling(config):
+    """Rolling-window statistics: per-sample cost across window sizes, stream vs. NumPy"""
+    stats_ops = StatisticalOperations()
+    rng = random.Random(5)
+    size = config['rolling_size']
+    series = [1e6 + rng.gauss(0, 3) for _ in range(size)]
+    array = numpy.array(series) if numpy is not None else None
+    results = {}
+    for window in config['rolling_windows']:
+        for name in ['moving_average', 'moving_standard_deviation', 'moving_min', 'moving_max']:
+            func = getattr(stats_ops, name)
+            streamed = None
+
+            def stream():
+                nonlocal streamed
+                streamed = func(series, window)
+
+            seconds = measure_once(stream)
+            metrics = {
+                'samples': size,
+                'stream_seconds': seconds,
+                'stream_samples_per_second': size / seconds if seconds else None,
+            }
+            if array is not None:
+                vectorized = None
+
+                def vector():
+                    nonlocal vectorized
+                    vectorized = func(array, window)
+
+                vector_seconds = min(measure_once(vector) for _ in range(config['repeat']))
+                metrics['vectorized_seconds'] = vector_seconds
+                metrics['vectorized_samples_per_second'] = (size / vector_seconds
+                                                            if vector_seconds else None)
+                metrics['ok'] = bool(numpy.allclose(vectorized, streamed, rtol=1e-9, atol=1e-6,
+                                                    equal_nan=True))
+            results[f"rolling.{name}.{window}"] = metrics
+
+    seconds = measure_once(lambda: stats_ops.exponential_moving_average(series, 0.01))
+    results['rolling.exponential_moving_average'] = {
+        'stream_seconds': seconds,
+        'stream_samples_per_second': size / seconds if seconds else None,
+    }
+    if array is not None:
+        vector_seconds = min(measure_once(lambda: stats_ops.exponential_moving_average(array, 0.01))
+                             for _ in range(config['repeat']))
+        results['rolling.exponential_moving_average'].update(
+            vectorized_seconds=vector_seconds,
+            ok=bool(numpy.allclose(stats_ops.exponential_moving_average(array, 0.01),
+                                   stats_ops.exponential_moving_average(series, 0.01),
+                                   rtol=1e-9)))
+
+    # Accuracy on a trending series, where sums over the whole series cancel
+    # away the variance: compare against two-pass stdev at sampled positions
+    window = 10
+    trend = [i + rng.gauss(0, 1) for i in range(size)]
+    positions = range(window - 1, size, max(1, size // 1000))
+    expected = [statistics.stdev(trend[i - window + 1:i + 1]) for i in positions]
+    outputs = {'stream': stats_ops.moving_standard_deviation(trend, window)}
+    if array is not None:
+        outputs['vectorized'] = stats_ops.moving_standard_deviation(numpy.array(trend), window)
+    metrics = {'samples': size, 'window': window}
+    for name, output in outputs.items():
+        metrics[f'{name}_max_relative_error'] = max(
+            abs(output[i] - reference) / reference for i, reference in zip(positions, expected))
+    metrics['ok'] = all(metrics[f'{name}_max_relative_error'] < 1e-6 for name in outputs)
+    results['rolling.trend_accuracy'] = metrics
+    return results
+
+
+DATASET_FORMULAS = {
+    'total': "price * qty * (1 + tax)",
+    'mixed': "sqrt(price) / qty + log(price + 1) - tax ** 2",
+}
+
+
+def _read_result_column(path):
+    with open(path, 'r') as f:
+        next(f)
+        return [float(line) if line.strip() else None for line in f]
+
+
+def bench_dataset(config):
+    """Formula over every row of a CSV: rows per second, NumPy chunks vs. row by row"""
+    rng = random.Random(11)
+    rows = config['dataset_rows']
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, 'data.csv')
+        with open(source, 'w') as f:
+            f.write('price,qty,tax\n')
+            for _ in range(rows):
+                # About one row in a thousand divides by zero in 'mixed'
+                qty = 0 if rng.random() < 0.001 else rng.randint(1, 50)
+                f.write(f"{rng.uniform(0.5, 500):.2f},{qty},{rng.choice(['0.05', '0.2'])}\n")
+
+        for label, formula in DATASET_FORMULAS.items():
+            modes = [('python', False)] + ([('numpy', True)] if numpy is not None else [])
+            outputs = {}
+            for mode, use_numpy in modes:
+                output = os.path.join(directory, f'{label}.{mode}.csv')
+                stats = DatasetEvaluator(formula, use_numpy=use_numpy).evaluate_file(source, output)
+                outputs[mode] = _read_result_column(output)
+                results[f"dataset.{label}.{mode}"] = {
+                    'rows': stats['rows'],
+                    'errors': stats['errors'],
+                    'seconds': stats['seconds'],
+                    'rows_per_second': stats['rows_per_second'],
+                }
+            if 'numpy' in outputs:
+                same = all(a is None and b is None or
+                           a is not None and b is not None and abs(a - b) <= 1e-9 * max(1.0, abs(b))
+                           for a, b in zip(outputs['numpy'], outputs['python']))
+                results[f"dataset.{label}.numpy"]['ok'] = (
+                    same and len(outputs['numpy']) == len(outputs['python']) == rows)
+    return results
+
+
+def bench_variables(config):
+    """Dependent variables: time to propagate one input change through large sheets"""
+    cells = config['variables_cells']
+    results = {}
+
+    # A chain: every cell depends on the previous one, so all must be recomputed
+    sheet = VariableSheet()
+    sheet.set('x0', 1)
+    seconds = measure_once(lambda: sheet.update({f'x{i}': f'x{i - 1} + 1' for i in range(1, cells)}))
+    changes = [2, 3, 4, 5, 6][:config['repeat']]
+    timings = [measure_once(lambda value=value: sheet.set('x0', value)) for value in changes]
+    results['variables.chain'] = {
+        'cells': cells,
+        'build_seconds': seconds,
+        'update_seconds': min(timings),
+        'recomputed': sheet.recomputed,
+        'ok': sheet.get(f'x{cells - 1}') == changes[-1] + cells - 1,
+    }
+
+    # Independent formulas plus one total: a change touches the input and two formulas
+    sheet = VariableSheet()
+    sheet.update({f'a{i}': float(i) for i in range(cells)})
+    sheet.update({f'b{i}': f'a{i} * 2 + sqrt(a{i})' for i in range(cells)})
+    sheet.set('total', ' + '.join(f'b{i}' for i in range(0, cells, max(1, cells // 100))))
+    timings = [measure_once(lambda value=value: sheet.set('a0', float(value))) for value in changes]
+    expected = sum(sheet.get(f'b{i}') for i in range(0, cells, max(1, cells // 100)))
+    results['variables.wide'] = {
+        'cells': len(sheet),
+        'update_seconds': min(timings),
+        'recomputed': sheet.recomputed,
+        'ok': sheet.recomputed == 3 and abs(sheet.get('total') - expected) <= 1e-9 * expected,
+    }
+
+    # Changing an input to the same value stops at the input
+    seconds = measure_once(lambda: sheet.set('a0', float(changes[-1])))
+    results['variables.unchanged'] = {
+        'update_seconds': seconds,
+        'recomputed': sheet.recomputed,
+        'ok': sheet.recomputed == 1,
+    }
+    return results
+
+
+def bench_optimizer(config):
+    """Batches of formulas sharing subexpressions: optimized graph vs. one formula at a time"""
+    count = config['optimizer_formulas']
+    formulas = [f"sqrt(a * a + b * b) * {i % 7} + log(x) / (2 * pi) - sin(45) * (b * a + {i})"
+                for i in range(count)]
+    env = {'a': 3.0, 'b': 4.0, 'x': 10.0}
+    expressions = [Expression(formula) for formula in formulas]
+    batch = OptimizedBatch(formulas)
+
+    def separately():
+        return [expression.evaluate(env) for expression in expressions]
+
+    expected = separately()
+    results, errors = batch.evaluate(env)
+    separate = measure(separately, repeat=config['repeat'])
+    optimized = measure(lambda: batch.evaluate(env), repeat=config['repeat'])
+    report = batch.report()
+    return {
+        'optimizer.separate': separate,
+        'optimizer.batch': dict(
+            optimized,
+            speedup=separate['seconds_per_call'] / optimized['seconds_per_call'],
+            build_seconds=measure_once(lambda: OptimizedBatch(formulas)),
+            parsed_nodes=report['parsed_nodes'],
+            distinct_nodes=report['distinct_nodes'],
+            ok=not errors and all(abs(a - b) <= 1e-12 * max(1.0, abs(b))
+                                  for a, b in zip(results, expected)),
+        ),
+    }
+
+
+CODEGEN_FORMULA = "sqrt(a * a + b * b) / n + log(x) * 2 - x % 7 + (a - b) * (a + b)"
+
+
+def bench_codegen(config):
+    """One formula evaluated many times: interpreted tree vs. compiled Python function"""
+    rng = random.Random(13)
+    rows = [{'a': rng.uniform(-100, 100), 'b': rng.uniform(-100, 100),
+             'n': rng.choice([1, 2, 3.5]), 'x': rng.uniform(1, 1000)}
+            for _ in range(config['codegen_rows'])]
+    interpreted = Expression(CODEGEN_FORMULA)
+    compiled = compile_formula(CODEGEN_FORMULA)
+    function = compiled.function
+    positional = [tuple(row[name] for name in compiled.parameters) for row in rows]
+
+    def run_interpreted():
+        return [interpreted.evaluate(row) for row in rows]
+
+    def run_compiled():
+        return [compiled(row) for row in rows]
+
+    def run_function():
+        return [function(*args) for args in positional]
+
+    expected = run_interpreted()
+    results = {}
+    base = None
+    for label, run in [('interpreted', run_interpreted), ('compiled', run_compiled),
+                       ('function', run_function)]:
+        metrics = measure(run, repeat=config['repeat'])
+        metrics['rows_per_second'] = len(rows) / metrics['seconds_per_call']
+        if base is None:
+            base = metrics['seconds_per_call']
+        else:
+            metrics['speedup'] = base / metrics['seconds_per_call']
+            metrics['ok'] = run() == expected
+        results[f"codegen.{label}"] = metrics
+    results['codegen.compile'] = {
+        'seconds': measure_once(lambda: type(compiled)(CODEGEN_FORMULA)),
+        'source_lines': compiled.source_code.count('\n'),
+    }
+    return results
+
+
+def bench_numerics(config):
+    """Root finding and quadrature: batched NumPy solves vs. one problem at a time"""
+    if numpy is None:
+        return {'numerics.skipped': {'reason': "NumPy is not installed"}}
+    count = config['numerics_problems']
+    rng = numpy.random.default_rng(17)
+    principal = rng.uniform(1_000, 500_000, count)
+    time_years = rng.integers(1, 31, count).astype(float)
+    compounds = rng.choice([1.0, 4.0, 12.0], count)
+    rate = rng.uniform(0.5, 15, count)
+    interest = principal * (1 + rate / 100 / compounds) ** (compounds * time_years) - principal
+    args = (principal, interest, time_years, compounds)
+    sample = min(count, 2_000)
+    results = {}
+
+    def excess(r, p, i, t, n):
+        return p * (1 + r / 100 / n) ** (n * t) - p - i
+
+    def slope(r, p, i, t, n):
+        return p * t * (1 + r / 100 / n) ** (n * t - 1) / 100
+
+    solvers = [
+        ('brent', lambda *a: brent(excess, 0.0, 100.0, args=a)),
+        ('newton', lambda *a: newton(excess, 5.0, slope, args=a)),
+    ]
+    for label, solve in solvers:
+        batched = None
+
+        def run():
+            nonlocal batched
+            batched = solve(*args)
+
+        seconds = measure_once(run)
+        scalar = [solve(*(float(a[k]) for a in args)) for k in range(sample)]
+        looped = measure_once(lambda: [solve(*(float(a[k]) for a in args))
+                                       for k in range(sample)]) / sample * count
+        error = float(numpy.max(numpy.abs(batched.value - rate)))
+        results[f"numerics.{label}"] = {
+            'problems': count,
+            'seconds': seconds,
+            'problems_per_second': count / seconds if seconds else None,
+            'loop_seconds_estimate': looped,
+            'speedup': looped / seconds if seconds else None,
+            'max_error': error,
+            'ok': bool(batched.converged.all()) and error < 1e-8
+                  and all(abs(r.value - v) < 1e-8 for r, v in zip(scalar, rate[:sample])),
+        }
+
+    # Oscillatory integrals with a closed form: integral of sin(a x) over [0, k]
+    frequency = rng.uniform(0.1, 20, count // 100)
+    upper = rng.uniform(0.5, 10, count // 100)
+    exact = (1 - numpy.cos(frequency * upper)) / frequency
+    for label, integrate in [('gauss_kronrod', gauss_kronrod), ('simpson', simpson)]:
+        integral = None
+
+        def run():
+            nonlocal integral
+            integral = integrate(lambda x, a: numpy.sin(a * x), 0.0, upper, args=(frequency,))
+
+        seconds = measure_once(run)
+        error = float(numpy.max(numpy.abs(integral.value - exact)))
+        results[f"numerics.{label}"] = {
+            'integrals': len(frequency),
+            'seconds': seconds,
+            'max_error': error,
+            'ok': bool(integral.converged.all()) and error < 1e-8,
+        }
+
+    points = numpy.linspace(-3, 3, 1_001)
+    slope_error = float(numpy.max(numpy.abs(derivative(numpy.sin, points) - numpy.cos(points))))
+    solved = FinancialOperations().compound_interest_rate(*(a[:sample] for a in args))
+    results['numerics.derivative'] = {
+        'max_error': slope_error,
+        'rate_solver_error': float(numpy.max(numpy.abs(solved - rate[:sample]))),
+        'ok': slope_error < 1e-8 and bool(numpy.allclose(solved, rate[:sample], atol=1e-8)),
+    }
+    return results
+
+
+def bench_simulation(config):
+    """Monte Carlo paths per second in one process and in a pool, with bounded memory"""
+    if numpy is None:
+        return {'simulation.skipped': {'reason': "NumPy is not installed"}}
+    paths = config['simulation_paths']
+    model = CompoundGrowthModel(10_000, 5, 2, 10, 12)
+    results = {}
+    reference = None
+    for workers in config['simulation_workers']:
+        simulation = MonteCarloSimulation(model, paths, seed=42, workers=workers)
+        tracemalloc.start()
+        result = simulation.run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report = result.report()
+        metrics = {
+            'paths': paths,
+            'seconds': report['seconds'],
+            'paths_per_second': report['paths_per_second'],
+            'peak_mb': peak / 1e6,
+            'mean': report['mean'],
+            'median': report['quantiles'][0.5],
+        }
+        if reference is None:
+            reference = report
+        else:
+            # Chunks have fixed substreams: same numbers whatever the worker count
+            metrics['ok'] = report['mean'] == reference['mean'] \
+                and report['quantiles'] == reference['quantiles']
+        results[f"simulation.workers_{workers}"] = metrics
+
+    # Statistics merged over chunks vs. the same paths held in one array
+    check = MonteCarloSimulation(model, config['simulation_check_paths'], seed=7,
+                                 chunk_paths=config['simulation_check_paths'] // 10)
+    outcomes = numpy.concatenate([model.sample(numpy.random.default_rng(seed), size)
+                                  for seed, size in check._chunks()])
+    result = check.run()
+    spread = float(numpy.std(outcomes))
+    quantile_error = max(abs(result.quantile(q) - float(numpy.quantile(outcomes, q)))
+                         for q in (0.05, 0.5, 0.95)) / spread
+    results['simulation.accuracy'] = {
+        'mean_error': abs(result.summary.mean - float(outcomes.mean())),
+        'std_error': abs(result.summary.standard_deviation - float(outcomes.std(ddof=1))),
+        'quantile_error_in_std': quantile_error,
+        'ok': abs(result.summary.mean - float(outcomes.mean())) < 1e-9 * spread
+              and abs(result.summary.standard_deviation - float(outcomes.std(ddof=1))) < 1e-9 * spread
+              and quantile_error < 0.01,
+    }
+    return results
+
+
+def _python_matrix_kernel(name, a, b=None):
+    """The pure-Python path of a MatrixOperations method, whatever the size"""
+    if name == 'matrix_multiply':
+        return calculator_matrix.multiply(a, b)
+    if name == 'solve':
+        return calculator_matrix.lu_solve(calculator_matrix.lu_decompose(a), b)
+    return calculator_matrix.determinant(a)
+
+
+def bench_matrix(config):
+    """Matrix kernels: pure Python vs. NumPy by size, and streamed least squares from a file"""
+    rng = random.Random(23)
+    results = {}
+    for size in config['matrix_sizes']:
+        a = [[rng.gauss(0, 1) for _ in range(size)] for _ in range(size)]
+        b = [[rng.gauss(0, 1) for _ in range(size)] for _ in range(size)]
+        for name in ['matrix_multiply', 'solve', 'determinant']:
+            args = (a,) if name == 'determinant' else (a, b)
+            operation = getattr(MatrixOperations(), name)
+            metrics = {'size': size}
+            # Lists: pure Python up to SMALL_MATRIX_SIZE, converted to NumPy beyond
+            if numpy is not None or size <= 64:
+                metrics['lists'] = measure(lambda: operation(*args),
+                                           repeat=config['repeat'])['seconds_per_call']
+            if numpy is not None:
+                arrays = tuple(numpy.array(arg) for arg in args)
+                metrics['arrays'] = measure(lambda: operation(*arrays),
+                                            repeat=config['repeat'])['seconds_per_call']
+                metrics['python_kernel'] = measure(
+                    lambda: _python_matrix_kernel(name, *args),
+                    repeat=config['repeat'])['seconds_per_call'] if size <= 64 else None
+                metrics['ok'] = bool(numpy.allclose(operation(*args), operation(*arrays),
+                                                    rtol=1e-8, atol=1e-8))
+            results[f"matrix.{name}.{size}"] = metrics
+
+    if numpy is None:
+        return results
+    rows = config['matrix_stream_rows']
+    generator = numpy.random.default_rng(29)
+    design = generator.normal(size=(rows, 8))
+    target = design @ numpy.arange(1.0, 9.0) + generator.normal(scale=0.01, size=rows)
+    with tempfile.TemporaryDirectory() as directory:
+        a_path = os.path.join(directory, 'a.npy')
+        b_path = os.path.join(directory, 'b.npy')
+        calculator_matrix.save_matrix(a_path, design)
+        calculator_matrix.save_matrix(b_path, target[:, None])
+        reference = numpy.linalg.lstsq(design, target, rcond=None)[0]
+        del design
+        tracemalloc.start()
+        started = time.perf_counter()
+        solution, _ = MatrixOperations().least_squares_file(a_path, b_path, block_rows=16_384)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    results['matrix.least_squares_file'] = {
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+        'peak_mb': peak / 1e6,
+        'file_mb': rows * 8 * 8 / 1e6,
+        'ok': bool(numpy.allclose(solution[:, 0], reference, rtol=1e-9, atol=1e-9)),
+    }
+    return results
+
+
+GROUPING_AGGREGATES = ('count', 'mean', 'median', 'mode', 'standard_deviation', 'range_calc')
+
+
+def bench_grouping(config):
+    """Per-key statistics: one StatisticalOperations call per group vs. grouped engine"""
+    rows = config['grouping_rows']
+    groups = config['grouping_keys']
+    rng = random.Random(31)
+    keys = [rng.randrange(groups) for _ in range(rows)]
+    values = [float(rng.randint(0, 1_000)) for _ in range(rows)]
+    stats_ops = StatisticalOperations()
+
+    def per_group():
+        grouped = {}
+        for key, value in zip(keys, values):
+            grouped.setdefault(key, []).append(value)
+        return {key: (len(group), stats_ops.mean(group), stats_ops.median(group),
+                      stats_ops.mode(group),
+                      stats_ops.standard_deviation(group) if len(group) > 1 else math.nan,
+                      stats_ops.range_calc(group))
+                for key, group in sorted(grouped.items())}
+
+    expected = None
+
+    def baseline():
+        nonlocal expected
+        expected = per_group()
+
+    base = measure_once(baseline)
+    results = {'grouping.per_group_calls': {'rows': rows, 'groups': len(expected),
+                                            'seconds': base}}
+
+    def agrees(result):
+        for key, row in result:
+            count, mean, median, mode, deviation, spread = expected[key]
+            modes = mode if isinstance(mode, list) else [mode]
+            got = row['mode'] if isinstance(row['mode'], list) else [row['mode']]
+            if row['count'] != count or sorted(modes) != got or row['median'] != median \
+                    or row['range_calc'] != spread or abs(row['mean'] - mean) > 1e-9 * abs(mean) \
+                    or not (math.isclose(row['standard_deviation'], deviation, rel_tol=1e-9)
+                            or math.isnan(deviation) and math.isnan(row['standard_deviation'])):
+                return False
+        return True
+
+    modes = [('hash', False)] + ([('numpy', None)] if numpy is not None else [])
+    for label, use_numpy in modes:
+        inputs = (numpy.array(keys), numpy.array(values)) if use_numpy is None else (keys, values)
+        result = None
+
+        def run():
+            nonlocal result
+            result = GroupedAggregation(*inputs, GROUPING_AGGREGATES, use_numpy=use_numpy)
+
+        seconds = measure_once(run)
+        results[f"grouping.{label}"] = {
+            'rows': rows,
+            'groups': len(result),
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else None,
+            'speedup': base / seconds if seconds else None,
+            'ok': result.method == ('sort' if use_numpy is None else 'hash') and agrees(result),
+        }
+    return results
+
+
+def bench_regression(config):
+    """Paired statistics: row-by-row vs. NumPy chunks, merged partitions"""
+    # Published reference values are checked in tests/test_regression.py
+    results = {}
+    rows = config['regression_rows']
+    rng = random.Random(37)
+    # Large offsets: naive sums of squares lose most digits here
+    x1 = [1e9 + rng.gauss(0, 1) for _ in range(rows)]
+    x2 = [rng.uniform(-1, 1) for _ in range(rows)]
+    y = [3 * (a - 1e9) - 2 * b + 5 + rng.gauss(0, 0.1) for a, b in zip(x1, x2)]
+
+    streamed = None
+
+    def stream():
+        nonlocal streamed
+        streamed = accumulate(x1, x2, y)
+
+    seconds = measure_once(stream)
+    results['regression.stream'] = {
+        'rows': rows, 'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+    }
+    if numpy is None:
+        return results
+
+    columns = [numpy.array(column) for column in (x1, x2, y)]
+    vectorized = None
+
+    def vector():
+        nonlocal vectorized
+        vectorized = accumulate(*columns)
+
+    seconds = measure_once(vector)
+    centered = numpy.column_stack([columns[0] - 1e9, columns[1]])
+    reference = numpy.linalg.lstsq(numpy.column_stack([numpy.ones(rows), centered]),
+                                   columns[2], rcond=None)[0]
+    fit = vectorized.regression()
+    # Inputs near 1e9 carry about 1e-7 of rounding, which bounds the agreement
+    scale = max(max(map(abs, row)) for row in vectorized.comoments)
+    coefficients_ok = numpy.allclose(fit['coefficients'], reference[1:], rtol=1e-6)
+    results['regression.numpy'] = {
+        'rows': rows, 'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else None,
+        'speedup': results['regression.stream']['seconds'] / seconds if seconds else None,
+        'ok': bool(coefficients_ok)
+              and math.isclose(vectorized.correlation(0, 2),
+                               float(numpy.corrcoef(centered[:, 0], columns[2])[0, 1]),
+                               rel_tol=1e-9)
+              and math.isclose(vectorized.covariance(1, 2),
+                               float(numpy.cov(columns[1], columns[2])[0, 1]), rel_tol=1e-9)
+              and numpy.allclose(streamed.comoments, vectorized.comoments, rtol=0, atol=1e-7 * scale),
+    }
+
+    # Partitions accumulated separately and merged give the same statistics
+    merged = MomentAccumulator(3)
+    for part in numpy.array_split(numpy.column_stack(columns), 8):
+        piece = MomentAccumulator(3)
+        piece.add_rows(part)
+        merged.merge(piece)
+    ranks_seconds = measure_once(lambda: spearman_correlation(columns[0], columns[2]))
+    results['regression.merge'] = {
+        'partitions': 8,
+        'spearman_seconds': ranks_seconds,
+        'ok': numpy.allclose(merged.comoments, vectorized.comoments, rtol=0, atol=1e-7 * scale)
+              and numpy.allclose(merged.means, vectorized.means, rtol=1e-12, atol=0),
+    }
+    return results
+
+
+# Degree-8 calibration curve, lowest degree first
+CALIBRATION_COEFFICIENTS = [0.5, 1.2, -0.03, 4e-4, -2e-6, 1e-8, 0.0, 3e-12, -1e-14]
+
+
+def bench_polynomial(config):
+    """Polynomial evaluation: operation calls per term vs. Horner, and root accuracy"""
+    basic = BasicOperations()
+    advanced = AdvancedOperations()
+    curve = Polynomial(CALIBRATION_COEFFICIENTS)
+    rng = random.Random(41)
+    points = [rng.uniform(0, 100) for _ in range(config['polynomial_points'])]
+
+    def per_term(x):
+        total = 0.0
+        for degree, coefficient in enumerate(CALIBRATION_COEFFICIENTS):
+            total = basic.add(total, basic.multiply(coefficient, advanced.power(x, degree)))
+        return total
+
+    results = {}
+    expected = [per_term(x) for x in points]
+    for label, run in [('per_term', lambda: [per_term(x) for x in points]),
+                       ('horner', lambda: curve(points))]:
+        metrics = measure(run, repeat=config['repeat'])
+        metrics['points_per_second'] = len(points) / metrics['seconds_per_call']
+        if label == 'horner':
+            metrics['speedup'] = results['polynomial.per_term']['seconds_per_call'] \
+                / metrics['seconds_per_call']
+            metrics['ok'] = all(math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-12)
+                                for a, b in zip(run(), expected))
+        results[f"polynomial.{label}"] = metrics
+
+    if numpy is not None:
+        array = numpy.array(points * config['polynomial_array_repeat'])
+        horner = measure(lambda: curve(array), repeat=config['repeat'])
+        terms = measure(lambda: sum(basic.multiply(c, advanced.power(array, float(k)))
+                                    for k, c in enumerate(CALIBRATION_COEFFICIENTS)),
+                        repeat=config['repeat'])
+        results['polynomial.array'] = {
+            'points': len(array),
+            'horner_seconds': horner['seconds_per_call'],
+            'per_term_seconds': terms['seconds_per_call'],
+            'speedup': terms['seconds_per_call'] / horner['seconds_per_call'],
+            'ok': bool(numpy.allclose(curve(array[:len(points)]), expected,
+                                      rtol=1e-12, atol=1e-12)),
+        }
+
+    # Roots of a polynomial built from known roots, both root finders
+    known = sorted(rng.uniform(-10, 10) for _ in range(config['polynomial_degree']))
+    built = Polynomial.from_roots(known)
+    methods = [('durand_kerner', False)] + ([('companion', True)] if numpy is not None else [])
+    for label, use_numpy in methods:
+        found = None
+
+        def solve():
+            nonlocal found
+            found = built.roots(use_numpy=use_numpy)
+
+        seconds = measure_once(solve)
+        error = max(abs(complex(a) - b) for a, b in zip(found, known))
+        results[f"polynomial.roots.{label}"] = {
+            'degree': built.degree,
+            'seconds': seconds,
+            'max_error': error,
+            'ok': error < 1e-6,
+        }
+
+    antiderivative = curve.integral(constant=2.0)
+    results['polynomial.calculus'] = {
+        'ok': all(math.isclose(a, b, rel_tol=1e-15) for a, b in
+                  zip(antiderivative.derivative().coefficients, curve.coefficients))
+              and antiderivative(0) == 2.0
+              and math.isclose(Polynomial([0, 0, 3]).definite_integral(0, 2), 8.0)
+              and Polynomial.from_expression("3*x**2 - 2*x + 1") == Polynomial([1, -2, 3]),
+    }
+    return results
+
+
+SCENARIOS = {
+    'ops': bench_operations,
+    'trig': bench_trigonometry,
+    'parse': bench_parsing,
+    'append': bench_history_append,
+    'load': bench_history_load,
+    'query': bench_history_queries,
+    'stats': bench_statistics,
+    'concurrency': bench_concurrent_writers,
+    'threads': bench_thread_contention,
+    'storage': bench_storage,
+    'merge': bench_merge,
+    'cache': bench_result_cache,
+    'bigint': bench_big_integers,
+    'rolling': bench_rolling,
+    'dataset': bench_dataset,
+    'variables': bench_variables,
+    'optimizer': bench_optimizer,
+    'codegen': bench_codegen,
+    'numerics': bench_numerics,
+    'simulation': bench_simulation,
+    'matrix': bench_matrix,
+    'grouping': bench_grouping,
+    'regression': bench_regression,
+    'polynomial': bench_polynomial,
+}
+
+FULL_CONFIG = {
+    'repeat': 5,
+    'time_budget': 30.0,
+    'append_sizes': [1_000, 100_000, 1_000_000],
+    'load_sizes': [1_000, 10_000, 100_000],
+    'query_sizes': [1_000, 10_000, 100_000],
+    'array_sizes': [10_000, 1_000_000],
+    'stress_workers': 16,
+    'stress_entries': 200,
+    'thread_counts': [1, 2, 4, 8, 16, 32],
+    'thread_entries': 200,
+    'storage_sizes': [10_000, 100_000, 1_000_000],
+    'merge_hosts': 16,
+    'merge_entries': 50_000,
+    'cache_array_size': 1_000_000,
+    'cache_entries': 1_000,
+    'cache_calls': 500,
+    'bigint_digits': [10_000, 100_000, 1_000_000],
+    'rolling_size': 3_000_000,
+    'rolling_windows': [10, 10_000, 1_000_000],
+    'dataset_rows': 2_000_000,
+    'variables_cells': 50_000,
+    'optimizer_formulas': 1_000,
+    'codegen_rows': 100_000,
+    'numerics_problems': 1_000_000,
+    'simulation_paths': 10_000_000,
+    'simulation_workers': [1, 4],
+    'simulation_check_paths': 1_000_000,
+    'matrix_sizes': [4, 16, 64, 512],
+    'matrix_stream_rows': 2_000_000,
+    'grouping_rows': 10_000_000,
+    'grouping_keys': 100_000,
+    'regression_rows': 2_000_000,
+    'polynomial_points': 100_000,
+    'polynomial_array_repeat': 100,
+    'polynomial_degree': 12,
+}
+
+QUICK_CONFIG = {
+    'repeat': 3,
+    'time_budget': 2.0,
+    'append_sizes': [100, 1_000],
+    'load_sizes': [100, 1_000],
+    'query_sizes': [100, 1_000],
+    'array_sizes': [1_000, 10_000],
+    'stress_workers': 4,
+    'stress_entries': 300,
+    'thread_counts': [1, 4, 16],
+    'thread_entries': 50,
+    'storage_sizes': [1_000, 10_000],
+    'merge_hosts': 4,
+    'merge_entries': 5_000,
+    'cache_array_size': 100_000,
+    'cache_entries': 200,
+    'cache_calls': 100,
+    'bigint_digits': [10_000, 100_000],
+    'rolling_size': 100_000,
+    'rolling_windows': [10, 10_000],
+    'dataset_rows': 100_000,
+    'variables_cells': 5_000,
+    'optimizer_formulas': 100,
+    'codegen_rows': 10_000,
+    'numerics_problems': 100_000,
+    'simulation_paths': 1_000_000,
+    'simulation_workers': [1, 2],
+    'simulation_check_paths': 100_000,
+    'matrix_sizes': [4, 16, 64],
+    'matrix_stream_rows': 200_000,
+    'grouping_rows': 200_000,
+    'grouping_keys': 1_000,
+    'regression_rows': 100_000,
+    'polynomial_points': 10_000,
+    'polynomial_array_repeat': 10,
+    'polynomial_degree': 8,
+}
+
+
+def environment_info():
+    """Describe the machine and revision a run was taken on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'date': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'commit': commit or None,
+    }
+
+
+def run_benchmarks(names=None, quick=False):
+    """Run the selected scenarios and return the full result document"""
+    config = QUICK_CONFIG if quick else FULL_CONFIG
+    results = {}
+    for name in names or SCENARIOS:
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {name}")
+        print(f"⏱️  Running {name}...", file=sys.stderr)
+        results.update(SCENARIOS[name](config))
+    return {'environment': environment_info(), 'config': config, 'results': results}
+
+
+def primary_value(measurement):
+    """Pick the time-like value used to compare two runs"""
+    for key in ['seconds_per_call', 'seconds']:
+        if key in measurement:
+            return measurement[key]
+    return None
+
+
+def compare_results(old, new):
+    """Print per-metric ratios between two result documents"""
+    print(f"{'metric':60} {'old':>12} {'new':>12} {'ratio':>8}")
+    for metric, measurement in sorted(new['results'].items()):
+        old_measurement = old['results'].get(metric)
+        if not old_measurement:
+            continue
+        old_value, new_value = primary_value(old_measurement), primary_value(measurement)
+        if not old_value or new_value is None:
+            continue
+        ratio = new_value / old_value
+        marker = ' 🐢' if ratio > 1.1 else (' 🚀' if ratio < 0.9 else '')
+        print(f"{metric:60} {old_value:12.4g} {new_value:12.4g} {ratio:8.2f}{marker}")
+
+
+def main(argv=None):
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Calculator benchmark harness")
+    parser.add_argument('scenarios', nargs='*', help=f"scenarios to run ({', '.join(SCENARIOS)})")
+    parser.add_argument('-o', '--output', help="write results JSON to this file")
+    parser.add_argument('--quick', action='store_true', help="use small sizes for a fast run")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare against a previous results file")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.scenarios, quick=args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}", file=sys.stderr)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), report)
+
+    failed = [metric for metric, measurement in report['results'].items()
+              if measurement.get('ok') is False]
+    if failed:
+        print(f"❌ Failed checks: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
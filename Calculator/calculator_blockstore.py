@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Calculator Block Store Module
+Compressed history archive written in independently compressed blocks.
+
+File layout::
+
+    b"CALCBLK1"                       magic
+    block 0 .. block N-1              compressed JSON arrays of entries
+    index                             JSON: codec + per-block offset, length,
+                                      entry count, id range, timestamp range
+    footer                            index offset (8 bytes), index length
+                                      (4 bytes), magic (8 bytes)
+
+Appending writes the new blocks, an index of just those blocks that
+points to the previous index, and a new footer after the old footer. The
+old footer and index are left untouched, so a torn append loses only the
+new blocks: readers fall back to the last complete footer, and the next
+append cuts the torn tail off.
+
+Readers load only the footer and the chain of indexes, then decompress
+just the blocks a lookup or range query touches.
+"""
+
+import bisect
+import json
+import lzma
+import os
+import struct
+import tempfile
+import zlib
+from collections import OrderedDict
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+MAGIC = b"CALCBLK1"
+FOOTER = struct.Struct("<QI8s")
+DEFAULT_BLOCK_SIZE = 1000
+
+# Bytes read at a time when searching backwards for an intact footer
+FOOTER_SEARCH_CHUNK = 1 << 16
+
+
+def _codecs():
+    """Available codecs: name -> (compress, decompress)"""
+    codecs = {
+        'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+        'lzma': (lzma.compress, lzma.decompress),
+        'none': (bytes, bytes),
+    }
+    if zstandard is not None:
+        codecs['zstd'] = (zstandard.ZstdCompressor(level=6).compress,
+                          zstandard.ZstdDecompressor().decompress)
+    return codecs
+
+
+CODECS = _codecs()
+
+
+def _write_block(f, block, compress):
+    """Compress and write one block at the current position; returns its index record"""
+    payload = compress(json.dumps(block, separators=(',', ':')).encode('utf-8'))
+    record = {
+        'offset': f.tell(),
+        'length': len(payload),
+        'count': len(block),
+        'min_id': block[0]['id'],
+        'max_id': block[-1]['id'],
+        'min_timestamp': min(entry['timestamp'] for entry in block),
+        'max_timestamp': max(entry['timestamp'] for entry in block),
+    }
+    f.write(payload)
+    return record
+
+
+def _check_ids(entries):
+    """Raise unless entry ids strictly increase"""
+    last_id = None
+    for entry in entries:
+        if last_id is not None and entry['id'] <= last_id:
+            raise ValueError("Entries must be sorted by increasing id!")
+        last_id = entry['id']
+
+
+def write_block_file(path, entries, codec='zlib', block_size=DEFAULT_BLOCK_SIZE):
+    """Write entries (sorted by id) into a compressed block file; returns the block count"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown or unavailable codec: {codec}")
+    if block_size <= 0:
+        raise ValueError("Block size must be positive!")
+    compress = CODECS[codec][0]
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.blk', dir=directory)
+    blocks = []
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+
+            def flush(block):
+                blocks.append(_write_block(f, block, compress))
+
+            block = []
+            last_id = None
+            for entry in entries:
+                if last_id is not None and entry['id'] <= last_id:
+                    raise ValueError("Entries must be sorted by increasing id!")
+                last_id = entry['id']
+                block.append(entry)
+                if len(block) == block_size:
+                    flush(block)
+                    block = []
+            if block:
+                flush(block)
+
+            index = json.dumps({'codec': codec, 'blocks': blocks}).encode('utf-8')
+            index_offset = f.tell()
+            f.write(index)
+            f.write(FOOTER.pack(index_offset, len(index), MAGIC))
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(blocks)
+
+
+def append_to_block_file(path, entries, codec='zlib', block_size=DEFAULT_BLOCK_SIZE):
+    """Append entries as new blocks, creating the file if needed; returns blocks added
+
+    Only the new blocks' index is written, linked to the previous index, so
+    each append adds index bytes for its own blocks only.
+    """
+    entries = list(entries)
+    if not entries:
+        return 0
+    if not os.path.exists(path):
+        return write_block_file(path, entries, codec, block_size)
+
+    reader = BlockHistoryReader(path)
+    if reader.blocks and entries[0]['id'] <= reader.blocks[-1]['max_id']:
+        raise ValueError("Appended entries must have ids above the archived ones!")
+    _check_ids(entries)
+    compress = CODECS[reader.codec][0]
+
+    blocks = []
+    with open(path, 'r+b') as f:
+        f.truncate(reader.end)  # Drop what a torn append left behind
+        f.seek(reader.end)
+        for start in range(0, len(entries), block_size):
+            blocks.append(_write_block(f, entries[start:start + block_size], compress))
+
+        index = json.dumps({'codec': reader.codec, 'blocks': blocks,
+                            'previous': [reader.index_offset, reader.index_length]})
+        index = index.encode('utf-8')
+        index_offset = f.tell()
+        f.write(index)
+        f.write(FOOTER.pack(index_offset, len(index), MAGIC))
+        f.flush()
+        os.fsync(f.fileno())
+    return len(blocks)
+
+
+class BlockHistoryReader:
+    """Random access to a compressed block file"""
+
+    def __init__(self, path, cache_blocks=4):
+        self.path = path
+        self.cache_blocks = cache_blocks
+        self._cache = OrderedDict()
+        self.blocks_read = 0
+
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a calculator block file: {path}")
+            for end in self._footer_ends(f):
+                try:
+                    self._read_indexes(f, end)
+                except (ValueError, KeyError, TypeError):
+                    continue  # Not a real footer after all
+                break
+            else:
+                raise ValueError(f"Truncated calculator block file: {path}")
+
+        if self.codec not in CODECS:
+            raise ValueError(f"Codec not available: {self.codec}")
+        self._decompress = CODECS[self.codec][1]
+        self._max_ids = [block['max_id'] for block in self.blocks]
+
+    @staticmethod
+    def _footer_ends(f):
+        """Candidate ends of the last intact footer: the file end, then earlier magics"""
+        size = f.seek(0, os.SEEK_END)
+        yield size
+        # A torn append: search backwards for the magic closing an older footer
+        position = size
+        while position > len(MAGIC):
+            start = max(len(MAGIC), position - FOOTER_SEARCH_CHUNK)
+            f.seek(start)
+            chunk = f.read(position + len(MAGIC) - 1 - start)
+            found = chunk.rfind(MAGIC)
+            while found >= 0:
+                end = start + found + len(MAGIC)
+                if end < size:
+                    yield end
+                found = chunk.rfind(MAGIC, 0, found + len(MAGIC) - 1)
+            position = start
+
+    def _read_indexes(self, f, end):
+        """Load the footer ending at ``end`` and the chain of indexes it points to"""
+        if end < len(MAGIC) + FOOTER.size:
+            raise ValueError("No room for a footer")
+        f.seek(end - FOOTER.size)
+        index_offset, index_length, magic = FOOTER.unpack(f.read(FOOTER.size))
+        if magic != MAGIC or index_offset + index_length != end - FOOTER.size:
+            raise ValueError("Not a footer")
+
+        parts = []
+        offset, length = index_offset, index_length
+        while True:
+            f.seek(offset)
+            index = json.loads(f.read(length))
+            parts.append(index['blocks'])
+            if not index.get('previous'):
+                break
+            previous_offset, previous_length = index['previous']
+            if previous_offset >= offset:
+                raise ValueError("Index chain does not go backwards")
+            offset, length = previous_offset, previous_length
+
+        self.codec = index['codec']
+        self.blocks = [block for part in reversed(parts) for block in part]
+        self.index_offset, self.index_length = index_offset, index_length
+        self.end = end
+
+    def __len__(self):
+        return sum(block['count'] for block in self.blocks)
+
+    def read_block(self, number):
+        """Decompress one block (small LRU cache of recent blocks)"""
+        entries = self._cache.get(number)
+        if entries is not None:
+            self._cache.move_to_end(number)
+            return entries
+
+        block = self.blocks[number]
+        with open(self.path, 'rb') as f:
+            f.seek(block['offset'])
+            payload = f.read(block['length'])
+        entries = json.loads(self._decompress(payload))
+        self.blocks_read += 1
+
+        self._cache[number] = entries
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return entries
+
+    def get_by_id(self, calc_id):
+        """Find one entry by id, decompressing at most one block"""
+        number = bisect.bisect_left(self._max_ids, calc_id)
+        if number == len(self.blocks) or self.blocks[number]['min_id'] > calc_id:
+            return None
+        entries = self.read_block(number)
+        ids = [entry['id'] for entry in entries]
+        position = bisect.bisect_left(ids, calc_id)
+        if position < len(ids) and ids[position] == calc_id:
+            return entries[position]
+        return None
+
+    def iter_ids(self, first_id, last_id):
+        """Yield entries with first_id <= id <= last_id"""
+        number = bisect.bisect_left(self._max_ids, first_id)
+        while number < len(self.blocks) and self.blocks[number]['min_id'] <= last_id:
+            for entry in self.read_block(number):
+                if first_id <= entry['id'] <= last_id:
+                    yield entry
+            number += 1
+
+    def iter_range(self, start=None, end=None):
+        """Yield entries with start <= timestamp <= end (ISO strings), skipping other blocks"""
+        for number, block in enumerate(self.blocks):
+            if start is not None and block['max_timestamp'] < start:
+                continue
+            if end is not None and block['min_timestamp'][:len(end)] > end:
+                continue
+            for entry in self.read_block(number):
+                timestamp = entry['timestamp']
+                if start is not None and timestamp < start:
+                    continue
+                if end is not None and timestamp[:len(end)] > end:
+                    continue
+                yield entry
+
+    def __iter__(self):
+        for number in range(len(self.blocks)):
+            yield from self.read_block(number)
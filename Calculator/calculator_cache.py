@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Calculator Cache Module
+Persistent result cache for expensive operations, shared by all calculator
+processes on a host through one SQLite database in WAL mode.
+
+Entries are keyed by operation name plus a SHA-256 of the canonically
+encoded arguments, and carry the code version of the operation's module
+so results computed by older code are never returned. The least recently
+used entries are evicted once the cache holds more than ``max_entries``.
+"""
+
+import hashlib
+import json
+from array import array
+import os
+import sqlite3
+import threading
+import time
+from calculator_profiler import instrumentation
+
+DEFAULT_CACHE_FILE = "calculator_cache.sqlite"
+
+# Evict every this many inserts instead of counting rows on each one
+EVICT_INTERVAL = 64
+
+
+def canonical(value):
+    """Encode a value as type-tagged JSON data (1, 1.0 and True stay distinct)"""
+    if value is None:
+        return ['n']
+    if isinstance(value, bool):
+        return ['b', value]
+    if isinstance(value, int):
+        # Hex is linear-time and not subject to the int -> str digit limit
+        return ['i', format(value, 'x')]
+    if isinstance(value, float):
+        return ['f', value.hex()]
+    if isinstance(value, str):
+        return ['s', value]
+    if isinstance(value, (list, tuple)):
+        return ['l' if isinstance(value, list) else 't', [canonical(item) for item in value]]
+    if isinstance(value, dict):
+        return ['d', [[canonical(key), canonical(item)] for key, item in value.items()]]
+    raise TypeError(f"Cannot cache values of type {type(value).__name__}")
+
+
+def decode(data):
+    """Rebuild a value from its canonical encoding"""
+    tag = data[0]
+    if tag == 'n':
+        return None
+    if tag == 'b':
+        return data[1]
+    if tag == 'i':
+        return int(data[1], 16)
+    if tag == 'f':
+        return float.fromhex(data[1])
+    if tag == 's':
+        return data[1]
+    if tag == 'l':
+        return [decode(item) for item in data[1]]
+    if tag == 't':
+        return tuple(decode(item) for item in data[1])
+    if tag == 'd':
+        return {decode(key): decode(item) for key, item in data[1]}
+    raise ValueError(f"Unknown cache encoding tag: {tag}")
+
+
+def _pack_numbers(value):
+    """Fast binary encoding of a list of only floats or only small ints (else None)"""
+    if not isinstance(value, list) or not value:
+        return None
+    types = set(map(type, value))
+    try:
+        if types == {float}:
+            return b'F' + array('d', value).tobytes()
+        if types == {int}:
+            return b'I' + array('q', value).tobytes()
+    except OverflowError:
+        pass
+    return None
+
+
+class ResultCache:
+    """On-disk LRU cache of operation results"""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_entries=10_000,
+                 max_value_bytes=1 << 20, min_work=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_value_bytes = max_value_bytes
+        self.min_work = min_work  # Smaller calls are cheaper to recompute than to look up
+        self.hits = 0
+        self.misses = 0
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._disabled = False
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=10.0, check_same_thread=False,
+                                           isolation_level=None)
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, operation TEXT NOT NULL, version TEXT NOT NULL,"
+                " value TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+    @staticmethod
+    def key(operation, args):
+        """Cache key: operation name plus a hash of the canonical arguments"""
+        digest = hashlib.sha256()
+        for arg in args:
+            packed = _pack_numbers(arg)
+            if packed is None:
+                packed = json.dumps(canonical(arg), separators=(',', ':')).encode('utf-8')
+            digest.update(len(packed).to_bytes(8, 'little'))
+            digest.update(packed)
+        return f"{operation}:{digest.hexdigest()}"
+
+    def get(self, operation, args, version):
+        """Return (hit, value) for a call"""
+        key = self.key(operation, args)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, version FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] == version:
+                self._connection.execute(
+                    "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+                return True, decode(json.loads(row[0]))
+            if row is not None:  # Computed by older code
+                self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+        return False, None
+
+    def put(self, operation, args, version, value):
+        """Store the result of a call (silently skipped if too large)"""
+        if isinstance(value, (list, tuple)) and len(value) * 8 > self.max_value_bytes:
+            return False  # Every item encodes to at least 9 bytes; skip encoding it
+        encoded = json.dumps(canonical(value), separators=(',', ':'))
+        if len(encoded) > self.max_value_bytes:
+            return False
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, operation, version, value, size, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (self.key(operation, args), operation, version, encoded, len(encoded), time.time()))
+            self._inserts += 1
+            if self._inserts % EVICT_INTERVAL == 0:
+                self._evict()
+        return True
+
+    def _evict(self):
+        """Delete the least recently used entries beyond max_entries (hold the lock)"""
+        self._connection.execute(
+            "DELETE FROM results WHERE key IN ("
+            " SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,))
+
+    def call(self, operation, version, func, args):
+        """Return a cached result, or compute and store it"""
+        if self._disabled:
+            return func(*args)
+        try:
+            hit, value = self.get(operation, args, version)
+        except TypeError:
+            return func(*args)  # Arguments cannot be cached
+        except (sqlite3.Error, ValueError) as e:
+            self._disable(e)
+            return func(*args)
+
+        instrumentation.record_cache('results', hit)
+        if hit:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = func(*args)
+        try:
+            self.put(operation, args, version, value)
+        except TypeError:
+            pass  # Result type cannot be cached
+        except sqlite3.Error as e:
+            self._disable(e)
+        return value
+
+    def _disable(self, error):
+        """Stop using a broken cache; calculations carry on uncached"""
+        print(f"⚠️  Warning: Result cache disabled: {error}")
+        self._disabled = True
+
+    def stats(self):
+        """Entries, stored bytes and this process's hit counts"""
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+        }
+
+    def clear(self):
+        """Remove every cached result"""
+        with self._lock:
+            self._connection.execute("DELETE FROM results")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Calculator Code Generation Module
+Opt-in backend that compiles a formula into one Python function.
+
+The formula is parsed, constant-folded, and written out as straight-line
+Python source with one temporary per distinct subexpression. Arithmetic is
+emitted as Python operators with the operations' validations (division by
+zero, square root of a negative number, logarithm domain) inlined; other
+operations are called directly as pre-bound methods, without the registry
+lookup. The source is compile()d once and the function is cached per formula.
+
+Example for ``sqrt(a * a + b * b) / n``::
+
+    def _formula(v_a, v_b, v_n):
+        t0 = v_a * v_a
+        t1 = v_b * v_b
+        t2 = t0 + t1
+        if t2 < 0: raise ValueError("Cannot calculate square root of negative number!")
+        t3 = _sqrt(t2)
+        if v_n == 0: raise ValueError("Cannot divide by zero!")
+        return t3 / v_n
+"""
+
+import math
+from collections import OrderedDict
+from calculator_expressions import CONSTANTS, parse, variables
+from calculator_optimizer import fold_constants
+from calculator_registry import operation_registry
+
+MAX_CACHED_FORMULAS = 256
+
+# Operation -> (validation template or None, expression template)
+INLINE_OPERATIONS = {
+    'add': (None, "{0} + {1}"),
+    'subtract': (None, "{0} - {1}"),
+    'multiply': (None, "{0} * {1}"),
+    'divide': ('if {1} == 0: raise ValueError("Cannot divide by zero!")', "{0} / {1}"),
+    'modulus': ('if {1} == 0: raise ValueError("Cannot perform modulus by zero!")', "{0} % {1}"),
+    'integer_divide': ('if {1} == 0: raise ValueError("Cannot divide by zero!")', "{0} // {1}"),
+    'square_root': ('if {0} < 0: raise ValueError("Cannot calculate square root of negative number!")',
+                    "_sqrt({0})"),
+}
+
+LOGARITHM_DOMAIN_CHECK = ('if {0} <= 0: raise ValueError('
+                          '"Logarithm is not defined for non-positive numbers!")')
+
+_cache = OrderedDict()
+
+
+class _SourceWriter:
+    """Emits one statement per distinct subexpression"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.lines = []
+        self.namespace = {'_sqrt': math.sqrt, '_log': math.log, '_log10': math.log10}
+        self._names = {}  # subtree -> Python expression naming its value
+        self._temporaries = 0
+        self._checks = set()
+
+    def _global(self, prefix, value):
+        name = f"_{prefix}{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def _constant(self, value):
+        if (isinstance(value, float) and math.isfinite(value)) or \
+                (isinstance(value, int) and abs(value) < 10 ** 15):
+            text = repr(value)
+            return f"({text})" if text.startswith('-') else text  # An atom in any template
+        # repr() of inf and nan is not a defined name; huge ints could exceed
+        # the int -> str limit
+        return self._global('c', value)
+
+    def _temporary(self, text):
+        name = f"t{self._temporaries}"
+        self._temporaries += 1
+        self.lines.append(f"{name} = {text}")
+        return name
+
+    def _check(self, line):
+        if line not in self._checks:  # Same check on the same value: once is enough
+            self._checks.add(line)
+            self.lines.append(line)
+
+    def emit(self, tree):
+        """Python expression (a name or literal) holding the value of a tree"""
+        name = self._names.get(tree)
+        if name is not None:
+            return name
+
+        kind = tree[0]
+        if kind == 'const':
+            name = self._constant(tree[1])
+        elif kind == 'var':
+            name = f"v_{tree[1]}"
+        elif kind == 'neg':
+            name = self._temporary(f"-{self.emit(tree[1])}")
+        else:
+            name = self._operation(tree[1], [self.emit(arg) for arg in tree[2]], tree[2])
+        self._names[tree] = name
+        return name
+
+    def _operation(self, operation, args, trees):
+        inline = INLINE_OPERATIONS.get(operation)
+        if inline is not None and len(args) == 2 - (operation == 'square_root'):
+            check, expression = inline
+            if check is not None:
+                self._check(check.format(*args))
+            return self._temporary(expression.format(*args))
+
+        if operation == 'logarithm':
+            base = trees[1] if len(trees) > 1 else ('const', 10)
+            if base[0] == 'const' and base[1] in (10, math.e):
+                self._check(LOGARITHM_DOMAIN_CHECK.format(args[0]))
+                function = '_log10' if base[1] == 10 else '_log'
+                return self._temporary(f"{function}({args[0]})")
+
+        # Everything else calls the operation itself, bound once
+        function = self._global('op_', self.registry.resolve(operation))
+        return self._temporary(f"{function}({', '.join(args)})")
+
+
+def generate_source(tree, parameters, registry=operation_registry, function_name='_formula'):
+    """Python source of a function computing a (folded) tree; returns (source, namespace)"""
+    writer = _SourceWriter(registry)
+    result = writer.emit(tree)
+    body = writer.lines
+    if body and body[-1].startswith(f"{result} = "):
+        body[-1] = "return " + body[-1][len(result) + 3:]
+    else:
+        body.append(f"return {result}")
+    signature = ', '.join(f"v_{name}" for name in parameters)
+    source = f"def {function_name}({signature}):\n" + ''.join(f"    {line}\n" for line in body)
+    return source, writer.namespace
+
+
+class CompiledFormula:
+    """A formula compiled to a Python function of its variables"""
+
+    def __init__(self, formula, registry=operation_registry, bound=frozenset()):
+        self.formula = formula
+        tree = fold_constants(parse(formula, registry), registry, frozenset(bound))
+        # Variables in sorted order are the function's positional parameters
+        self.parameters = tuple(sorted(variables(tree)))
+        self.source_code, namespace = generate_source(tree, self.parameters, registry)
+        exec(compile(self.source_code, f"<formula {formula}>", 'exec'), namespace)
+        self.function = namespace['_formula']
+
+    def __call__(self, env=None):
+        """Evaluate with a variables dict"""
+        env = env or {}
+        try:
+            args = [env[name] for name in self.parameters]
+        except KeyError:
+            args = [self._lookup(env, name) for name in self.parameters]
+        return self.function(*args)
+
+    @staticmethod
+    def _lookup(env, name):
+        """A parameter's value: from env, else the constant of that name"""
+        if name in env:
+            return env[name]
+        if name in CONSTANTS:
+            return CONSTANTS[name]
+        raise ValueError(f"Unknown variable: {name}")
+
+
+def compile_formula(formula, registry=operation_registry, bound=frozenset()):
+    """Compiled function for a formula, cached by formula text"""
+    key = (formula.strip(), frozenset(bound), id(registry))
+    compiled = _cache.get(key)
+    if compiled is not None:
+        _cache.move_to_end(key)
+        return compiled
+
+    compiled = CompiledFormula(formula, registry, bound)
+    _cache[key] = compiled
+    if len(_cache) > MAX_CACHED_FORMULAS:
+        _cache.popitem(last=False)
+    return compiled
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Calculator Dataset Module
+Apply a formula to every row of a CSV file, e.g. ``price * qty * (1 + tax)``.
+
+Column names are bound as formula variables (characters that cannot
+appear in a name become ``_``); a column called ``e`` or ``pi`` takes
+precedence over the constant. The file is read in chunks of rows and
+each chunk is evaluated at once with NumPy when it is installed, or row
+by row with the calculator's operations otherwise, so memory stays
+bounded by the chunk size. Results are streamed to a one-column CSV; rows
+that cannot be evaluated (division by zero, a non-numeric cell, ...) are
+written as empty cells and counted as errors, as are NaN cells.
+
+Chunks are split on line breaks, so quoted cells must not contain them.
+
+Usage:
+    python calculator_dataset.py sales.csv "price * qty * (1 + tax)" -o totals.csv
+"""
+
+import argparse
+import csv
+import re
+import sys
+import time
+from itertools import islice
+from calculator_expressions import CONSTANTS, Expression
+
+try:
+    import numpy as np
+except ImportError:  # Rows are evaluated one by one without NumPy
+    np = None
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def variable_name(column):
+    """Formula variable bound to a CSV column"""
+    name = re.sub(r'\W', '_', column.strip())
+    return '_' + name if name[:1].isdigit() else name
+
+
+def _to_float(text):
+    """Parse a cell; None if it is not a number (or NaN)"""
+    try:
+        value = float(text)
+    except ValueError:
+        return None
+    return None if value != value else value
+
+
+def _read_column(rows, index):
+    """The cells of one column (missing cells of short rows are empty)"""
+    try:
+        return [row[index] for row in rows]
+    except IndexError:
+        return [row[index] if index < len(row) else '' for row in rows]
+
+
+class DatasetEvaluator:
+    """Evaluates a formula over the rows of a CSV file in chunks"""
+
+    def __init__(self, formula, chunk_rows=DEFAULT_CHUNK_ROWS, use_numpy=None, compiled=False):
+        if chunk_rows <= 0:
+            raise ValueError("Chunk size must be positive!")
+        self.expression = Expression(formula, compiled=compiled)
+        self.chunk_rows = chunk_rows
+        self.use_numpy = np is not None if use_numpy is None else use_numpy
+        if self.use_numpy and np is None:
+            raise ValueError("NumPy is not installed!")
+
+    def _columns(self, lines, indexes):
+        """Parse the referenced columns of a chunk; returns (columns, invalid rows)"""
+        if self.use_numpy and indexes:
+            try:
+                # C parser for the common all-numeric chunk
+                table = np.loadtxt(lines, delimiter=',', quotechar='"', comments=None,
+                                   usecols=list(indexes.values()), dtype=float, ndmin=2)
+            except ValueError:
+                table = None  # Empty or non-numeric cells, short rows
+            if table is not None and len(table) == len(lines):  # loadtxt skips blank lines
+                columns = {name: table[:, position] for position, name in enumerate(indexes)}
+                return columns, np.isnan(table).any(axis=1)
+
+        rows = list(csv.reader(lines))
+        columns = {}
+        invalid = np.zeros(len(rows), dtype=bool) if self.use_numpy else None
+        for name, index in indexes.items():
+            cells = _read_column(rows, index)
+            if not self.use_numpy:
+                columns[name] = [_to_float(cell) for cell in cells]
+                continue
+            try:
+                columns[name] = np.array(cells, dtype=float)
+                invalid |= np.isnan(columns[name])
+            except ValueError:
+                # Some cells are not numbers: parse one by one and flag their rows
+                values = [_to_float(cell) for cell in cells]
+                bad = np.array([value is None for value in values])
+                columns[name] = np.array([np.nan if value is None else value
+                                          for value in values], dtype=float)
+                invalid |= bad
+        return columns, invalid
+
+    def _format(self, values):
+        """Output lines for a chunk of results"""
+        if self.use_numpy:
+            lines = list(map(repr, values.tolist()))
+            for index in np.flatnonzero(np.isnan(values)).tolist():
+                lines[index] = ''
+        else:
+            lines = ['' if value is None else repr(value) for value in values]
+        return '\n'.join(lines) + '\n'
+
+    def evaluate_file(self, input_path, output_path, output_column='result'):
+        """Evaluate every row; returns rows, errors, seconds and rows per second"""
+        started = time.perf_counter()
+        rows_done = errors = chunks = 0
+
+        with open(input_path, 'r', newline='') as source, \
+                open(output_path, 'w', newline='') as target:
+            header = next(csv.reader(islice(source, 1)), None)
+            if header is None:
+                raise ValueError(f"Empty CSV file: {input_path}")
+
+            indexes = {}
+            for index, column in enumerate(header):
+                indexes.setdefault(variable_name(column), index)
+            expression = self.expression
+            shadowed = expression.names & set(CONSTANTS) & set(indexes)
+            if shadowed:
+                expression = Expression(expression.source, expression.registry,
+                                        expression.compiled, bound=shadowed)
+            missing = sorted(expression.variables - set(indexes))
+            if missing:
+                raise ValueError(f"Unknown column(s): {', '.join(missing)}")
+            indexes = {name: indexes[name] for name in expression.variables}
+
+            target.write(output_column + '\n')
+            while True:
+                lines = list(islice(source, self.chunk_rows))
+                if not lines:
+                    break
+                columns, invalid = self._columns(lines, indexes)
+                values, failed = expression.evaluate_columns(columns, len(lines), invalid)
+                target.write(self._format(values))
+                rows_done += len(lines)
+                errors += failed
+                chunks += 1
+
+        seconds = time.perf_counter() - started
+        return {
+            'rows': rows_done,
+            'errors': errors,
+            'chunks': chunks,
+            'seconds': seconds,
+            'rows_per_second': rows_done / seconds if seconds > 0 else None,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a formula over every row of a CSV file")
+    parser.add_argument('input', help="CSV file with a header row")
+    parser.add_argument('formula', help="formula over the column names, e.g. \"price * qty\"")
+    parser.add_argument('-o', '--output', required=True, help="CSV file for the results")
+    parser.add_argument('--column', default='result', help="header of the output column")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--pure-python', action='store_true', help="do not use NumPy")
+    parser.add_argument('--compiled', action='store_true',
+                        help="without NumPy, evaluate rows with a compiled Python function")
+    args = parser.parse_args(argv)
+
+    try:
+        evaluator = DatasetEvaluator(args.formula, args.chunk_rows,
+                                     use_numpy=False if args.pure_python else None,
+                                     compiled=args.compiled)
+        stats = evaluator.evaluate_file(args.input, args.output, args.column)
+    except (OSError, ValueError) as e:
+        print(f"❌ Evaluation failed: {e}")
+        return 1
+
+    print(f"✅ Evaluated {stats['rows']:,} rows into {args.output} "
+          f"in {stats['seconds']:.2f}s ({stats['rows_per_second'] or 0:,.0f} rows/s)")
+    if stats['errors']:
+        print(f"⚠️  {stats['errors']:,} rows could not be evaluated (left empty)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
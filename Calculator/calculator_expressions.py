@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Calculator Expressions Module
+Formulas such as ``price * qty * (1 + tax)`` parsed into expression trees
+whose operators and functions are the calculator's registered operations.
+
+Trees are nested tuples, so identical subexpressions compare and hash
+equal:
+
+    ('const', value)
+    ('var', name)
+    ('neg', operand)
+    ('op', operation_name, (argument, ...))
+
+Operators map to the basic operations (``+`` is 'add', ``**`` is 'power'
+and so on), ``pi`` and ``e`` are constants unless a variable shadows them,
+and functions are registered operations or a short alias (``sqrt``,
+``log``, ``ln``, ``sin``, ``cos``, ``tan``). Only this whitelist is accepted;
+formulas are never passed to eval().
+"""
+
+import ast
+import math
+from calculator_registry import operation_registry
+
+try:
+    import numpy as np
+except ImportError:  # Vectorized evaluation falls back to pure Python
+    np = None
+
+CONSTANTS = {'pi': math.pi, 'e': math.e}
+
+BINARY_OPERATORS = {
+    ast.Add: 'add',
+    ast.Sub: 'subtract',
+    ast.Mult: 'multiply',
+    ast.Div: 'divide',
+    ast.Mod: 'modulus',
+    ast.FloorDiv: 'integer_divide',
+    ast.Pow: 'power',
+}
+
+# Function name -> (operation, extra trailing arguments)
+FUNCTION_ALIASES = {
+    'sqrt': ('square_root', ()),
+    'log': ('logarithm', ()),
+    'ln': ('logarithm', (('const', math.e),)),
+    'sin': ('sine', ()),
+    'cos': ('cosine', ()),
+    'tan': ('tangent', ()),
+}
+
+
+def parse(source, registry=operation_registry):
+    """Parse a formula into an expression tree"""
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid formula: {e.msg}")
+    return _convert(tree.body, registry)
+
+
+def _convert(node, registry):
+    """Translate a Python AST node into an expression tree"""
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return ('const', node.value)
+    if isinstance(node, ast.Name):
+        return ('var', node.id)
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        return ('op', BINARY_OPERATORS[type(node.op)],
+                (_convert(node.left, registry), _convert(node.right, registry)))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return ('neg', _convert(node.operand, registry))
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.UAdd):
+        return _convert(node.operand, registry)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        name, extra = FUNCTION_ALIASES.get(node.func.id, (node.func.id, ()))
+        if name not in registry.specs:
+            raise ValueError(f"Unknown function: {node.func.id}")
+        args = tuple(_convert(arg, registry) for arg in node.args) + extra
+        spec = registry.get(name)
+        if spec.input_kind in ('numbers', 'series'):
+            raise ValueError(f"{node.func.id} needs a list and cannot be used in a formula")
+        if len(args) > spec.arity:
+            raise ValueError(f"{node.func.id} takes at most {spec.arity} arguments")
+        required = registry.required_arguments(name)
+        if len(args) < required:
+            raise ValueError(f"{node.func.id} takes at least {required} arguments")
+        return ('op', name, args)
+    raise ValueError(f"Unsupported formula element: {ast.dump(node)[:40]}")
+
+
+def variables(tree):
+    """Names of the variables a tree refers to (constants excluded)"""
+    found = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        kind = node[0]
+        if kind == 'var':
+            found.add(node[1])
+        elif kind == 'neg':
+            stack.append(node[1])
+        elif kind == 'op':
+            stack.extend(node[2])
+    return found
+
+
+def to_source(tree):
+    """Render a tree back as a formula (fully parenthesised)"""
+    kind = tree[0]
+    if kind == 'const':
+        return repr(tree[1])
+    if kind == 'var':
+        return tree[1]
+    if kind == 'neg':
+        return f"-({to_source(tree[1])})"
+    symbols = {name: symbol for symbol, name in
+               [('+', 'add'), ('-', 'subtract'), ('*', 'multiply'), ('/', 'divide'),
+                ('%', 'modulus'), ('//', 'integer_divide'), ('**', 'power')]}
+    name, args = tree[1], tree[2]
+    if name in symbols and len(args) == 2:
+        return f"({to_source(args[0])} {symbols[name]} {to_source(args[1])})"
+    return f"{name}({', '.join(to_source(arg) for arg in args)})"
+
+
+def compile_scalar(tree, registry=operation_registry):
+    """Turn a tree into a function of a variables dict (operations resolved once)"""
+    kind = tree[0]
+    if kind == 'const':
+        value = tree[1]
+        return lambda env: value
+    if kind == 'var':
+        name = tree[1]
+        if name in CONSTANTS:
+            constant = CONSTANTS[name]
+            return lambda env: env.get(name, constant)
+        def lookup(env):
+            try:
+                return env[name]
+            except KeyError:
+                raise ValueError(f"Unknown variable: {name}")
+        return lookup
+    if kind == 'neg':
+        operand = compile_scalar(tree[1], registry)
+        return lambda env: -operand(env)
+
+    func = registry.resolve(tree[1])
+    args = [compile_scalar(arg, registry) for arg in tree[2]]
+    if len(args) == 1:
+        first, = args
+        return lambda env: func(first(env))
+    if len(args) == 2:
+        first, second = args
+        return lambda env: func(first(env), second(env))
+    return lambda env: func(*[arg(env) for arg in args])
+
+
+class Expression:
+    """A parsed formula that can be evaluated on scalars or whole columns
+
+    With ``compiled=True`` scalar evaluation uses a Python function
+    generated by calculator_codegen instead of walking the tree.
+    ``bound`` names variables that shadow the constants ``pi`` and ``e``
+    (e.g. CSV columns called ``e``); they are counted in ``variables``.
+    """
+
+    def __init__(self, source, registry=operation_registry, compiled=False, bound=frozenset()):
+        self.source = source
+        self.registry = registry
+        self.compiled = compiled
+        self.bound = frozenset(bound)
+        self.tree = parse(source, registry)
+        self.names = variables(self.tree)  # Every name referenced, constants included
+        self.variables = self.names - (set(CONSTANTS) - self.bound)
+        self._scalar = None
+
+    def _scalar_function(self):
+        """Evaluator taking a variables dict, built on first use"""
+        if self._scalar is None:
+            if self.compiled:
+                from calculator_codegen import compile_formula  # Builds on this module
+                self._scalar = compile_formula(self.source, self.registry, self.bound)
+            else:
+                self._scalar = compile_scalar(self.tree, self.registry)
+        return self._scalar
+
+    def evaluate(self, env=None):
+        """Evaluate with scalar variables; operation errors raise ValueError"""
+        return self._scalar_function()(env or {})
+
+    def evaluate_columns(self, columns, length, invalid=None):
+        """Evaluate over columns of equal length; returns (values, invalid_count)
+
+        With NumPy and array columns the whole chunk is computed at once and
+        rows whose operation would raise (division by zero, log of a
+        negative number, ...) become NaN; ``invalid`` may flag rows known to
+        be bad beforehand. Otherwise every row is evaluated with the scalar
+        operations and failing rows (including those with None values)
+        become None. Either way a NaN result counts as a failing row.
+        """
+        if np is not None and all(isinstance(columns[name], np.ndarray)
+                                  for name in self.variables):
+            if invalid is None:
+                invalid = np.zeros(length, dtype=bool)
+            values = _evaluate_array(self.tree, columns, length, invalid, self.registry)
+            values = np.broadcast_to(np.asarray(values, dtype=float), (length,)).copy()
+            invalid |= np.isnan(values)
+            values[invalid] = np.nan
+            return values, int(invalid.sum())
+
+        scalar = self._scalar_function()
+        names = sorted(self.variables)
+        if self.compiled:
+            # Positional parameters are the variables in sorted order
+            function = scalar.function
+        else:
+            function = lambda *row: scalar(dict(zip(names, row)))
+        rows = zip(*[columns[name] for name in names]) if names else ([()] * length)
+        values = []
+        invalid = 0
+        for row in rows:
+            try:
+                value = function(*row)
+            except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+                value = None
+            if value is None or isinstance(value, complex) or value != value:  # (-8) ** 0.5, NaN
+                value = None
+                invalid += 1
+            values.append(value)
+        return values, invalid
+
+
+# Vectorized NumPy implementations: (invalid mask, arrays...) -> array.
+# Rows the scalar operation would reject are flagged in the mask.
+
+def _masked(condition, invalid):
+    np.logical_or(invalid, condition, out=invalid)
+
+
+def _np_divide(invalid, a, b, floor=False, modulus=False):
+    zero = np.broadcast_to(b == 0, invalid.shape)
+    _masked(zero, invalid)
+    safe = np.where(b == 0, 1, b)
+    if modulus:
+        return np.mod(a, safe)
+    return np.floor_divide(a, safe) if floor else np.divide(a, safe)
+
+
+def _np_power(invalid, base, exponent):
+    with np.errstate(all='ignore'):
+        result = np.power(np.asarray(base, dtype=float), exponent)
+    _masked(np.broadcast_to(~np.isfinite(result), invalid.shape), invalid)
+    return result
+
+
+def _np_square_root(invalid, x):
+    _masked(np.broadcast_to(x < 0, invalid.shape), invalid)
+    return np.sqrt(np.abs(x))
+
+
+def _np_logarithm(invalid, x, base=10):
+    bad = (x <= 0) | (np.asarray(base) <= 0) | (np.asarray(base) == 1)
+    _masked(np.broadcast_to(bad, invalid.shape), invalid)
+    safe_x = np.where(x <= 0, 1, x)
+    if np.isscalar(base) and base == 10:
+        return np.log10(safe_x)
+    safe_base = np.where(bad, 2, base)
+    return np.log(safe_x) / np.log(safe_base)
+
+
+def _np_tangent(invalid, x):
+    _masked(np.broadcast_to(np.mod(x, 180) == 90, invalid.shape), invalid)
+    return np.round(np.tan(np.radians(x)), 10)
+
+
+NUMPY_OPERATIONS = {
+    'add': lambda invalid, a, b: np.add(a, b),
+    'subtract': lambda invalid, a, b: np.subtract(a, b),
+    'multiply': lambda invalid, a, b: np.multiply(a, b),
+    'divide': _np_divide,
+    'modulus': lambda invalid, a, b: _np_divide(invalid, a, b, modulus=True),
+    'integer_divide': lambda invalid, a, b: _np_divide(invalid, a, b, floor=True),
+    'power': _np_power,
+    'square_root': _np_square_root,
+    'logarithm': _np_logarithm,
+    'sine': lambda invalid, x: np.round(np.sin(np.radians(x)), 10),
+    'cosine': lambda invalid, x: np.round(np.cos(np.radians(x)), 10),
+    'tangent': _np_tangent,
+}
+
+
+def _evaluate_array(tree, columns, length, invalid, registry):
+    """Evaluate a tree over NumPy columns, flagging failing rows in ``invalid``"""
+    kind = tree[0]
+    if kind == 'const':
+        return tree[1]
+    if kind == 'var':
+        name = tree[1]
+        if name in columns:
+            return columns[name]
+        if name in CONSTANTS:
+            return CONSTANTS[name]
+        raise ValueError(f"Unknown variable: {name}")
+    if kind == 'neg':
+        return np.negative(_evaluate_array(tree[1], columns, length, invalid, registry))
+
+    name = tree[1]
+    args = [_evaluate_array(arg, columns, length, invalid, registry) for arg in tree[2]]
+    implementation = NUMPY_OPERATIONS.get(name)
+    if implementation is not None:
+        return implementation(invalid, *args)
+    if registry.get(name).vectorizable:
+        return registry.call(name, *args)
+
+    # Anything else runs the scalar operation element by element
+    func = registry.resolve(name)
+    arrays = np.broadcast_arrays(*[np.asarray(arg, dtype=float) for arg in args],
+                                 np.empty(length))[:-1]
+    result = np.empty(length)
+    for index in range(length):
+        try:
+            result[index] = func(*[array[index].item() for array in arrays])
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError):
+            result[index] = np.nan
+            invalid[index] = True
+    return result
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Calculator Grouping Module
+Per-key statistics over (key, value) rows: mean, median, mode, ... by group.
+
+With NumPy, aggregates that only need sums (count, sum, mean, standard
+deviation) use ``np.unique`` group numbers and weighted ``np.bincount``.
+Order statistics sort the rows once, by value and then stably by key, and
+every aggregate is computed for all groups at once: sums with
+``np.add.reduceat`` over the group boundaries, medians and extremes by
+index into the sorted values, and modes from the lengths of runs of equal
+values. Without NumPy, or for keys NumPy cannot sort, rows are grouped in
+a dict and each group is reduced in a single pass (over its sorted values
+when order statistics are needed).
+
+Groups come out in key order. Iterating a result yields one
+``(key, {aggregate: value})`` row at a time, so rows can be streamed to a
+file without building them all.
+
+Usage:
+    python calculator_grouping.py sales.csv region amount --aggregates mean,median,mode
+"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # Groups are reduced in pure Python without NumPy
+    np = None
+
+# Aggregate names follow StatisticalOperations
+AGGREGATES = ('count', 'sum', 'mean', 'median', 'mode', 'standard_deviation',
+              'range_calc', 'min', 'max')
+DEFAULT_AGGREGATES = ('count', 'mean', 'median', 'standard_deviation', 'range_calc')
+
+# Aggregates that need each group's values in order
+_ORDERED = frozenset({'median', 'mode', 'range_calc', 'min', 'max'})
+
+
+def _check_aggregates(aggregates):
+    aggregates = tuple(aggregates)
+    unknown = [name for name in aggregates if name not in AGGREGATES]
+    if unknown:
+        raise ValueError(f"Unknown aggregate(s): {', '.join(unknown)}")
+    if not aggregates:
+        raise ValueError("No aggregates requested!")
+    return aggregates
+
+
+def _numpy_keys(keys):
+    """Keys as a sortable NumPy array, or None if they must be hashed instead"""
+    if np is None:
+        return None
+    if not isinstance(keys, np.ndarray):
+        types = set(map(type, keys))
+        # Mixed strings and numbers would all become strings (1 and '1' merged)
+        if not (types <= {str} or types <= {int, float}):
+            return None
+    array = np.asarray(keys)
+    if array.ndim != 1 or array.dtype.kind not in 'biufUS':
+        return None  # Objects (mixed or unorderable keys)
+    if array.dtype.kind == 'f' and np.isnan(array).any():
+        return None  # NaN keys would not group together when sorted
+    return array
+
+
+def _group_mode(values):
+    """Most frequent value of sorted values; a sorted list when several tie"""
+    best, modes = 0, []
+    run_start = 0
+    for index in range(1, len(values) + 1):
+        if index == len(values) or values[index] != values[run_start]:
+            length = index - run_start
+            if length > best:
+                best, modes = length, [values[run_start]]
+            elif length == best:
+                modes.append(values[run_start])
+            run_start = index
+    return modes if len(modes) > 1 else modes[0]
+
+
+def _reduce_group(values, aggregates, ordered):
+    """All requested aggregates of one group in one pass"""
+    if ordered:
+        values = sorted(values)
+    count = 0
+    mean = m2 = 0.0
+    for value in values:  # Welford's update
+        count += 1
+        delta = value - mean
+        mean += delta / count
+        m2 += delta * (value - mean)
+    row = {}
+    for name in aggregates:
+        if name == 'count':
+            row[name] = count
+        elif name == 'sum':
+            row[name] = math.fsum(values)
+        elif name == 'mean':
+            row[name] = mean
+        elif name == 'standard_deviation':
+            row[name] = math.sqrt(m2 / (count - 1)) if count > 1 else math.nan
+        elif name == 'median':
+            middle = count // 2
+            row[name] = values[middle] if count % 2 else (values[middle - 1] + values[middle]) / 2
+        elif name == 'mode':
+            row[name] = _group_mode(values)
+        elif name == 'min':
+            row[name] = values[0]
+        elif name == 'max':
+            row[name] = values[-1]
+        else:
+            row[name] = values[-1] - values[0]
+    return row
+
+
+class GroupedAggregation:
+    """Aggregates of values grouped by key; iterate for one row per group"""
+
+    def __init__(self, keys, values, aggregates=DEFAULT_AGGREGATES, use_numpy=None):
+        if len(keys) != len(values):
+            raise ValueError(f"Got {len(keys)} keys for {len(values)} values!")
+        if len(keys) == 0:
+            raise ValueError("Cannot calculate statistics of an empty list!")
+        self.aggregates = _check_aggregates(aggregates)
+        if use_numpy and np is None:
+            raise ValueError("NumPy is not installed!")
+
+        key_array = _numpy_keys(keys) if use_numpy is not False else None
+        if key_array is not None:
+            self.method = 'sort'
+            self.keys, self.columns = self._sorted_groups(key_array,
+                                                          np.asarray(values, dtype=float))
+        else:
+            self.method = 'hash'
+            self.keys, self.columns = self._hashed_groups(keys, values)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        """(key, {aggregate: value}) for each group, in key order"""
+        columns = [(name, self.columns[name]) for name in self.aggregates]
+        for index, key in enumerate(self.keys):
+            yield key, {name: column[index] for name, column in columns}
+
+    def _sorted_groups(self, keys, values):
+        """Group with NumPy; every aggregate is computed for all groups at once"""
+        if _ORDERED.isdisjoint(self.aggregates):
+            # Sums only: np.unique's group numbers and weighted bincounts
+            group_keys, inverse = np.unique(keys, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(group_keys))
+            sums = np.bincount(inverse, weights=values, minlength=len(group_keys))
+            means = sums / counts
+            m2 = None
+            if 'standard_deviation' in self.aggregates:
+                deviations = values - means[inverse]
+                m2 = np.bincount(inverse, weights=deviations * deviations,
+                                 minlength=len(group_keys))
+            columns = {name: self._moment(name, counts, sums, means, m2)
+                       for name in self.aggregates}
+            return group_keys, columns
+
+        # Sort by value, then stably by key: each group's values end up in order
+        order = np.argsort(values)
+        order = order[np.argsort(keys[order], kind='stable')]
+        keys, values = keys[order], values[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        last = starts + counts - 1
+        sums = np.add.reduceat(values, starts)
+        means = sums / counts
+        m2 = None
+        if 'standard_deviation' in self.aggregates:
+            deviations = values - np.repeat(means, counts)
+            m2 = np.add.reduceat(deviations * deviations, starts)
+
+        columns = {}
+        for name in self.aggregates:
+            if name == 'median':
+                column = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+            elif name == 'mode':
+                column = self._modes(keys, values, starts)
+            elif name == 'min':
+                column = values[starts]
+            elif name == 'max':
+                column = values[last]
+            elif name == 'range_calc':
+                column = values[last] - values[starts]
+            else:
+                column = self._moment(name, counts, sums, means, m2)
+            columns[name] = column
+        return keys[starts], columns
+
+    @staticmethod
+    def _moment(name, counts, sums, means, m2):
+        """count, sum, mean or standard deviation column from the group sums"""
+        if name == 'count':
+            return counts
+        if name == 'sum':
+            return sums
+        if name == 'mean':
+            return means
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(counts > 1, np.sqrt(m2 / (counts - 1)), np.nan)
+
+    def _modes(self, keys, values, starts):
+        """Mode of every group from runs of equal values (sorted within groups)"""
+        runs = np.flatnonzero(np.r_[True, (keys[1:] != keys[:-1]) | (values[1:] != values[:-1])])
+        lengths = np.diff(np.r_[runs, len(values)])
+        group_of_run = np.searchsorted(starts, runs, side='right') - 1
+        longest = np.maximum.reduceat(lengths, np.searchsorted(runs, starts))
+        is_mode = lengths == longest[group_of_run]
+        ties = np.bincount(group_of_run[is_mode], minlength=len(starts))
+
+        mode_runs = runs[is_mode]
+        first = np.searchsorted(group_of_run[is_mode], np.arange(len(starts)))
+        modes = values[mode_runs[first]].astype(object)
+        for group in np.flatnonzero(ties > 1).tolist():  # Several values tie: list them
+            modes[group] = values[mode_runs[first[group]:first[group] + ties[group]]].tolist()
+        return modes
+
+    def _hashed_groups(self, keys, values):
+        """Group rows in a dict, then reduce each group in one pass"""
+        groups = {}
+        for key, value in zip(keys, values):
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [value]
+            else:
+                group.append(value)
+        try:
+            ordered_keys = sorted(groups)
+        except TypeError:
+            ordered_keys = list(groups)  # Unorderable keys: first appearance
+
+        ordered = not _ORDERED.isdisjoint(self.aggregates)
+        columns = {name: [] for name in self.aggregates}
+        for key in ordered_keys:
+            row = _reduce_group(groups[key], self.aggregates, ordered)
+            for name, value in row.items():
+                columns[name].append(value)
+        return ordered_keys, columns
+
+    def to_dict(self):
+        """{key: {aggregate: value}} for every group"""
+        return {self._plain(key): {name: self._plain(value) for name, value in row.items()}
+                for key, row in self}
+
+    @staticmethod
+    def _plain(value):
+        """Python scalars instead of NumPy ones"""
+        return value.item() if np is not None and isinstance(value, np.generic) else value
+
+    def write_csv(self, path, key_column='key'):
+        """Stream one CSV row per group to a file; returns the number of groups"""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([key_column, *self.aggregates])
+            for key, row in self:
+                writer.writerow([self._plain(key)] + [
+                    ' '.join(map(repr, value)) if isinstance(value, list)
+                    else repr(self._plain(value)) for value in row.values()])
+        return len(self)
+
+
+def read_key_values(path, key_column, value_column):
+    """Keys and float values of two columns of a CSV file (rows with bad values are skipped)"""
+    keys, values = [], []
+    skipped = 0
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"Empty CSV file: {path}")
+        try:
+            key_index, value_index = header.index(key_column), header.index(value_column)
+        except ValueError:
+            raise ValueError(f"Columns {key_column!r} and {value_column!r} must both be in "
+                             f"the header!") from None
+        for row in reader:
+            try:
+                value = float(row[value_index])
+                key = row[key_index]
+            except (IndexError, ValueError):
+                skipped += 1
+                continue
+            keys.append(key)
+            values.append(value)
+    return keys, values, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statistics of a CSV column grouped by another")
+    parser.add_argument('input', help="CSV file with a header row")
+    parser.add_argument('key', help="column to group by")
+    parser.add_argument('value', help="numeric column to aggregate")
+    parser.add_argument('--aggregates', default=','.join(DEFAULT_AGGREGATES),
+                        help=f"comma-separated, from: {', '.join(AGGREGATES)}")
+    parser.add_argument('-o', '--output', help="CSV file for the results (default: print)")
+    parser.add_argument('--pure-python', action='store_true', help="do not use NumPy")
+    args = parser.parse_args(argv)
+
+    try:
+        started = time.perf_counter()
+        keys, values, skipped = read_key_values(args.input, args.key, args.value)
+        result = GroupedAggregation(keys, values, args.aggregates.split(','),
+                                    use_numpy=False if args.pure_python else None)
+        if args.output:
+            result.write_csv(args.output, args.key)
+    except (OSError, ValueError) as e:
+        print(f"❌ Aggregation failed: {e}")
+        return 1
+
+    if not args.output:
+        for key, row in result:
+            print(f"{key}: " + ", ".join(f"{name}={GroupedAggregation._plain(value)}"
+                                         for name, value in row.items()))
+    print(f"✅ {len(values):,} rows in {len(result):,} groups "
+          f"({time.perf_counter() - started:.2f}s, {result.method} grouping)")
+    if skipped:
+        print(f"⚠️  {skipped:,} rows without a numeric value were skipped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
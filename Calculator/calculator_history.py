@@ -4,16 +4,90 @@ Calculator History Module
 Manages calculation history, statistics, and data persistence
 """
 
+import bisect
 import json
 import os
+import threading
+from collections import deque
 from datetime import datetime
-from calculator_utils import Calculator_Utils
+from calculator_utils import Calculator_Utils, is_large_integer, summarize_integer
+from calculator_profiler import instrumentation
+from calculator_journal import HistoryJournal, _file_identity
+from calculator_segments import SegmentedHistoryStore
+from calculator_blockstore import BlockHistoryReader, append_to_block_file, write_block_file
+
+# Display templates for structured entries: operands are positional,
+# followed by the result and unit keywords
+CALCULATION_FORMATS = {
+    'add': "{0} + {1} = {result}",
+    'subtract': "{0} - {1} = {result}",
+    'multiply': "{0} * {1} = {result}",
+    'divide': "{0} / {1} = {result}",
+    'modulus': "{0} % {1} = {result}",
+    'integer_divide': "{0} // {1} = {result}",
+    'power': "{0} ** {1} = {result}",
+    'square_root': "√{0} = {result}",
+    'factorial': "{0}! = {result}",
+    'logarithm': "log_{1}({0}) = {result}",
+    'sine': "sin({0}°) = {result}",
+    'cosine': "cos({0}°) = {result}",
+    'tangent': "tan({0}°) = {result}",
+    'rectangle_area': "Rectangle Area: {0} × {1} = {result}",
+    'circle_area': "Circle Area: π × {0}² = {result}",
+    'triangle_area': "Triangle Area: ½ × {0} × {1} = {result}",
+    'celsius_to_fahrenheit': "{0}°C = {result}°F",
+    'fahrenheit_to_celsius': "{0}°F = {result}°C",
+    'meters_to_feet': "{0}m = {result}ft",
+    'feet_to_meters': "{0}ft = {result}m",
+    'kg_to_pounds': "{0}kg = {result}lbs",
+    'pounds_to_kg': "{0}lbs = {result}kg",
+    'convert_units': "{0} {1} = {result} {2}",
+    'simple_interest': "Simple Interest: {0} @ {1}% × {2}y = {result}",
+    'compound_interest': "Compound Interest: {0} @ {1}% × {2}y ({3}/yr) = {result}",
+    'percentage_change': "Change {0} → {1} = {result}%",
+}
+
+def _repair_ids(entries):
+    """Make ids strictly increase, as lookups by id assume
+    
+    History files from before ids were kept increasing can repeat ids;
+    every process repairs them the same way when loading.
+    """
+    last_id = 0
+    for entry in entries:
+        if entry['id'] <= last_id:
+            entry['id'] = last_id + 1
+        last_id = entry['id']
+    return entries
+
 
 class CalculatorHistory:
-    """Manages calculation history and statistics"""
+    """Manages calculation history and statistics
+    
+    Several processes may share one history file: new calculations are
+    appended to a journal under a file lock, and the JSON snapshot is only
+    rewritten (atomically) on compaction, clear and undo. See
+    calculator_journal for the file layout.
+    
+    With ``segment_dir`` set, every calculation is also kept in per-day
+    segments (see calculator_segments) that are not subject to MAX_ENTRIES.
+    
+    With ``archive_file`` set, calculations dropped by compaction are moved
+    to a compressed block file (see calculator_blockstore) where lookups by
+    id or date decompress only the blocks they need.
+    """
     
-    def __init__(self, history_file="calculator_history.json"):
+    # Keep only the most recent calculations to prevent memory issues
+    MAX_ENTRIES = 1000
+    
+    def __init__(self, history_file="calculator_history.json", segment_dir=None,
+                 archive_file=None):
         self.history_file = history_file
+        self.journal = HistoryJournal(history_file)
+        self.segments = SegmentedHistoryStore(segment_dir) if segment_dir else None
+        self.archive_file = archive_file
+        self._archive = None
+        self._archive_identity = None
         self.calculations = []
         self.session_start = datetime.now()
         self.utils = Calculator_Utils()
@@ -22,7 +96,7 @@ class CalculatorHistory:
     def add_calculation(self, calculation, result=None, operation_type="basic"):
         """Add a calculation to history"""
         entry = {
-            'id': len(self.calculations) + 1,
+            'id': 0,  # Assigned when appended
             'calculation': calculation,
             'result': result,
             'operation_type': operation_type,
@@ -30,24 +104,247 @@ class CalculatorHistory:
             'session_id': self.session_start.isoformat()
         }
         
-        self.calculations.append(entry)
-        self.save_history()
+        self._append_entries([entry])
+    
+    def add_record(self, operation, operands, result, unit=None, operation_type="basic"):
+        """Add a structured calculation; the display string is rendered on demand"""
+        entry = self._make_record(operation, operands, result, unit, operation_type,
+                                  0, datetime.now().isoformat(),
+                                  self.session_start.isoformat())
+        self._append_entries([entry])
+        return entry
+    
+    def _make_record(self, operation, operands, result, unit, operation_type,
+                     entry_id, timestamp, session_id):
+        """Build a structured history entry"""
+        if is_large_integer(result):  # Stored as a summary; JSON would need str()
+            result = summarize_integer(result)
+        elif isinstance(result, complex) or (  # JSON has no complex numbers: stored as text
+                isinstance(result, list) and any(isinstance(value, complex) for value in result)):
+            result = str(result)
+        entry = {
+            'id': entry_id,
+            'operation': operation,
+            'operands': [summarize_integer(operand) if is_large_integer(operand) else operand
+                         for operand in operands],
+            'result': result,
+            'operation_type': operation_type,
+            'timestamp': timestamp,
+            'session_id': session_id
+        }
+        if unit is not None:
+            entry['unit'] = unit
+        return entry
+    
+    def format_calculation(self, entry):
+        """Render the display string of an entry"""
+        if 'calculation' in entry:  # Pre-formatted entry
+            return entry['calculation']
+        
+        operation = entry.get('operation')
+        operands = entry.get('operands') or []
+        template = CALCULATION_FORMATS.get(operation)
+        if template is not None:
+            try:
+                return template.format(*operands, result=entry.get('result'),
+                                       unit=entry.get('unit', ''))
+            except (IndexError, KeyError):
+                pass  # Fall back to the generic form
+        
+        arguments = ', '.join(str(operand) for operand in operands)
+        text = f"{operation}({arguments}) = {entry.get('result')}"
+        return f"{text} {entry['unit']}" if entry.get('unit') else text
+    
+    def add_calculations(self, records, operation_type="basic"):
+        """Add many calculations with a single save
+        
+        Each record is a ``calculation`` string, a tuple of
+        ``(calculation, result, operation_type)`` where the last two are
+        optional, or a dict with the ``add_record`` arguments
+        (``operation``, ``operands``, ``result`` and optional ``unit`` and
+        ``operation_type``). Returns the number of calculations added.
+        
+        With segments or an archive every record is stored, MAX_ENTRIES at
+        a time; otherwise only the newest MAX_ENTRIES records are written,
+        since older ones would be dropped by the capacity policy anyway.
+        Those older records are not given ids, so every id handed out
+        belongs to a stored calculation.
+        """
+        timestamp = datetime.now().isoformat()
+        session_id = self.session_start.isoformat()
+        
+        persistent = self.segments is not None or self.archive_file is not None
+        batch = [] if persistent else deque(maxlen=self.MAX_ENTRIES)
+        added = 0
+        for record in records:
+            if isinstance(record, dict):
+                batch.append(self._make_record(
+                    record['operation'], record.get('operands', ()), record.get('result'),
+                    record.get('unit'), record.get('operation_type', operation_type),
+                    0, timestamp, session_id))  # Ids are assigned when appended
+            else:
+                if isinstance(record, str):
+                    calculation, result, op_type = record, None, operation_type
+                else:
+                    record = tuple(record)
+                    calculation = record[0]
+                    result = record[1] if len(record) > 1 else None
+                    op_type = record[2] if len(record) > 2 else operation_type
+                
+                batch.append({
+                    'id': 0,  # Assigned when appended
+                    'calculation': calculation,
+                    'result': result,
+                    'operation_type': op_type,
+                    'timestamp': timestamp,
+                    'session_id': session_id
+                })
+            added += 1
+            if persistent and len(batch) == self.MAX_ENTRIES:
+                # Every record reaches the segments and the archive; memory
+                # keeps only the newest MAX_ENTRIES
+                self._append_entries(batch)
+                batch = []
+        
+        if batch:
+            self._append_entries(list(batch))
+        return added
+    
+    @instrumentation.timed('history.append', 'persistence')
+    def _append_entries(self, entries):
+        """Assign ids and append entries to the shared journal under the lock"""
+        stored = False
+        try:
+            with self.journal.lock.acquire():
+                self._catch_up()
+                self._assign_ids(entries)
+                self.journal.append(entries)
+                self.calculations.extend(entries)
+                stored = True
+                if self.segments is not None:
+                    self.segments.append(entries)
+                
+                # Compact once the journal holds more than a full history
+                if self.journal.journal_entries > self.MAX_ENTRIES:
+                    self._compact()
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save history: {e}")
+            if not stored:
+                self._assign_ids(entries)
+                self.calculations.extend(entries)
         
-        # Keep only last 1000 calculations to prevent memory issues
-        if len(self.calculations) > 1000:
-            self.calculations = self.calculations[-1000:]
+        self._enforce_capacity()
+    
+    def _assign_ids(self, entries):
+        """Give entries consecutive ids following the newest known calculation"""
+        base_id = self._next_id()
+        for offset, entry in enumerate(entries):
+            entry['id'] = base_id + offset
+    
+    def _load_stored(self):
+        """Snapshot data and every stored calculation"""
+        data, entries = self.journal.load()
+        return data, _repair_ids(entries)
+    
+    def _catch_up(self):
+        """Merge calculations other processes wrote since we last looked"""
+        if self.journal.is_stale():
+            data, self.calculations = self._load_stored()
+        else:
+            self.calculations.extend(self.journal.read_new())
+    
+    def refresh(self):
+        """Pick up calculations appended by other processes"""
+        try:
+            if self.journal.is_stale():
+                with self.journal.lock.acquire(shared=True):
+                    data, self.calculations = self._load_stored()
+            else:
+                # Complete journal lines can be read without the lock
+                self.calculations.extend(self.journal.read_new())
+            self._enforce_capacity()
+        except Exception as e:
+            print(f"⚠️  Warning: Could not refresh history: {e}")
+    
+    def _rewrite(self, mutate=None):
+        """Apply a change to the full history and write a new snapshot"""
+        result = None
+        mutated = False
+        try:
+            with self.journal.lock.acquire():
+                self._catch_up()
+                if mutate is not None:
+                    result = mutate()
+                mutated = True
+                self._compact()
+        except Exception as e:
+            print(f"⚠️  Warning: Could not save history: {e}")
+            if not mutated and mutate is not None:
+                result = mutate()
+        return result
+    
+    def _compact(self):
+        """Drop calculations beyond MAX_ENTRIES and write a new snapshot (hold the lock)"""
+        self._enforce_capacity()
+        if self.archive_file is not None and self.calculations:
+            self._archive_dropped()
+        self.journal.write_snapshot(self._snapshot_data())
+    
+    def _archive_dropped(self):
+        """Move calculations that are about to leave the snapshot into the archive"""
+        # Memory was trimmed after every append, so read what is still on disk
+        data, stored = self._load_stored()
+        first_kept = self.calculations[0]['id']
+        archive = self.archive
+        archived_id = archive.blocks[-1]['max_id'] if archive and archive.blocks else 0
+        dropped = [entry for entry in stored if archived_id < entry['id'] < first_kept]
+        append_to_block_file(self.archive_file, dropped)
+    
+    @property
+    def archive(self):
+        """Reader for the compressed archive (None if there is none yet)"""
+        if self.archive_file is None:
+            return None
+        identity = _file_identity(self.archive_file, with_mtime=True)
+        if identity != self._archive_identity:
+            self._archive = BlockHistoryReader(self.archive_file) if identity else None
+            self._archive_identity = identity
+        return self._archive
+    
+    def _snapshot_data(self):
+        """Data written to the history snapshot file"""
+        return {
+            'last_updated': datetime.now().isoformat(),
+            'session_start': self.session_start.isoformat(),
+            'calculations': self.calculations
+        }
+    
+    def _next_id(self):
+        """Next calculation id (ids keep increasing after old entries are dropped)"""
+        if self.calculations:
+            return self.calculations[-1]['id'] + 1
+        archive = self.archive
+        return archive.blocks[-1]['max_id'] + 1 if archive and archive.blocks else 1
+    
+    def _enforce_capacity(self):
+        """Drop the oldest calculations beyond MAX_ENTRIES"""
+        excess = len(self.calculations) - self.MAX_ENTRIES
+        if excess > 0:
+            del self.calculations[:excess]
     
     def show_history(self, limit=10):
         """Display recent calculation history"""
-        if not self.calculations:
+        self.refresh()
+        calculations = self.snapshot()
+        if not calculations:
             print("\n📝 No calculations in history yet!")
             return
         
-        print(f"\n📚 CALCULATION HISTORY (Last {min(limit, len(self.calculations))} entries)")
+        print(f"\n📚 CALCULATION HISTORY (Last {min(limit, len(calculations))} entries)")
         print("=" * 70)
         
         # Show most recent calculations first
-        recent_calculations = self.calculations[-limit:]
+        recent_calculations = list(calculations[-limit:])
         recent_calculations.reverse()  # Most recent first
         
         for entry in recent_calculations:
@@ -55,7 +352,7 @@ class CalculatorHistory:
             formatted_time = timestamp.strftime("%Y-%m-%d %H:%M:%S")
             
             print(f"[{entry['id']:3d}] {formatted_time}")
-            print(f"      {entry['calculation']}")
+            print(f"      {self.format_calculation(entry)}")
             print(f"      Type: {entry['operation_type'].title()}")
             print("-" * 70)
         
@@ -87,18 +384,19 @@ class CalculatorHistory:
     
     def show_all_history(self):
         """Display all calculation history"""
-        if not self.calculations:
+        self.refresh()
+        calculations = self.snapshot()
+        if not calculations:
             print("\n📝 No calculations in history!")
             return
         
-        print(f"\n📚 COMPLETE CALCULATION HISTORY ({len(self.calculations)} entries)")
+        print(f"\n📚 COMPLETE CALCULATION HISTORY ({len(calculations)} entries)")
         print("=" * 80)
         
         # Group by date
         grouped_history = {}
-        for entry in self.calculations:
-            timestamp = datetime.fromisoformat(entry['timestamp'])
-            date_key = timestamp.strftime("%Y-%m-%d")
+        for entry in calculations:
+            date_key = entry['timestamp'][:10]  # ISO timestamps start with the date
             
             if date_key not in grouped_history:
                 grouped_history[date_key] = []
@@ -111,15 +409,15 @@ class CalculatorHistory:
             print("-" * 40)
             
             for entry in entries:
-                timestamp = datetime.fromisoformat(entry['timestamp'])
-                time_str = timestamp.strftime("%H:%M:%S")
+                time_str = entry['timestamp'][11:19]
                 
-                print(f"[{entry['id']:3d}] {time_str} | {entry['calculation']}")
+                print(f"[{entry['id']:3d}] {time_str} | {self.format_calculation(entry)}")
         
         print("\n" + "=" * 80)
     
     def search_history(self):
         """Search through calculation history"""
+        self.refresh()
         if not self.calculations:
             print("\n📝 No calculations to search!")
             return
@@ -130,11 +428,7 @@ class CalculatorHistory:
             print("❌ Please enter a search term!")
             return
         
-        matches = []
-        for entry in self.calculations:
-            if (search_term in entry['calculation'].lower() or 
-                search_term in entry['operation_type'].lower()):
-                matches.append(entry)
+        matches = self.find_calculations(search_term)
         
         if not matches:
             print(f"❌ No calculations found containing '{search_term}'")
@@ -148,10 +442,21 @@ class CalculatorHistory:
             formatted_time = timestamp.strftime("%Y-%m-%d %H:%M:%S")
             
             print(f"[{entry['id']:3d}] {formatted_time}")
-            print(f"      {entry['calculation']}")
+            print(f"      {self.format_calculation(entry)}")
             print(f"      Type: {entry['operation_type'].title()}")
             print("-" * 70)
     
+    def find_calculations(self, search_term):
+        """Return entries whose calculation or type contains the search term"""
+        calculations = self.snapshot()
+        search_term = search_term.lower()
+        matches = []
+        for entry in calculations:
+            if (search_term in self.format_calculation(entry).lower() or 
+                search_term in entry['operation_type'].lower()):
+                matches.append(entry)
+        return matches
+    
     def export_history(self):
         """Export history to different formats"""
         if not self.calculations:
@@ -162,8 +467,11 @@ class CalculatorHistory:
         print("1. JSON format")
         print("2. CSV format")
         print("3. Text format")
+        print("4. Compressed archive (block file)")
+        if self.segments is not None:
+            print("5. Date range (JSON lines)")
         
-        choice = input("\nChoose format (1-3): ").strip()
+        choice = input("\nChoose format: ").strip()
         
         if choice == '1':
             self.export_json()
@@ -171,20 +479,51 @@ class CalculatorHistory:
             self.export_csv()
         elif choice == '3':
             self.export_text()
+        elif choice == '4':
+            self.export_blocks()
+        elif choice == '5' and self.segments is not None:
+            self.export_date_range()
         else:
             print("❌ Invalid choice!")
     
+    def export_date_range(self):
+        """Export a date range from the history segments as JSON lines"""
+        start = input("Start date (YYYY-MM-DD, blank for all): ").strip() or None
+        end = input("End date (YYYY-MM-DD, blank for all): ").strip() or None
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"calculator_export_{timestamp}.jsonl"
+        
+        try:
+            self.segments.refresh()
+            count = self.segments.export(filename, start, end)
+            print(f"✅ Exported {count} calculations to {filename}")
+        except Exception as e:
+            print(f"❌ Export failed: {e}")
+    
+    def export_blocks(self, codec='zlib'):
+        """Export archived and current history as a compressed block file"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"calculator_export_{timestamp}.blk"
+        
+        try:
+            blocks = write_block_file(filename, self.iter_calculations(), codec)
+            print(f"✅ History exported to {filename} ({blocks} blocks)")
+        except Exception as e:
+            print(f"❌ Export failed: {e}")
+    
     def export_json(self):
         """Export history as JSON"""
+        calculations = self.snapshot()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"calculator_export_{timestamp}.json"
         
         try:
             export_data = {
                 'export_date': datetime.now().isoformat(),
-                'total_calculations': len(self.calculations),
+                'total_calculations': len(calculations),
                 'session_start': self.session_start.isoformat(),
-                'calculations': self.calculations
+                'calculations': [dict(entry, calculation=self.format_calculation(entry))
+                                 for entry in calculations]
             }
             
             with open(filename, 'w') as f:
@@ -197,6 +536,7 @@ class CalculatorHistory:
     
     def export_csv(self):
         """Export history as CSV"""
+        calculations = self.snapshot()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"calculator_export_{timestamp}.csv"
         
@@ -206,12 +546,12 @@ class CalculatorHistory:
                 f.write("ID,Timestamp,Calculation,Operation Type,Result\n")
                 
                 # Write data
-                for entry in self.calculations:
+                for entry in calculations:
                     timestamp = datetime.fromisoformat(entry['timestamp'])
                     formatted_time = timestamp.strftime("%Y-%m-%d %H:%M:%S")
                     
                     # Escape commas in calculation string
-                    calc_escaped = entry['calculation'].replace(',', ';')
+                    calc_escaped = self.format_calculation(entry).replace(',', ';')
                     result = entry.get('result', 'N/A')
                     
                     f.write(f"{entry['id']},{formatted_time},{calc_escaped},"
@@ -224,6 +564,7 @@ class CalculatorHistory:
     
     def export_text(self):
         """Export history as readable text"""
+        calculations = self.snapshot()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"calculator_export_{timestamp}.txt"
         
@@ -232,18 +573,18 @@ class CalculatorHistory:
                 f.write("COMPLEX CALCULATOR - CALCULATION HISTORY\n")
                 f.write("=" * 50 + "\n\n")
                 f.write(f"Export Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total Calculations: {len(self.calculations)}\n")
+                f.write(f"Total Calculations: {len(calculations)}\n")
                 f.write(f"Session Started: {self.session_start.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                 
                 f.write("CALCULATIONS:\n")
                 f.write("-" * 30 + "\n")
                 
-                for entry in self.calculations:
+                for entry in calculations:
                     timestamp = datetime.fromisoformat(entry['timestamp'])
                     formatted_time = timestamp.strftime("%Y-%m-%d %H:%M:%S")
                     
                     f.write(f"[{entry['id']:3d}] {formatted_time}\n")
-                    f.write(f"     {entry['calculation']}\n")
+                    f.write(f"     {self.format_calculation(entry)}\n")
                     f.write(f"     Type: {entry['operation_type'].title()}\n\n")
             
             print(f"✅ History exported to {filename}")
@@ -253,7 +594,9 @@ class CalculatorHistory:
     
     def show_statistics(self):
         """Display calculation statistics"""
-        if not self.calculations:
+        self.refresh()
+        calculations = self.snapshot()
+        if not calculations:
             print("\n📊 No calculations for statistics!")
             return
         
@@ -261,8 +604,8 @@ class CalculatorHistory:
         print("=" * 50)
         
         # Basic stats
-        total_calcs = len(self.calculations)
-        session_calcs = len([c for c in self.calculations 
+        total_calcs = len(calculations)
+        session_calcs = len([c for c in calculations 
                            if c['session_id'] == self.session_start.isoformat()])
         
         print(f"📈 Total Calculations: {total_calcs}")
@@ -270,7 +613,7 @@ class CalculatorHistory:
         
         # Operation type breakdown
         operation_counts = {}
-        for calc in self.calculations:
+        for calc in calculations:
             op_type = calc['operation_type']
             operation_counts[op_type] = operation_counts.get(op_type, 0) + 1
         
@@ -280,9 +623,9 @@ class CalculatorHistory:
             print(f"   {op_type.title()}: {count} ({percentage:.1f}%)")
         
         # Time-based stats
-        if self.calculations:
-            first_calc = datetime.fromisoformat(self.calculations[0]['timestamp'])
-            last_calc = datetime.fromisoformat(self.calculations[-1]['timestamp'])
+        if calculations:
+            first_calc = datetime.fromisoformat(calculations[0]['timestamp'])
+            last_calc = datetime.fromisoformat(calculations[-1]['timestamp'])
             duration = last_calc - first_calc
             
             print(f"\n⏰ Time Statistics:")
@@ -294,11 +637,15 @@ class CalculatorHistory:
                 rate = total_calcs / (duration.total_seconds() / 60)  # per minute
                 print(f"   Average Rate: {rate:.2f} calculations per minute")
         
-        # Daily activity
-        daily_counts = {}
-        for calc in self.calculations:
-            date = datetime.fromisoformat(calc['timestamp']).strftime('%Y-%m-%d')
-            daily_counts[date] = daily_counts.get(date, 0) + 1
+        # Daily activity (the segment manifest also covers trimmed history)
+        if self.segments is not None:
+            self.segments.refresh()
+            daily_counts = self.segments.daily_counts()
+        else:
+            daily_counts = {}
+            for calc in calculations:
+                date = calc['timestamp'][:10]
+                daily_counts[date] = daily_counts.get(date, 0) + 1
         
         if daily_counts:
             print(f"\n📅 Daily Activity (Last 7 days):")
@@ -324,38 +671,32 @@ class CalculatorHistory:
             if backup_file:
                 print(f"💾 Backup created: {backup_file}")
             
-            self.calculations.clear()
-            self.save_history()
+            self._rewrite(lambda: self.calculations.clear())
             print("🗑️  History cleared successfully!")
         else:
             print("❌ Clear operation cancelled.")
     
+    @instrumentation.timed('history.load', 'persistence')
     def load_history(self):
-        """Load history from file"""
+        """Load history (snapshot plus journal) from file"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    data = json.load(f)
-                    self.calculations = data.get('calculations', [])
-                    print(f"📚 Loaded {len(self.calculations)} calculations from history.")
+            with self.journal.lock.acquire(shared=True):
+                data, self.calculations = self._load_stored()
+            self._enforce_capacity()
+            if data or self.calculations:
+                print(f"📚 Loaded {len(self.calculations)} calculations from history.")
         except Exception as e:
             print(f"⚠️  Warning: Could not load history: {e}")
             self.calculations = []
     
+    @instrumentation.timed('history.save', 'persistence')
     def save_history(self):
-        """Save history to file"""
-        try:
-            data = {
-                'last_updated': datetime.now().isoformat(),
-                'session_start': self.session_start.isoformat(),
-                'calculations': self.calculations
-            }
-            
-            with open(self.history_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
-        except Exception as e:
-            print(f"⚠️  Warning: Could not save history: {e}")
+        """Save the full history as a new snapshot"""
+        self._rewrite()
+    
+    def snapshot(self):
+        """Return an immutable view of the history for reports"""
+        return tuple(self.calculations)
     
     def get_recent_calculations(self, limit=5):
         """Get recent calculations for quick access"""
@@ -388,14 +729,119 @@ class CalculatorHistory:
             print("❌ No calculations to undo!")
             return None
         
-        removed = self.calculations.pop()
-        self.save_history()
-        print(f"↩️  Undone: {removed['calculation']}")
+        removed = self._rewrite(lambda: self.calculations.pop() if self.calculations else None)
+        if removed is None:
+            print("❌ No calculations to undo!")
+            return None
+        print(f"↩️  Undone: {self.format_calculation(removed)}")
         return removed
     
+    def query_calculations(self, operation=None, min_result=None, max_result=None):
+        """Return structured entries filtered by operation and numeric result range"""
+        calculations = self.snapshot()
+        matches = []
+        for entry in calculations:
+            if operation is not None and entry.get('operation') != operation:
+                continue
+            result = entry.get('result')
+            if min_result is not None or max_result is not None:
+                if not isinstance(result, (int, float)):
+                    continue
+                if min_result is not None and result < min_result:
+                    continue
+                if max_result is not None and result > max_result:
+                    continue
+            matches.append(entry)
+        return matches
+    
+    def to_columns(self, fields=('id', 'operation', 'operands', 'result', 'unit',
+                                 'operation_type', 'timestamp')):
+        """Return history as a dict of columns (one list per field)"""
+        calculations = self.snapshot()
+        return {field: [entry.get(field) for entry in calculations] for field in fields}
+    
     def get_calculation_by_id(self, calc_id):
-        """Get a specific calculation by ID"""
-        for calc in self.calculations:
-            if calc['id'] == calc_id:
-                return calc
-        return None
\ No newline at end of file
+        """Get a specific calculation by ID (from memory, else from the archive)"""
+        calculations = self.snapshot()
+        position = bisect.bisect_left(calculations, calc_id, key=lambda entry: entry['id'])
+        if position < len(calculations) and calculations[position]['id'] == calc_id:
+            return calculations[position]
+        
+        archive = self.archive
+        return archive.get_by_id(calc_id) if archive is not None else None
+    
+    def iter_calculations(self, start=None, end=None):
+        """Yield archived then current calculations with start <= timestamp <= end
+        
+        ``start`` and ``end`` are ISO date or timestamp strings; only the
+        archive blocks overlapping the range are decompressed.
+        """
+        archived_id = 0
+        archive = self.archive
+        if archive is not None:
+            yield from archive.iter_range(start, end)
+            if archive.blocks:
+                archived_id = archive.blocks[-1]['max_id']
+        
+        for entry in self.snapshot():
+            timestamp = entry['timestamp']
+            if entry['id'] <= archived_id:
+                continue
+            if start is not None and timestamp < start:
+                continue
+            if end is not None and timestamp[:len(end)] > end:
+                continue
+            yield entry
+
+
+class ThreadSafeCalculatorHistory(CalculatorHistory):
+    """CalculatorHistory that can be shared by worker threads
+    
+    Writers are serialised by one lock, which also covers id assignment
+    and the journal write. After every change an immutable tuple of the
+    history is published, so get_recent_calculations and reports read it
+    without locking and always iterate over a consistent snapshot.
+    """
+    
+    def __init__(self, history_file="calculator_history.json", segment_dir=None,
+                 archive_file=None):
+        self._write_lock = threading.RLock()
+        self._snapshot = ()
+        super().__init__(history_file, segment_dir, archive_file)
+    
+    def _publish(self):
+        """Publish the current history for lock-free readers"""
+        self._snapshot = tuple(self.calculations)
+    
+    def load_history(self):
+        """Load history from file"""
+        with self._write_lock:
+            super().load_history()
+            self._publish()
+    
+    def _append_entries(self, entries):
+        """Append entries while holding the writer lock"""
+        with self._write_lock:
+            super()._append_entries(entries)
+            self._publish()
+    
+    def _rewrite(self, mutate=None):
+        """Rewrite the snapshot while holding the writer lock"""
+        with self._write_lock:
+            result = super()._rewrite(mutate)
+            self._publish()
+        return result
+    
+    def refresh(self):
+        """Pick up calculations appended by other processes"""
+        with self._write_lock:
+            super().refresh()
+            self._publish()
+    
+    def snapshot(self):
+        """Return the last published history (no copy, no lock)"""
+        return self._snapshot
+    
+    def get_recent_calculations(self, limit=5):
+        """Get recent calculations without taking the writer lock"""
+        return list(self._snapshot[-limit:]) if limit > 0 else []
\ No newline at end of file
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Calculator Journal Module
+Multi-process safe persistence for the history file:
+
+* ``<history>.lock``    advisory lock (fcntl) serialising writers
+* ``<history>``         JSON snapshot, replaced atomically via rename
+* ``<history>.journal`` JSON lines appended with O_APPEND since the snapshot
+
+Readers pick up other processes' appends by reading the journal from their
+last offset; a changed snapshot or journal file means a compaction happened
+and triggers a full reload.
+
+Appended entries are timestamped with the wall-clock time while the lock
+is held, so writers on one machine append in timestamp order. Timestamps
+are recorded as they are (a skewed clock is not propagated to later
+entries); ids give the append order.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; locking becomes best effort
+    fcntl = None
+
+
+class FileLock:
+    """Advisory inter-process lock on a separate lock file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def acquire(self, shared=False):
+        """Hold the lock (exclusive by default) for the duration of the block"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _file_identity(path, with_mtime=False):
+    """Identity of a file that changes when it is replaced (None if missing)"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if with_mtime:  # Guards against inode reuse across several replacements
+        return (stat.st_ino, stat.st_dev, stat.st_mtime_ns, stat.st_size)
+    return (stat.st_ino, stat.st_dev)
+
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to a temporary file and rename it over ``path``"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class HistoryJournal:
+    """Snapshot + append-only journal for one history file"""
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.lock = FileLock(snapshot_path + ".lock")
+        self.offset = 0
+        self.journal_entries = 0
+        self._snapshot_identity = None
+        self._journal_identity = None
+
+    def is_stale(self):
+        """Whether the snapshot or journal was replaced since we last read them"""
+        if _file_identity(self.snapshot_path, with_mtime=True) != self._snapshot_identity:
+            return True
+        identity = _file_identity(self.journal_path)
+        if identity != self._journal_identity:
+            # A journal appearing for the first time is not a compaction
+            return not (self._journal_identity is None and self.offset == 0)
+        return identity is not None and os.path.getsize(self.journal_path) < self.offset
+
+    def load(self):
+        """Read the snapshot and the whole journal; returns (snapshot_data, entries)"""
+        self._snapshot_identity = _file_identity(self.snapshot_path, with_mtime=True)
+        data = {}
+        if self._snapshot_identity is not None:
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+
+        self.offset = 0
+        self.journal_entries = 0
+        self._journal_identity = None
+        entries = list(data.get('calculations', []))
+        entries.extend(self.read_new())
+        return data, entries
+
+    def read_new(self):
+        """Return entries appended to the journal since the last read"""
+        identity = _file_identity(self.journal_path)
+        if identity is None:
+            return []
+        self._journal_identity = identity
+
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+
+        # Only consume complete lines; a writer may be mid-append
+        end = chunk.rfind(b'\n') + 1
+        entries = []
+        for line in chunk[:end].splitlines():
+            if line.strip():
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    print("⚠️  Warning: Skipping corrupt history journal line")
+        self.offset += end
+        self.journal_entries += len(entries)
+        return entries
+
+    def append(self, entries):
+        """Stamp entries and append them as JSON lines in one O_APPEND write (hold the lock)"""
+        if not entries:
+            return
+        timestamp = datetime.now().isoformat()  # Under the lock: in append order
+        for entry in entries:
+            entry['timestamp'] = timestamp
+        payload = ''.join(json.dumps(entry) + '\n' for entry in entries).encode('utf-8')
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            written = 0
+            while written < len(payload):
+                written += os.write(fd, payload[written:])
+        finally:
+            os.close(fd)
+        self._journal_identity = _file_identity(self.journal_path)
+        self.offset += len(payload)
+        self.journal_entries += len(entries)
+
+    def write_snapshot(self, data):
+        """Atomically replace the snapshot and start a fresh journal (hold the lock)"""
+        atomic_write_json(self.snapshot_path, data)
+        self._snapshot_identity = _file_identity(self.snapshot_path, with_mtime=True)
+
+        if os.path.exists(self.journal_path):
+            directory = os.path.dirname(os.path.abspath(self.journal_path))
+            fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.journal', dir=directory)
+            os.close(fd)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, self.journal_path)
+        self._journal_identity = _file_identity(self.journal_path)
+        self.offset = 0
+        self.journal_entries = 0
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Calculator Matrix Module
+Pure-Python matrix kernels and block streaming of large matrix files.
+
+Matrices are lists of equal-length rows. The kernels here are used for
+small matrices, where converting to NumPy costs more than the arithmetic,
+and whenever NumPy is not installed:
+
+- products with the row-times-column loop over pre-transposed columns,
+- determinant, inverse and solve with LU decomposition and partial
+  pivoting,
+- least squares with Householder QR (no normal equations).
+
+Large matrices can be kept in ``.npy`` files and memory-mapped. Streaming
+functions read them ``block_rows`` rows at a time, so memory is bounded by
+the block size: products write each block of the result as it is
+computed, and least squares folds each block into a running QR factor.
+"""
+
+import math
+import operator
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # The pure-Python kernels work without NumPy
+    np = None
+
+DEFAULT_BLOCK_ROWS = 65_536
+
+# Pivots smaller than this, relative to the largest entry, count as zero
+SINGULAR_TOLERANCE = 64 * sys.float_info.epsilon
+
+
+def shape(matrix):
+    """(rows, columns) of a list-of-rows matrix"""
+    return len(matrix), len(matrix[0])
+
+
+def transpose(matrix):
+    return [list(column) for column in zip(*matrix)]
+
+
+def multiply(a, b):
+    """Matrix product of two list-of-rows matrices"""
+    columns = list(zip(*b))
+    return [[sum(map(operator.mul, row, column)) for column in columns] for row in a]
+
+
+def elementwise(function, a, b):
+    """Apply a two-argument function entry by entry"""
+    return [[function(x, y) for x, y in zip(row_a, row_b)] for row_a, row_b in zip(a, b)]
+
+
+def _largest(matrix):
+    return max((abs(value) for row in matrix for value in row), default=0.0)
+
+
+def lu_decompose(matrix):
+    """LU factors with partial pivoting: (lu rows, pivot order, sign), or None if singular"""
+    n = len(matrix)
+    lu = [list(map(float, row)) for row in matrix]
+    order = list(range(n))
+    sign = 1
+    tolerance = SINGULAR_TOLERANCE * n * _largest(lu)
+    for k in range(n):
+        pivot = max(range(k, n), key=lambda i: abs(lu[i][k]))
+        if abs(lu[pivot][k]) <= tolerance:
+            return None
+        if pivot != k:
+            lu[k], lu[pivot] = lu[pivot], lu[k]
+            order[k], order[pivot] = order[pivot], order[k]
+            sign = -sign
+        pivot_row = lu[k]
+        for i in range(k + 1, n):
+            row = lu[i]
+            factor = row[k] / pivot_row[k]
+            row[k] = factor
+            if factor:
+                for j in range(k + 1, n):
+                    row[j] -= factor * pivot_row[j]
+    return lu, order, sign
+
+
+def determinant(matrix):
+    """Determinant of a square list-of-rows matrix"""
+    factors = lu_decompose(matrix)
+    if factors is None:
+        return 0.0
+    lu, _, sign = factors
+    return sign * math.prod(lu[i][i] for i in range(len(lu)))
+
+
+def lu_solve(factors, rhs):
+    """Solve with LU factors for the columns of a list-of-rows right-hand side"""
+    lu, order, _ = factors
+    n = len(lu)
+    rows = [list(map(float, rhs[i])) for i in order]
+    for i in range(n):  # Forward substitution (unit lower triangle)
+        for k in range(i):
+            factor = lu[i][k]
+            if factor:
+                rows[i] = [x - factor * y for x, y in zip(rows[i], rows[k])]
+    for i in reversed(range(n)):  # Back substitution
+        for k in range(i + 1, n):
+            factor = lu[i][k]
+            if factor:
+                rows[i] = [x - factor * y for x, y in zip(rows[i], rows[k])]
+        rows[i] = [x / lu[i][i] for x in rows[i]]
+    return rows
+
+
+def householder_least_squares(a, b):
+    """Least-squares solution of a x = b (b: list of rows), or None if rank deficient"""
+    m, n = shape(a)
+    r = [list(map(float, row)) for row in a]
+    rhs = [list(map(float, row)) for row in b]
+    tolerance = SINGULAR_TOLERANCE * max(m, n) * _largest(r)
+    for k in range(n):
+        norm = math.sqrt(math.fsum(r[i][k] ** 2 for i in range(k, m)))
+        if norm <= tolerance:
+            return None
+        alpha = -norm if r[k][k] >= 0 else norm
+        # Reflector v = x - alpha e1, applied as I - 2 v v^T / (v^T v)
+        v = [r[i][k] for i in range(k, m)]
+        v[0] -= alpha
+        vv = math.fsum(x * x for x in v)
+        for target in (r, rhs):
+            for j in range(k if target is r else 0, len(target[0])):
+                dot = math.fsum(v[i - k] * target[i][j] for i in range(k, m))
+                scale = 2 * dot / vv
+                for i in range(k, m):
+                    target[i][j] -= scale * v[i - k]
+    # Back substitution with the upper triangle of R
+    x = [row[:] for row in rhs[:n]]
+    for i in reversed(range(n)):
+        for k in range(i + 1, n):
+            x[i] = [p - r[i][k] * q for p, q in zip(x[i], x[k])]
+        x[i] = [p / r[i][i] for p in x[i]]
+    return x
+
+
+def is_singular(array):
+    """Whether a square NumPy array counts as singular, as in lu_decompose
+
+    LAPACK's solve does not report its pivots, so the same tolerance is
+    applied to the diagonal of a QR factor (which costs less than the
+    solve). Near-singular arrays would otherwise solve to huge values.
+    """
+    if not np.isfinite(array).all():
+        return True
+    diagonal = np.abs(np.diag(np.linalg.qr(array, mode='r')))
+    return diagonal.min() <= SINGULAR_TOLERANCE * len(array) * np.abs(array).max()
+
+
+# Matrix files: memory-mapped .npy, streamed in blocks of rows
+
+def _require_numpy():
+    if np is None:
+        raise ValueError("NumPy is not installed!")
+
+
+def save_matrix(path, matrix, dtype=float):
+    """Write a matrix to an .npy file that can be memory-mapped"""
+    _require_numpy()
+    array = np.asarray(matrix, dtype=dtype)
+    if array.ndim != 2:
+        raise ValueError("Matrix must be 2-dimensional!")
+    np.save(path, array)
+
+
+def open_matrix(path):
+    """Memory-map a 2-D matrix file read-only"""
+    _require_numpy()
+    matrix = np.load(path, mmap_mode='r')
+    if matrix.ndim != 2:
+        raise ValueError(f"{path} does not hold a 2-dimensional matrix!")
+    return matrix
+
+
+def iter_blocks(matrix, block_rows=DEFAULT_BLOCK_ROWS):
+    """(first row, block) for consecutive blocks of rows"""
+    if block_rows < 1:
+        raise ValueError("Block size must be positive!")
+    for start in range(0, matrix.shape[0], block_rows):
+        yield start, np.asarray(matrix[start:start + block_rows])
+
+
+def stream_multiply(a, b, output_path=None, block_rows=DEFAULT_BLOCK_ROWS):
+    """a @ b with a read in blocks of rows; written to an .npy file if output_path is given"""
+    if output_path is None:
+        result = np.empty((a.shape[0], b.shape[1]), dtype=np.result_type(a.dtype, b.dtype))
+    else:
+        result = np.lib.format.open_memmap(output_path, mode='w+',
+                                           dtype=np.result_type(a.dtype, b.dtype),
+                                           shape=(a.shape[0], b.shape[1]))
+    for start, block in iter_blocks(a, block_rows):
+        np.matmul(block, b, out=result[start:start + len(block)])
+    if output_path is not None:
+        result.flush()
+    return result
+
+
+def stream_least_squares(a, b, block_rows=DEFAULT_BLOCK_ROWS):
+    """Least squares of a x = b, a and b read in blocks of rows; returns (x, residual norms)
+
+    The triangular factor R of the augmented matrix [a | b] is updated
+    block by block (QR of R stacked on the next block), so memory holds one
+    block and an (n + k) x (n + k) triangle. x solves R x = Q^T b.
+    """
+    n = a.shape[1]
+    k = b.shape[1]
+    r = np.zeros((0, n + k))
+    for start, block in iter_blocks(a, block_rows):
+        rhs = np.asarray(b[start:start + len(block)], dtype=float)
+        r = np.linalg.qr(np.vstack([r, np.hstack([block, rhs])]), mode='r')
+    if r.shape[0] < n:
+        raise ValueError("Least squares needs at least as many rows as columns!")
+    diagonal = np.abs(np.diag(r[:n, :n]))
+    if diagonal.min() <= SINGULAR_TOLERANCE * max(a.shape) * diagonal.max():
+        raise ValueError("Matrix columns are linearly dependent!")
+    x = np.linalg.solve(np.triu(r[:n, :n]), r[:n, n:])
+    residuals = np.linalg.norm(r[n:, n:], axis=0) if r.shape[0] > n else np.zeros(k)
+    return x, residuals
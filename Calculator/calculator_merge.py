@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Calculator Merge Module
+Merge history files collected from many machines into one history.
+
+Inputs may be history snapshots (plus their ``.journal``), JSON exports,
+JSON-lines exports and compressed block files. Every input is streamed
+and k-way merged with heapq.merge, so memory stays bounded by the number
+of inputs rather than the number of calculations. Inputs are normally in
+timestamp order; one that turns out not to be (e.g. a journal written
+before timestamps were taken under the lock) is sorted in runs spilled
+to temporary files, and the merge starts over. Duplicates (the same
+record: session, id, timestamp and contents) are dropped and the merged
+calculations get new global ids.
+
+Usage:
+    python calculator_merge.py -o merged.json host1.json host2.json exports/*.json
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from itertools import islice
+from calculator_blockstore import BlockHistoryReader, write_block_file
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Calculations sorted in memory at a time when an input is out of order
+SORT_RUN_ENTRIES = 100_000
+
+
+class UnsortedInputError(ValueError):
+    """A merge input is not in timestamp order"""
+
+    def __init__(self, stream):
+        super().__init__(f"Input {stream} is not in timestamp order")
+        self.stream = stream
+
+
+def iter_json_array(f, key='calculations', chunk_size=READ_CHUNK_SIZE):
+    """Yield the items of the array stored under ``key`` without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_size)
+        if chunk:
+            # Drop consumed text so the buffer stays about one chunk long
+            buffer = buffer[position:] + chunk
+            position = 0
+        else:
+            eof = True
+
+    # Find the start of the array
+    marker = json.dumps(key)
+    while True:
+        start = buffer.find(marker)
+        if start != -1:
+            bracket = buffer.find('[', start + len(marker))
+            if bracket != -1:
+                position = bracket + 1
+                break
+        if eof:
+            return
+        read_more()  # Keeps the whole prefix, which is only a few small fields
+
+    while True:
+        # Skip separators between items
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            read_more()
+        if position >= len(buffer) or buffer[position] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError(f"Truncated JSON array in {getattr(f, 'name', 'input')}")
+            read_more()
+            continue
+
+        yield item
+        position = end
+
+
+def iter_history_file(path):
+    """Yield the calculations stored in a history, export, JSON-lines or block file"""
+    if path.endswith('.blk'):
+        yield from BlockHistoryReader(path)
+        return
+
+    if path.endswith('.jsonl') or path.endswith('.journal'):
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if os.path.exists(path):  # No snapshot before the first compaction
+        with open(path, 'r') as f:
+            yield from iter_json_array(f)
+    # Calculations appended since the snapshot was written
+    if os.path.exists(path + '.journal'):
+        yield from iter_history_file(path + '.journal')
+
+
+def _timestamp(entry):
+    return entry['timestamp']
+
+
+def _checked(stream, number):
+    """Pass a stream through, raising UnsortedInputError if a timestamp goes back"""
+    last = ''
+    for entry in stream:
+        timestamp = entry['timestamp']
+        if timestamp < last:
+            raise UnsortedInputError(number)
+        last = timestamp
+        yield entry
+
+
+def _record_key(entry):
+    """Identity of a stored calculation; the rendered string of exports is ignored"""
+    if 'operation' in entry and 'calculation' in entry:
+        entry = {name: value for name, value in entry.items() if name != 'calculation'}
+    return json.dumps(entry, sort_keys=True)
+
+
+def sorted_runs(entries, run_entries=SORT_RUN_ENTRIES):
+    """Streams that together hold ``entries``, each in timestamp order
+
+    Runs of ``run_entries`` calculations are sorted in memory; when there
+    is more than one, each run is spilled to a temporary JSON-lines file.
+    """
+    entries = iter(entries)
+    run = sorted(islice(entries, run_entries), key=_timestamp)
+    if len(run) < run_entries:
+        return [iter(run)]
+
+    runs = []
+    while run:
+        f = tempfile.TemporaryFile('w+')
+        for entry in run:
+            f.write(json.dumps(entry) + '\n')
+        f.seek(0)
+        runs.append(_read_run(f))
+        run = sorted(islice(entries, run_entries), key=_timestamp)
+    return runs
+
+
+def _read_run(f):
+    with f:  # Temporary file: deleted when closed
+        for line in f:
+            yield json.loads(line)
+
+
+def merge_calculations(streams):
+    """Yield calculations from several streams in timestamp order, without duplicates
+
+    Each stream must be in timestamp order (history files written under
+    the lock are); otherwise UnsortedInputError names the first stream
+    found out of order. The yielded entries still carry their original ids.
+    """
+    merged = heapq.merge(*(_checked(stream, number) for number, stream in enumerate(streams)),
+                         key=_timestamp)
+
+    # Copies of a record share its timestamp, so keys are only kept for the current one
+    current_timestamp = None
+    seen = set()
+    for entry in merged:
+        if entry['timestamp'] != current_timestamp:
+            current_timestamp = entry['timestamp']
+            seen.clear()
+        key = _record_key(entry)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield entry
+
+
+class HistoryMerger:
+    """Merges history files into one, writing the result incrementally"""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.unsorted = set()  # Inputs found out of timestamp order
+        self.read = 0
+        self.written = 0
+
+    def iter_merged(self):
+        """Yield merged calculations with new global ids
+
+        Raises UnsortedInputError (after adding the input to ``unsorted``)
+        if an input is out of order; iterate again to merge it sorted.
+        """
+        def counted(path):
+            for entry in iter_history_file(path):
+                self.read += 1
+                yield entry
+
+        streams, sources = [], []
+        for path in self.paths:
+            if path in self.unsorted:
+                runs = sorted_runs(counted(path))
+                streams.extend(runs)
+                sources.extend([path] * len(runs))
+            else:
+                streams.append(counted(path))
+                sources.append(path)
+
+        try:
+            for entry in merge_calculations(streams):
+                entry = dict(entry)
+                if 'operation' in entry:
+                    entry.pop('calculation', None)  # Exports add the rendered string
+                self.written += 1
+                entry['id'] = self.written
+                yield entry
+        except UnsortedInputError as e:
+            self.unsorted.add(sources[e.stream])
+            raise
+
+    @property
+    def duplicates(self):
+        """Calculations dropped as duplicates so far"""
+        return self.read - self.written
+
+    def write(self, output):
+        """Write the merged history; the format follows the extension (.json, .jsonl, .blk)"""
+        while True:
+            try:
+                return self._write(output)
+            except UnsortedInputError:
+                continue  # Start over with that input sorted (see iter_merged)
+
+    def _write(self, output):
+        self.read = self.written = 0
+        if output.endswith('.blk'):
+            write_block_file(output, self.iter_merged())
+            return self.written
+
+        directory = os.path.dirname(os.path.abspath(output))
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                if output.endswith('.jsonl'):
+                    for entry in self.iter_merged():
+                        f.write(json.dumps(entry) + '\n')
+                else:
+                    # Same layout as a CalculatorHistory snapshot, one entry per line
+                    f.write('{\n  "last_updated": %s,\n  "session_start": null,\n'
+                            '  "calculations": [' % json.dumps(datetime.now().isoformat()))
+                    separator = '\n    '
+                    for entry in self.iter_merged():
+                        f.write(separator + json.dumps(entry))
+                        separator = ',\n    '
+                    f.write('\n  ]\n}\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, output)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return self.written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge calculator history files")
+    parser.add_argument('inputs', nargs='+', help="history, export, .jsonl or .blk files")
+    parser.add_argument('-o', '--output', required=True,
+                        help="merged file (.json history, .jsonl or .blk)")
+    args = parser.parse_args(argv)
+
+    missing = [path for path in args.inputs
+               if not os.path.exists(path) and not os.path.exists(path + '.journal')]
+    if missing:
+        print(f"❌ Input not found: {', '.join(missing)}")
+        return 1
+
+    merger = HistoryMerger(args.inputs)
+    try:
+        written = merger.write(args.output)
+    except (OSError, ValueError) as e:
+        print(f"❌ Merge failed: {e}")
+        return 1
+
+    print(f"✅ Merged {written} calculations from {len(args.inputs)} files into {args.output}")
+    print(f"🧹 Removed {merger.duplicates} duplicates")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Calculator Numerics Module
+Root finding, integration and differentiation of functions, for one
+problem or for arrays of independent problems at once.
+
+Functions are called as ``f(x, *args)``. When ``x`` or any of ``args`` is
+a NumPy array the problems are solved together: extra arguments are
+broadcast against ``x``, and every iteration evaluates ``f`` once on the
+still unfinished problems only (their values of ``x`` and ``args``), so
+``f`` must work element-wise on arrays. A problem that fails to converge
+does not stop the others; its ``converged`` flag is False. Scalar problems
+run in pure Python, as do lists when NumPy is not installed.
+
+Example, the rate (in %) that turns each principal into ``interest`` over
+``years`` with monthly compounding::
+
+    def excess(rate, principal, interest, years):
+        return principal * (1 + rate / 1200) ** (12 * years) - principal - interest
+
+    result = brent(excess, 0.0, 100.0, args=(principal, interest, years))
+"""
+
+import math
+import sys
+
+try:
+    import numpy as np
+except ImportError:  # Batched problems are solved one by one without NumPy
+    np = None
+
+EPSILON = sys.float_info.epsilon
+DEFAULT_XTOL = 1e-12
+DEFAULT_RTOL = 4 * EPSILON
+DEFAULT_MAX_ITERATIONS = 100
+DEFAULT_QUAD_TOL = 1e-10
+DEFAULT_MAX_DEPTH = 50
+DEFAULT_MAX_INTERVALS = 16_384  # Subintervals refined together: bounds memory, stays in cache
+SIMPSON_MIN_DEPTH = 4
+KRONROD_MIN_DEPTH = 1
+
+# 7-point Gauss / 15-point Kronrod nodes and weights on [-1, 1] (QUADPACK qk15)
+KRONROD_NODES = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+                 0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+                 0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+                 0.207784955007898467600689403773245, 0.0)
+KRONROD_WEIGHTS = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+                   0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+                   0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+                   0.204432940075298892414161999234649, 0.209482141084727828012999174891714)
+GAUSS_WEIGHTS = (0.0, 0.129484966168869693270611432679082, 0.0, 0.279705391489276667901467771423780,
+                 0.0, 0.381830050505118944950369775488975, 0.0, 0.417959183673469387755102040816327)
+
+
+class NumericResult:
+    """Solution values with per-problem convergence information"""
+
+    __slots__ = ('value', 'converged', 'iterations', 'error')
+
+    def __init__(self, value, converged, iterations, error=None):
+        self.value = value
+        self.converged = converged
+        self.iterations = iterations  # Iterations (solvers) or subdivision rounds (quadrature)
+        self.error = error  # Error estimate (quadrature)
+
+    def __repr__(self):
+        return (f"NumericResult(value={self.value!r}, converged={self.converged!r}, "
+                f"iterations={self.iterations!r})")
+
+
+def _is_batch(*values):
+    return np is not None and any(isinstance(value, np.ndarray) for value in values)
+
+
+def _is_list(value):
+    return isinstance(value, (list, tuple))
+
+
+def _broadcast(values, args):
+    """Broadcast to one shape; returns (shape, flat float copies of values, flat args)"""
+    shape = np.broadcast_shapes(*[np.shape(value) for value in list(values) + list(args)])
+    arrays = [np.broadcast_to(np.asarray(value, dtype=float), shape).ravel().copy()
+              for value in values]
+    flat = [np.broadcast_to(arg, shape).ravel() for arg in args]
+    return shape, arrays, flat
+
+
+def _evaluate(f, x, args):
+    """f on an array of points, as a float array of the same shape"""
+    return np.broadcast_to(np.asarray(f(x, *args), dtype=float), np.shape(x))
+
+
+def _per_problem(solve, arrays, args):
+    """Pure-Python fallback for lists of problems: solve them one at a time"""
+    count = max(len(value) for value in list(arrays) + list(args) if _is_list(value))
+    pick = lambda value, index: value[index] if _is_list(value) else value
+    results = [solve(*[pick(value, index) for value in arrays],
+                     tuple(pick(value, index) for value in args))
+               for index in range(count)]
+    return NumericResult([result.value for result in results],
+                         [result.converged for result in results],
+                         [result.iterations for result in results],
+                         [result.error for result in results])
+
+
+# Differentiation
+
+def derivative(f, x, args=(), order=1, step=None):
+    """First or second derivative by a five-point central difference"""
+    if order not in (1, 2):
+        raise ValueError("Only first and second derivatives are supported!")
+    if _is_batch(x, *args):
+        x = np.asarray(x, dtype=float)
+        scale = np.maximum(1.0, np.abs(x))
+    else:
+        scale = max(1.0, abs(x))
+    if step is None:
+        # Balances truncation (h**4) against rounding (eps / h**order)
+        step = (EPSILON ** (1 / 5) if order == 1 else EPSILON ** (1 / 6)) * scale
+    step = (x + step) - x  # Exactly representable step
+
+    if order == 1:
+        return (f(x - 2 * step, *args) - 8 * f(x - step, *args)
+                + 8 * f(x + step, *args) - f(x + 2 * step, *args)) / (12 * step)
+    return (-f(x + 2 * step, *args) + 16 * f(x + step, *args) - 30 * f(x, *args)
+            + 16 * f(x - step, *args) - f(x - 2 * step, *args)) / (12 * step * step)
+
+
+# Root finding
+
+def newton(f, x0, fprime=None, args=(), xtol=DEFAULT_XTOL, rtol=DEFAULT_RTOL,
+           max_iterations=DEFAULT_MAX_ITERATIONS):
+    """Newton's method from x0 (derivative by finite differences unless fprime is given)"""
+    if max_iterations < 1:
+        raise ValueError("At least one iteration is needed!")
+    if not _is_batch(x0, *args):
+        if _is_list(x0) or any(_is_list(arg) for arg in args):
+            return _per_problem(lambda start, problem_args: newton(
+                f, start, fprime, problem_args, xtol, rtol, max_iterations), [x0], args)
+        return _newton_scalar(f, x0, fprime, args, xtol, rtol, max_iterations)
+
+    shape, (x,), args = _broadcast([x0], args)
+    converged = np.zeros(x.size, dtype=bool)
+    iterations = np.zeros(x.size, dtype=int)
+    active = np.arange(x.size)
+    for _ in range(max_iterations):
+        if active.size == 0:
+            break
+        current = x[active]
+        current_args = [arg[active] for arg in args]
+        value = _evaluate(f, current, current_args)
+        slope = (_evaluate(fprime, current, current_args) if fprime is not None
+                 else derivative(f, current, current_args))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = value / slope
+        usable = np.isfinite(delta)
+        updated = np.where(usable, current - delta, current)
+        x[active] = updated
+        iterations[active] += 1
+        done = (value == 0) | (usable & (np.abs(delta) <= xtol + rtol * np.abs(updated)))
+        converged[active[done]] = True
+        active = active[usable & ~done]  # A zero or non-finite slope ends that problem
+    return NumericResult(x.reshape(shape), converged.reshape(shape), iterations.reshape(shape))
+
+
+def _newton_scalar(f, x, fprime, args, xtol, rtol, max_iterations):
+    for iteration in range(1, max_iterations + 1):
+        value = f(x, *args)
+        if value == 0:
+            return NumericResult(x, True, iteration)
+        slope = fprime(x, *args) if fprime is not None else derivative(f, x, args)
+        if slope == 0 or not math.isfinite(slope):
+            return NumericResult(x, False, iteration)
+        delta = value / slope
+        x -= delta
+        if abs(delta) <= xtol + rtol * abs(x):
+            return NumericResult(x, True, iteration)
+    return NumericResult(x, False, max_iterations)
+
+
+def brent(f, lower, upper, args=(), xtol=DEFAULT_XTOL, rtol=DEFAULT_RTOL,
+          max_iterations=DEFAULT_MAX_ITERATIONS):
+    """Brent's method on brackets [lower, upper] where f changes sign
+
+    Combines inverse quadratic interpolation, secant steps and bisection:
+    as fast as the interpolation when it behaves, never slower than
+    bisection. Batched problems without a sign change are reported as not
+    converged (ValueError for a single problem).
+    """
+    if max_iterations < 1:
+        raise ValueError("At least one iteration is needed!")
+    if not _is_batch(lower, upper, *args):
+        if _is_list(lower) or _is_list(upper) or any(_is_list(arg) for arg in args):
+            def solve(a, b, problem_args):
+                try:
+                    return brent(f, a, b, problem_args, xtol, rtol, max_iterations)
+                except ValueError:
+                    return NumericResult(math.nan, False, 0)
+            return _per_problem(solve, [lower, upper], args)
+        return _brent_scalar(f, float(lower), float(upper), args, xtol, rtol, max_iterations)
+
+    shape, (a, b), args = _broadcast([lower, upper], args)
+    fa = _evaluate(f, a, args).copy()
+    fb = _evaluate(f, b, args).copy()
+    c, fc = a.copy(), fa.copy()
+    d, e = b - a, b - a
+    converged = np.zeros(b.size, dtype=bool)
+    iterations = np.zeros(b.size, dtype=int)
+    bracketed = np.sign(fa) * np.sign(fb) <= 0
+    b = np.where(bracketed, b, np.nan)
+    active = np.flatnonzero(bracketed)
+
+    for iteration in range(max_iterations + 1):
+        if active.size == 0:
+            break
+        A, B, C = a[active], b[active], c[active]
+        FA, FB, FC = fa[active], fb[active], fc[active]
+        D, E = d[active], e[active]
+
+        # Keep the root between b and c
+        same_side = (FB > 0) == (FC > 0)
+        C = np.where(same_side, A, C)
+        FC = np.where(same_side, FA, FC)
+        D = np.where(same_side, B - A, D)
+        E = np.where(same_side, B - A, E)
+        # b is the best estimate so far
+        swap = np.abs(FC) < np.abs(FB)
+        A, B, C = np.where(swap, B, A), np.where(swap, C, B), np.where(swap, B, C)
+        FA, FB, FC = np.where(swap, FB, FA), np.where(swap, FC, FB), np.where(swap, FB, FC)
+
+        tol = 2 * rtol * np.abs(B) + 0.5 * xtol
+        half = 0.5 * (C - B)
+        done = (np.abs(half) <= tol) | (FB == 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = FB / FA
+            secant = A == C
+            q_ratio, r_ratio = FA / FC, FB / FC
+            p = np.where(secant, 2 * half * s,
+                         s * (2 * half * q_ratio * (q_ratio - r_ratio) - (B - A) * (r_ratio - 1)))
+            q = np.where(secant, 1 - s, (q_ratio - 1) * (r_ratio - 1) * (s - 1))
+            q = np.where(p > 0, -q, q)
+            p = np.abs(p)
+            interpolate = ((np.abs(E) >= tol) & (np.abs(FA) > np.abs(FB))
+                           & (2 * p < np.minimum(3 * half * q - np.abs(tol * q), np.abs(E * q))))
+            E = np.where(interpolate, D, half)
+            D = np.where(interpolate, p / q, half)
+
+        A, FA = B, FB
+        B = np.where(np.abs(D) > tol, B + D, B + np.where(half > 0, tol, -tol))
+        B = np.where(done, A, B)
+
+        a[active], c[active], fa[active], fc[active] = A, C, FA, FC
+        d[active], e[active], b[active] = D, E, B
+        converged[active[done]] = True
+        active = active[~done]
+        if active.size and iteration < max_iterations:
+            iterations[active] += 1
+            fb[active] = _evaluate(f, b[active], [arg[active] for arg in args])
+    return NumericResult(b.reshape(shape), converged.reshape(shape), iterations.reshape(shape))
+
+
+def _brent_scalar(f, a, b, args, xtol, rtol, max_iterations):
+    fa, fb = f(a, *args), f(b, *args)
+    if fa * fb > 0:
+        raise ValueError("The function must change sign between the bounds!")
+    c, fc = a, fa
+    d = e = b - a
+    for iteration in range(max_iterations + 1):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2 * rtol * abs(b) + 0.5 * xtol
+        half = 0.5 * (c - b)
+        if abs(half) <= tol or fb == 0:
+            return NumericResult(b, True, iteration)
+        if iteration == max_iterations:
+            break
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                p, q = 2 * half * s, 1 - s  # Secant
+            else:
+                q, r = fa / fc, fb / fc  # Inverse quadratic interpolation
+                p = s * (2 * half * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * half * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = half
+        else:
+            d = e = half
+        a, fa = b, fb
+        b += d if abs(d) > tol else math.copysign(tol, half)
+        fb = f(b, *args)
+    return NumericResult(b, False, max_iterations)
+
+
+# Integration
+#
+# Both rules bisect any subinterval whose error estimate exceeds its share
+# of the tolerance (halved with every bisection). Batched problems keep
+# their pending subintervals in arrays that are refined a batch of at most
+# ``max_intervals`` at a time, depth first, so memory stays bounded.
+
+def _check_quad_limits(tol, min_depth, max_depth, max_intervals):
+    if tol <= 0:
+        raise ValueError("Tolerance must be positive!")
+    if not 0 <= min_depth <= max_depth:
+        raise ValueError("Depths must satisfy 0 <= min_depth <= max_depth!")
+    if max_intervals < 1:
+        raise ValueError("At least one interval must fit in a batch!")
+
+
+def _adaptive(count, state, refine, min_depth, max_depth, max_intervals):
+    """Drive batched adaptive quadrature; returns (totals, errors, converged, rounds)
+
+    ``state`` maps names to equally long arrays describing subintervals
+    (at least problem, low, high, tol and depth). ``refine(state)`` returns
+    the estimate, error estimate and the two half-interval states.
+    """
+    total, error = np.zeros(count), np.zeros(count)
+    converged = np.ones(count, dtype=bool)
+    rounds = np.zeros(count, dtype=int)
+    stack = [state]
+    while stack:
+        state = stack.pop()
+        if state['problem'].size > max_intervals:
+            stack.append({key: value[max_intervals:] for key, value in state.items()})
+            state = {key: value[:max_intervals] for key, value in state.items()}
+
+        estimate, difference, left, right = refine(state)
+        problem, low, high, depth = state['problem'], state['low'], state['high'], state['depth']
+        np.maximum.at(rounds, problem, depth + 1)
+        center = (low + high) / 2
+        good = (difference <= state['tol']) & (depth >= min_depth)
+        forced = ~good & ((depth >= max_depth) | ~np.isfinite(difference)
+                          | (center <= low) | (center >= high))
+        accept = good | forced
+        converged[problem[forced]] = False
+        total += np.bincount(problem[accept], weights=estimate[accept], minlength=count)
+        error += np.bincount(problem[accept], weights=difference[accept], minlength=count)
+
+        split = np.flatnonzero(~accept)
+        if split.size:
+            stack.append({key: np.concatenate([left[key].take(split), right[key].take(split)])
+                          for key in left})
+    return total, error, converged, rounds
+
+
+def _halves(state, center):
+    """Common fields of the two half-interval states"""
+    shared = {'problem': state['problem'], 'tol': state['tol'] / 2, 'depth': state['depth'] + 1}
+    return (dict(shared, low=state['low'], high=center),
+            dict(shared, low=center, high=state['high']))
+
+
+def simpson(f, lower, upper, args=(), tol=DEFAULT_QUAD_TOL, min_depth=SIMPSON_MIN_DEPTH,
+            max_depth=DEFAULT_MAX_DEPTH, max_intervals=DEFAULT_MAX_INTERVALS):
+    """Adaptive Simpson integration of f over [lower, upper] to absolute tolerance tol
+
+    ``min_depth`` bisections happen before any estimate is trusted, so a
+    periodic integrand cannot fool the error estimate with its first few
+    samples.
+    """
+    _check_quad_limits(tol, min_depth, max_depth, max_intervals)
+    if not _is_batch(lower, upper, *args):
+        if _is_list(lower) or _is_list(upper) or any(_is_list(arg) for arg in args):
+            return _per_problem(lambda a, b, problem_args: simpson(
+                f, a, b, problem_args, tol, min_depth, max_depth, max_intervals),
+                [lower, upper], args)
+        return _simpson_scalar(f, float(lower), float(upper), args, tol, min_depth, max_depth)
+
+    shape, (low, high), args = _broadcast([lower, upper], args)
+    count = low.size
+    f_low, f_mid, f_high = (_evaluate(f, low, args), _evaluate(f, (low + high) / 2, args),
+                            _evaluate(f, high, args))
+    state = {
+        'problem': np.arange(count), 'low': low, 'high': high,
+        'tol': np.full(count, float(tol)), 'depth': np.zeros(count, dtype=int),
+        'f_low': f_low, 'f_mid': f_mid, 'f_high': f_high,
+        'whole': (high - low) / 6 * (f_low + 4 * f_mid + f_high),
+    }
+
+    def refine(state):
+        low, high = state['low'], state['high']
+        f_low, f_mid, f_high = state['f_low'], state['f_mid'], state['f_high']
+        problem_args = [arg[state['problem']] for arg in args]
+        mid = (low + high) / 2
+        f_left = _evaluate(f, (low + mid) / 2, problem_args)
+        f_right = _evaluate(f, (mid + high) / 2, problem_args)
+        left = (mid - low) / 6 * (f_low + 4 * f_left + f_mid)
+        right = (high - mid) / 6 * (f_mid + 4 * f_right + f_high)
+        delta = left + right - state['whole']
+        left_state, right_state = _halves(state, mid)
+        left_state.update(f_low=f_low, f_mid=f_left, f_high=f_mid, whole=left)
+        right_state.update(f_low=f_mid, f_mid=f_right, f_high=f_high, whole=right)
+        # Richardson-corrected estimate; |delta| / 15 estimates its error
+        return left + right + delta / 15, np.abs(delta) / 15, left_state, right_state
+
+    total, error, converged, rounds = _adaptive(count, state, refine, min_depth, max_depth,
+                                                max_intervals)
+    return NumericResult(total.reshape(shape), converged.reshape(shape),
+                         rounds.reshape(shape), error.reshape(shape))
+
+
+def _simpson_scalar(f, a, b, args, tol, min_depth, max_depth):
+    f_a, f_m, f_b = f(a, *args), f((a + b) / 2, *args), f(b, *args)
+    stack = [(a, b, f_a, f_m, f_b, (b - a) / 6 * (f_a + 4 * f_m + f_b), tol, 0)]
+    total = error = 0.0
+    converged = True
+    deepest = 0
+    while stack:
+        low, high, f_low, f_mid, f_high, whole, local_tol, depth = stack.pop()
+        deepest = max(deepest, depth + 1)
+        mid = (low + high) / 2
+        f_left, f_right = f((low + mid) / 2, *args), f((mid + high) / 2, *args)
+        left = (mid - low) / 6 * (f_low + 4 * f_left + f_mid)
+        right = (high - mid) / 6 * (f_mid + 4 * f_right + f_high)
+        delta = left + right - whole
+        good = abs(delta) / 15 <= local_tol and depth >= min_depth
+        if good or depth >= max_depth or not low < mid < high or not math.isfinite(delta):
+            total += left + right + delta / 15
+            error += abs(delta) / 15
+            converged = converged and good
+        else:
+            stack.append((mid, high, f_mid, f_right, f_high, right, local_tol / 2, depth + 1))
+            stack.append((low, mid, f_low, f_left, f_mid, left, local_tol / 2, depth + 1))
+    return NumericResult(total, converged, deepest, error)
+
+
+def _kronrod_rule():
+    """All 15 nodes (ascending) with Kronrod and Gauss weights"""
+    nodes = [-x for x in KRONROD_NODES[:-1]] + list(reversed(KRONROD_NODES))
+    kronrod = list(KRONROD_WEIGHTS[:-1]) + list(reversed(KRONROD_WEIGHTS))
+    gauss = list(GAUSS_WEIGHTS[:-1]) + list(reversed(GAUSS_WEIGHTS))
+    return nodes, kronrod, gauss
+
+
+def gauss_kronrod(f, lower, upper, args=(), tol=DEFAULT_QUAD_TOL, min_depth=KRONROD_MIN_DEPTH,
+                  max_depth=DEFAULT_MAX_DEPTH, max_intervals=DEFAULT_MAX_INTERVALS):
+    """Adaptive 7/15-point Gauss-Kronrod integration of f over [lower, upper]
+
+    Exact for polynomials up to degree 22 on each subinterval; the
+    difference between the Gauss and Kronrod estimates is the error
+    estimate that decides whether to bisect.
+    """
+    _check_quad_limits(tol, min_depth, max_depth, max_intervals)
+    if not _is_batch(lower, upper, *args):
+        if _is_list(lower) or _is_list(upper) or any(_is_list(arg) for arg in args):
+            return _per_problem(lambda a, b, problem_args: gauss_kronrod(
+                f, a, b, problem_args, tol, min_depth, max_depth, max_intervals),
+                [lower, upper], args)
+        return _gauss_kronrod_scalar(f, float(lower), float(upper), args, tol, min_depth,
+                                     max_depth)
+
+    shape, (low, high), args = _broadcast([lower, upper], args)
+    count = low.size
+    nodes, kronrod, gauss = (np.array(values) for values in _kronrod_rule())
+    state = {
+        'problem': np.arange(count), 'low': low, 'high': high,
+        'tol': np.full(count, float(tol)), 'depth': np.zeros(count, dtype=int),
+    }
+
+    def refine(state):
+        low, high = state['low'], state['high']
+        center, half = (low + high) / 2, (high - low) / 2
+        points = center[:, None] + half[:, None] * nodes
+        values = _evaluate(f, points, [arg[state['problem']][:, None] for arg in args])
+        estimate = half * (values @ kronrod)
+        difference = np.abs(estimate - half * (values @ gauss))
+        return (estimate, difference) + _halves(state, center)
+
+    # 15 samples per subinterval, and always at least one subinterval per batch
+    total, error, converged, rounds = _adaptive(count, state, refine, min_depth, max_depth,
+                                                max(1, max_intervals // 15))
+    return NumericResult(total.reshape(shape), converged.reshape(shape),
+                         rounds.reshape(shape), error.reshape(shape))
+
+
+def _gauss_kronrod_scalar(f, a, b, args, tol, min_depth, max_depth):
+    nodes, kronrod, gauss = _kronrod_rule()
+    stack = [(a, b, tol, 0)]
+    total = error = 0.0
+    converged = True
+    deepest = 0
+    while stack:
+        low, high, local_tol, depth = stack.pop()
+        deepest = max(deepest, depth + 1)
+        center, half = (low + high) / 2, (high - low) / 2
+        values = [f(center + half * node, *args) for node in nodes]
+        estimate = half * math.fsum(w * v for w, v in zip(kronrod, values))
+        difference = abs(estimate - half * math.fsum(w * v for w, v in zip(gauss, values)))
+        good = difference <= local_tol and depth >= min_depth
+        if good or depth >= max_depth or not low < center < high or not math.isfinite(difference):
+            total += estimate
+            error += difference
+            converged = converged and good
+        else:
+            stack.append((center, high, local_tol / 2, depth + 1))
+            stack.append((low, center, local_tol / 2, depth + 1))
+    return NumericResult(total, converged, deepest, error)
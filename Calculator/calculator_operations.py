@@ -5,6 +5,73 @@ Contains all mathematical operations for the complex calculator
 """
 
 import math
+import sys
+from contextlib import nullcontext
+from calculator_units import default_registry
+
+# Modules for series, matrices, grouping, regression, polynomials and root
+# finding (and NumPy through them) are imported by the methods that use
+# them, so starting the calculator does not load them.
+
+# Trigonometric lookup tables cover one full turn at half-degree resolution,
+# so integer and half-degree angles are answered with a single list index.
+TRIG_TABLE_STEPS_PER_DEGREE = 2
+TRIG_TABLE_SIZE = 360 * TRIG_TABLE_STEPS_PER_DEGREE
+
+# Exact values in the first quadrant for the common angles
+_EXACT_SINE = {0: 0.0, 30: 0.5, 45: math.sqrt(2) / 2, 60: math.sqrt(3) / 2, 90: 1.0}
+_EXACT_TANGENT = {0: 0.0, 30: math.sqrt(3) / 3, 45: 1.0, 60: math.sqrt(3)}
+
+
+def _exact_sine(degrees):
+    """Exact sine for multiples of 30° and 45° in [0, 360), else None"""
+    reduced = degrees % 180
+    reference = reduced if reduced <= 90 else 180 - reduced
+    if reference not in _EXACT_SINE:
+        return None
+    value = _EXACT_SINE[reference]
+    return -value if degrees >= 180 and value else value
+
+
+def _exact_tangent(degrees):
+    """Exact tangent for multiples of 30° and 45° in [0, 360), else None"""
+    reduced = degrees % 180
+    if reduced == 90:
+        return None
+    reference = reduced if reduced < 90 else 180 - reduced
+    if reference not in _EXACT_TANGENT:
+        return None
+    value = _EXACT_TANGENT[reference]
+    return -value if reduced > 90 else value
+
+
+def _build_trig_tables():
+    """Precompute sine, cosine and tangent for every table step of one turn"""
+    sine_table, cosine_table, tangent_table = [], [], []
+    for index in range(TRIG_TABLE_SIZE):
+        degrees = index / TRIG_TABLE_STEPS_PER_DEGREE
+        radians = math.radians(degrees)
+        exact_degrees = int(degrees) if degrees.is_integer() else None
+
+        sine = _exact_sine(exact_degrees) if exact_degrees is not None else None
+        cosine = _exact_sine((exact_degrees + 90) % 360) if exact_degrees is not None else None
+        sine_table.append(sine if sine is not None else round(math.sin(radians), 10))
+        cosine_table.append(cosine if cosine is not None else round(math.cos(radians), 10))
+
+        if degrees % 180 == 90:
+            tangent_table.append(None)  # Undefined
+            continue
+        tangent = _exact_tangent(exact_degrees) if exact_degrees is not None else None
+        tangent_table.append(tangent if tangent is not None else round(math.tan(radians), 10))
+    return sine_table, cosine_table, tangent_table
+
+
+SINE_TABLE, COSINE_TABLE, TANGENT_TABLE = _build_trig_tables()
+
+# List matrices up to this many rows and columns are computed in pure Python;
+# beyond it, converting to NumPy and back is cheaper than the Python loops
+SMALL_MATRIX_SIZE = 3
+
 
 class BasicOperations:
     """Basic arithmetic operations"""
@@ -40,19 +107,263 @@ class BasicOperations:
         return a // b
 
 
+class MatrixOperations:
+    """Matrix and linear-algebra operations
+    
+    Matrices are lists of equal-length rows or 2-D NumPy arrays. Arrays, and
+    list matrices with more than SMALL_MATRIX_SIZE rows or columns, are
+    computed with NumPy (BLAS/LAPACK); small list matrices, and every matrix
+    when NumPy is not installed, use the pure-Python kernels in
+    calculator_matrix. Results are arrays for array inputs, lists otherwise.
+    """
+
+    def __init__(self):
+        import calculator_matrix  # Imports NumPy when it is installed
+        self.kernels = calculator_matrix
+        self.np = calculator_matrix.np
+
+    def _matrix(self, matrix, name="Matrix"):
+        """Validate a matrix; returns its shape"""
+        if self.np is not None and isinstance(matrix, self.np.ndarray):
+            if matrix.ndim != 2 or matrix.size == 0:
+                raise ValueError(f"{name} must be a non-empty 2-dimensional array!")
+            return matrix.shape
+        if not matrix or not all(isinstance(row, (list, tuple)) for row in matrix):
+            raise ValueError(f"{name} must be a non-empty list of rows!")
+        columns = len(matrix[0])
+        if not columns or any(len(row) != columns for row in matrix):
+            raise ValueError(f"{name} rows must all have the same, non-zero length!")
+        if not all(isinstance(value, (int, float)) and not isinstance(value, bool)
+                   for row in matrix for value in row):
+            raise ValueError(f"{name} entries must be numbers!")
+        return len(matrix), columns
+    
+    def _right_hand_side(self, b):
+        """A vector or matrix right-hand side as a matrix, and whether it was a vector"""
+        is_array = self.np is not None and isinstance(b, self.np.ndarray)
+        if (b.ndim == 1) if is_array else (b and not isinstance(b[0], (list, tuple))):
+            column = b[:, None] if is_array else [[value] for value in b]
+            return column, self._matrix(column, "Right-hand side"), True
+        return b, self._matrix(b, "Right-hand side"), False
+    
+    def _use_numpy(self, *matrices):
+        if self.np is None:
+            return False
+        return any(isinstance(matrix, self.np.ndarray) or len(matrix) > SMALL_MATRIX_SIZE
+                   or len(matrix[0]) > SMALL_MATRIX_SIZE for matrix in matrices)
+    
+    def _result(self, array, *inputs):
+        """Match the result type to the inputs"""
+        if any(isinstance(matrix, self.np.ndarray) for matrix in inputs):
+            return array
+        return array.tolist()
+    
+    def _same_shape(self, a, b):
+        if self._matrix(a) != self._matrix(b):
+            raise ValueError(f"Matrices must have the same shape: "
+                             f"{self._format_shape(a)} and {self._format_shape(b)}!")
+    
+    def _format_shape(self, matrix):
+        rows, columns = self._matrix(matrix)
+        return f"{rows}x{columns}"
+    
+    def _square(self, matrix):
+        rows, columns = self._matrix(matrix)
+        if rows != columns:
+            raise ValueError(f"Matrix must be square, got {rows}x{columns}!")
+        return rows
+    
+    def matrix_add(self, a, b):
+        """Entry-by-entry sum"""
+        self._same_shape(a, b)
+        if self._use_numpy(a, b):
+            return self._result(self.np.add(a, b), a, b)
+        return self.kernels.elementwise(lambda x, y: x + y, a, b)
+    
+    def matrix_subtract(self, a, b):
+        """Entry-by-entry difference"""
+        self._same_shape(a, b)
+        if self._use_numpy(a, b):
+            return self._result(self.np.subtract(a, b), a, b)
+        return self.kernels.elementwise(lambda x, y: x - y, a, b)
+    
+    def elementwise_multiply(self, a, b):
+        """Entry-by-entry (Hadamard) product"""
+        self._same_shape(a, b)
+        if self._use_numpy(a, b):
+            return self._result(self.np.multiply(a, b), a, b)
+        return self.kernels.elementwise(lambda x, y: x * y, a, b)
+    
+    def elementwise_divide(self, a, b):
+        """Entry-by-entry quotient with zero check"""
+        self._same_shape(a, b)
+        if self._use_numpy(a, b):
+            divisor = self.np.asarray(b)
+            if not divisor.all():
+                raise ValueError("Cannot divide by zero!")
+            return self._result(self.np.divide(a, divisor), a, b)
+        if any(value == 0 for row in b for value in row):
+            raise ValueError("Cannot divide by zero!")
+        return self.kernels.elementwise(lambda x, y: x / y, a, b)
+    
+    def transpose(self, matrix):
+        """Rows become columns"""
+        self._matrix(matrix)
+        if self.np is not None and isinstance(matrix, self.np.ndarray):
+            return matrix.T
+        return self.kernels.transpose(matrix)
+    
+    def matrix_multiply(self, a, b):
+        """Matrix product a @ b"""
+        rows_a, columns_a = self._matrix(a)
+        rows_b, columns_b = self._matrix(b)
+        if columns_a != rows_b:
+            raise ValueError(f"Cannot multiply {rows_a}x{columns_a} by {rows_b}x{columns_b}: "
+                             f"inner dimensions differ!")
+        if self._use_numpy(a, b):
+            np = self.np
+            return self._result(np.matmul(np.asarray(a, dtype=float), np.asarray(b, dtype=float)),
+                                a, b)
+        return self.kernels.multiply(a, b)
+    
+    def determinant(self, matrix):
+        """Determinant of a square matrix"""
+        self._square(matrix)
+        if self._use_numpy(matrix):
+            return float(self.np.linalg.det(self.np.asarray(matrix, dtype=float)))
+        return self.kernels.determinant(matrix)
+    
+    def inverse(self, matrix):
+        """Inverse of a square, non-singular matrix"""
+        n = self._square(matrix)
+        if self.np is not None and isinstance(matrix, self.np.ndarray):
+            return self.solve(matrix, self.np.eye(n))
+        return self.solve(matrix, [[float(i == j) for j in range(n)] for i in range(n)])
+    
+    def solve(self, a, b):
+        """x with a @ x == b, for a square non-singular a (b: vector or matrix)"""
+        n = self._square(a)
+        b, (rows, _), is_vector = self._right_hand_side(b)
+        if rows != n:
+            raise ValueError(f"Right-hand side has {rows} rows, matrix has {n}!")
+        if self._use_numpy(a, b):
+            np = self.np
+            a_array = np.asarray(a, dtype=float)
+            if self.kernels.is_singular(a_array):
+                raise ValueError("Matrix is singular!")
+            try:
+                x = np.linalg.solve(a_array, np.asarray(b, dtype=float))
+            except np.linalg.LinAlgError:
+                raise ValueError("Matrix is singular!") from None
+            if not np.isfinite(x).all():
+                raise ValueError("Matrix is singular!")
+            return self._result(x[:, 0] if is_vector else x, a, b)
+        factors = self.kernels.lu_decompose(a)
+        if factors is None:
+            raise ValueError("Matrix is singular!")
+        x = self.kernels.lu_solve(factors, b)
+        return [row[0] for row in x] if is_vector else x
+    
+    def least_squares(self, a, b):
+        """x minimizing |a @ x - b|, for a with at least as many rows as independent columns"""
+        rows_a, columns_a = self._matrix(a)
+        b, (rows, _), is_vector = self._right_hand_side(b)
+        if rows != rows_a:
+            raise ValueError(f"Right-hand side has {rows} rows, matrix has {rows_a}!")
+        if rows_a < columns_a:
+            raise ValueError("Least squares needs at least as many rows as columns!")
+        if self._use_numpy(a, b):
+            np = self.np
+            x, _, rank, _ = np.linalg.lstsq(np.asarray(a, dtype=float),
+                                            np.asarray(b, dtype=float), rcond=None)
+            if rank < columns_a:
+                raise ValueError("Matrix columns are linearly dependent!")
+            return self._result(x[:, 0] if is_vector else x, a, b)
+        x = self.kernels.householder_least_squares(a, b)
+        if x is None:
+            raise ValueError("Matrix columns are linearly dependent!")
+        return [row[0] for row in x] if is_vector else x
+    
+    # Large matrices in .npy files, memory-mapped and read in blocks of rows
+    
+    def matrix_multiply_file(self, a_path, b, output_path=None,
+                             block_rows=None):
+        """Product of a matrix file and an in-memory matrix (or another file's matrix)"""
+        block_rows = block_rows or self.kernels.DEFAULT_BLOCK_ROWS
+        a = self.kernels.open_matrix(a_path)
+        b = self.kernels.open_matrix(b) if isinstance(b, str) else self.np.asarray(b, dtype=float)
+        self._matrix(b)
+        if a.shape[1] != b.shape[0]:
+            raise ValueError(f"Cannot multiply {a.shape[0]}x{a.shape[1]} by "
+                             f"{b.shape[0]}x{b.shape[1]}: inner dimensions differ!")
+        return self.kernels.stream_multiply(a, b, output_path, block_rows)
+    
+    def least_squares_file(self, a_path, b_path, block_rows=None):
+        """Least-squares solution for matrix files of any length; returns (x, residual norms)"""
+        block_rows = block_rows or self.kernels.DEFAULT_BLOCK_ROWS
+        a = self.kernels.open_matrix(a_path)
+        b = self.kernels.open_matrix(b_path)
+        if a.shape[0] != b.shape[0]:
+            raise ValueError(f"Right-hand side has {b.shape[0]} rows, matrix has {a.shape[0]}!")
+        return self.kernels.stream_least_squares(a, b, block_rows)
+
+
 class AdvancedOperations:
-    """Advanced mathematical operations"""
+    """Advanced mathematical operations
+    
+    Trigonometric functions can optionally be answered from precomputed
+    tables (``use_lookup_tables=True``). Accuracy guarantees in that mode:
+    
+    * Multiples of 30° and 45° return the correctly rounded double of the
+      exact value (sin 30° == 0.5, tan 45° == 1.0, cos 90° == 0.0).
+    * Other integer and half-degree angles return exactly what the computed
+      path returns (the value rounded to 10 decimal places).
+    * Any other angle falls back to the computed path, unless
+      ``interpolate=True``: sine and cosine are then linearly interpolated
+      between neighbouring half-degree entries, with an absolute error below
+      1e-5. Tangent never interpolates, since the error is unbounded near its
+      asymptotes.
+    
+    Integer results of factorial and power may be huge; they are rendered
+    with the big-number helpers in calculator_utils.
+    """
+    
+    # Largest factorial argument (100000! has 456,574 digits and takes ~0.3s)
+    MAX_FACTORIAL = 100_000
+    # Largest exact integer power result, in bits (about 3 million digits)
+    MAX_POWER_BITS = 10_000_000
+    
+    def __init__(self, use_lookup_tables=False, interpolate=False):
+        self.use_lookup_tables = use_lookup_tables
+        self.interpolate = interpolate
     
     def power(self, base, exponent):
         """Power operation"""
+        if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0
+                and (abs(base).bit_length() - 1) * exponent > self.MAX_POWER_BITS):
+            raise ValueError("Result is too large!")
         try:
             result = base ** exponent
-            if math.isinf(result):
+            if isinstance(result, float) and math.isinf(result):
                 raise ValueError("Result is too large!")
             return result
         except OverflowError:
             raise ValueError("Result is too large!")
     
+    def polynomial_evaluate(self, coefficients, x):
+        """Value of a polynomial (coefficients highest degree first) by Horner's scheme"""
+        if len(coefficients) == 0:
+            raise ValueError("A polynomial needs at least one coefficient!")
+        from calculator_polynomial import Polynomial
+        return Polynomial(list(coefficients)[::-1])(x)
+    
+    def polynomial_roots(self, coefficients):
+        """All roots of a polynomial (coefficients highest degree first)"""
+        if len(coefficients) == 0:
+            raise ValueError("A polynomial needs at least one coefficient!")
+        from calculator_polynomial import Polynomial
+        return Polynomial(list(coefficients)[::-1]).roots()
+    
     def square_root(self, number):
         """Square root operation"""
         if number < 0:
@@ -65,7 +376,7 @@ class AdvancedOperations:
             raise ValueError("Factorial requires an integer!")
         if n < 0:
             raise ValueError("Factorial is not defined for negative numbers!")
-        if n > 170:  # Prevent overflow
+        if n > self.MAX_FACTORIAL:
             raise ValueError("Number too large for factorial calculation!")
         return math.factorial(n)
     
@@ -84,13 +395,38 @@ class AdvancedOperations:
             return math.log(number) / math.log(base)
     
     # Trigonometric functions
+    def _table_lookup(self, table, angle_degrees, allow_interpolation=True):
+        """Look an angle up in a trig table; returns None when not covered"""
+        position = angle_degrees * TRIG_TABLE_STEPS_PER_DEGREE
+        if isinstance(position, int) or position.is_integer():
+            return table[int(position) % TRIG_TABLE_SIZE]
+        
+        if not (self.interpolate and allow_interpolation) or not math.isfinite(position):
+            return None
+        
+        lower = math.floor(position)
+        fraction = position - lower
+        low_value = table[lower % TRIG_TABLE_SIZE]
+        high_value = table[(lower + 1) % TRIG_TABLE_SIZE]
+        return low_value + (high_value - low_value) * fraction
+    
     def sine(self, angle_degrees):
         """Sine function (input in degrees)"""
+        if self.use_lookup_tables:
+            value = self._table_lookup(SINE_TABLE, angle_degrees)
+            if value is not None:
+                return value
+        
         angle_radians = math.radians(angle_degrees)
         return round(math.sin(angle_radians), 10)  # Round to avoid floating point errors
     
     def cosine(self, angle_degrees):
         """Cosine function (input in degrees)"""
+        if self.use_lookup_tables:
+            value = self._table_lookup(COSINE_TABLE, angle_degrees)
+            if value is not None:
+                return value
+        
         angle_radians = math.radians(angle_degrees)
         return round(math.cos(angle_radians), 10)
     
@@ -100,6 +436,11 @@ class AdvancedOperations:
         if angle_degrees % 180 == 90:
             raise ValueError("Tangent is undefined at this angle!")
         
+        if self.use_lookup_tables:
+            value = self._table_lookup(TANGENT_TABLE, angle_degrees, allow_interpolation=False)
+            if value is not None:
+                return value
+        
         angle_radians = math.radians(angle_degrees)
         return round(math.tan(angle_radians), 10)
     
@@ -154,6 +495,10 @@ class AdvancedOperations:
         if pounds < 0:
             raise ValueError("Weight cannot be negative!")
         return pounds / 2.20462
+    
+    def convert_units(self, value, from_unit, to_unit):
+        """Convert a value (or list/array of values) between any compatible units"""
+        return default_registry.convert(value, from_unit, to_unit)
 
 
 class StatisticalOperations:
@@ -206,6 +551,89 @@ class StatisticalOperations:
         if not numbers:
             raise ValueError("Cannot calculate range of empty list!")
         return max(numbers) - min(numbers)
+    
+    # Rolling-window statistics: one value per sample, O(1) amortized each,
+    # vectorized for NumPy arrays (see calculator_timeseries)
+    
+    def _window(self, numbers, window):
+        """Validate a series and window size"""
+        if len(numbers) == 0:
+            raise ValueError("Cannot calculate statistics of an empty series!")
+        if isinstance(window, float) and not window.is_integer():  # Also inf and NaN
+            raise ValueError("Window size must be a positive integer!")
+        try:
+            size = int(window)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError("Window size must be a positive integer!") from None
+        if size != window or size < 1:
+            raise ValueError("Window size must be a positive integer!")
+        return size
+    
+    def moving_average(self, numbers, window):
+        """Moving average over the last ``window`` samples"""
+        from calculator_timeseries import rolling_mean
+        return rolling_mean(numbers, self._window(numbers, window))
+    
+    def moving_standard_deviation(self, numbers, window):
+        """Moving sample standard deviation over the last ``window`` samples"""
+        from calculator_timeseries import rolling_std
+        return rolling_std(numbers, self._window(numbers, window))
+    
+    def moving_min(self, numbers, window):
+        """Moving minimum over the last ``window`` samples"""
+        from calculator_timeseries import rolling_min
+        return rolling_min(numbers, self._window(numbers, window))
+    
+    def moving_max(self, numbers, window):
+        """Moving maximum over the last ``window`` samples"""
+        from calculator_timeseries import rolling_max
+        return rolling_max(numbers, self._window(numbers, window))
+    
+    def exponential_moving_average(self, numbers, alpha):
+        """Exponentially weighted moving average with smoothing factor alpha"""
+        if len(numbers) == 0:
+            raise ValueError("Cannot calculate statistics of an empty series!")
+        from calculator_timeseries import ewma
+        return ewma(numbers, alpha)
+    
+    def grouped_statistics(self, keys, numbers, aggregates=None):
+        """Statistics of numbers per key (see calculator_grouping); iterate for rows"""
+        from calculator_grouping import DEFAULT_AGGREGATES, GroupedAggregation
+        return GroupedAggregation(keys, numbers, aggregates or DEFAULT_AGGREGATES)
+    
+    # Paired data: single-pass, mergeable co-moments (see calculator_regression)
+    
+    def covariance(self, x_values, y_values):
+        """Sample covariance of paired values"""
+        from calculator_regression import accumulate
+        return accumulate(x_values, y_values).covariance()
+    
+    def correlation(self, x_values, y_values):
+        """Pearson correlation coefficient of paired values"""
+        from calculator_regression import accumulate
+        return accumulate(x_values, y_values).correlation()
+    
+    def spearman_correlation(self, x_values, y_values):
+        """Spearman rank correlation of paired values"""
+        from calculator_regression import spearman_correlation
+        return spearman_correlation(x_values, y_values)
+    
+    def linear_regression(self, x_values, y_values):
+        """Least-squares line y = slope * x + intercept"""
+        from calculator_regression import accumulate
+        fit = accumulate(x_values, y_values).regression()
+        return {
+            'slope': fit['coefficients'][0],
+            'intercept': fit['intercept'],
+            'r_squared': fit['r_squared'],
+        }
+    
+    def multiple_regression(self, predictors, y_values):
+        """Least-squares fit of y on several predictors (a list of columns)"""
+        if not predictors:
+            raise ValueError("Regression needs at least one predictor!")
+        from calculator_regression import accumulate
+        return accumulate(*predictors, y_values).regression()
 
 
 class FinancialOperations:
@@ -225,6 +653,53 @@ class FinancialOperations:
         amount = principal * (1 + rate/100/compounds_per_year) ** (compounds_per_year * time)
         return amount - principal
     
+    def compound_interest_rate(self, principal, interest, time, compounds_per_year=1):
+        """Annual rate (%) at which compound interest on principal grows to interest
+        
+        Solved with Brent's method; NumPy arrays of loans are solved together
+        (NaN where no rate could be found).
+        """
+        from calculator_numerics import brent
+        np = sys.modules.get('numpy')  # Only arrays already built with NumPy are batched
+        batch = np is not None and any(isinstance(value, np.ndarray) for value in
+                                       (principal, interest, time, compounds_per_year))
+        check = np.any if batch else bool
+        if check(principal <= 0) or check(interest < 0) or check(time <= 0) \
+                or check(compounds_per_year <= 0):
+            raise ValueError("Invalid input values!")
+        log1p = np.log1p if batch else math.log1p
+        
+        def excess(rate, principal, interest, time, compounds_per_year):
+            # Compared as logs, so decades of daily compounding do not overflow
+            growth = compounds_per_year * time * log1p(rate / 100 / compounds_per_year)
+            return growth - log1p(interest / principal)
+        
+        # Double the bracket from 1% until the interest is reached
+        args = (principal, interest, time, compounds_per_year)
+        lower, upper = 0.0, 1.0
+        # Batched loans whose target overflows come out as NaN, without warnings
+        quiet = np.errstate(over='ignore', invalid='ignore') if batch else nullcontext()
+        try:
+            with quiet:
+                for _ in range(1100):  # Enough doublings to pass the largest float
+                    short = excess(upper, *args) < 0
+                    if not check(short):
+                        break
+                    if batch:
+                        lower = np.where(short, upper, lower)
+                        upper = np.where(short, upper * 2, upper)
+                    else:
+                        lower, upper = upper, upper * 2
+                result = brent(excess, lower, upper, args=args)
+        except OverflowError:
+            raise ValueError("Could not find an interest rate!")
+        if batch:
+            found = result.converged & np.isfinite(result.value)
+            return np.where(found, result.value, np.nan)
+        if not result.converged or not math.isfinite(result.value):
+            raise ValueError("Could not find an interest rate!")
+        return result.value
+    
     def percentage_change(self, old_value, new_value):
         """Calculate percentage change"""
         if old_value == 0:
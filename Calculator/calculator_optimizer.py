@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Calculator Optimizer Module
+Optimization pass for batches of formulas that are evaluated together.
+
+1. Constant folding: ``pi``, ``e`` and operations whose arguments are all
+   constants are computed once, when the batch is built. Operations that
+   would fail are left in place so the error is reported on evaluation.
+2. Hash-consing: every distinct subexpression of the whole batch becomes
+   one node of a shared graph, keyed by its operation and the node ids of
+   its arguments. Arguments of add and multiply are put in a fixed order,
+   so ``a * b`` and ``b * a`` share a node.
+3. Evaluation visits the graph once in topological order, so each
+   distinct subexpression is computed once per set of variable values.
+"""
+
+from calculator_expressions import CONSTANTS, parse
+from calculator_registry import operation_registry
+
+# Operations whose arguments can be swapped without changing the result
+COMMUTATIVE_OPERATIONS = frozenset({'add', 'multiply'})
+
+OPERATION_ERRORS = (ValueError, TypeError, ZeroDivisionError, OverflowError)
+
+
+def count_nodes(tree):
+    """Number of nodes in an expression tree"""
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node[0] == 'neg':
+            stack.append(node[1])
+        elif node[0] == 'op':
+            stack.extend(node[2])
+    return count
+
+
+def fold_constants(tree, registry=operation_registry, bound=frozenset()):
+    """Replace constant subexpressions by their values
+
+    ``bound`` names variables that shadow the constants ``pi`` and ``e``.
+    """
+    kind = tree[0]
+    if kind == 'const':
+        return tree
+    if kind == 'var':
+        name = tree[1]
+        if name in CONSTANTS and name not in bound:
+            return ('const', CONSTANTS[name])
+        return tree
+    if kind == 'neg':
+        operand = fold_constants(tree[1], registry, bound)
+        if operand[0] == 'const':
+            return ('const', -operand[1])
+        return ('neg', operand)
+
+    name = tree[1]
+    args = tuple(fold_constants(arg, registry, bound) for arg in tree[2])
+    if registry.get(name).pure and all(arg[0] == 'const' for arg in args):
+        try:
+            return ('const', registry.resolve(name)(*[arg[1] for arg in args]))
+        except OPERATION_ERRORS:
+            pass  # Fails on every evaluation; keep it so the error is reported
+    return ('op', name, args)
+
+
+class OptimizedBatch:
+    """Formulas compiled together into one graph of distinct subexpressions"""
+
+    def __init__(self, formulas, registry=operation_registry, bound=frozenset()):
+        self.registry = registry
+        self.sources = list(formulas)
+        self.nodes = []  # (kind, payload, argument node ids), arguments first
+        self.roots = []  # Node id of each formula
+        self._interned = {}
+        self.parsed_nodes = 0
+        self.folded_nodes = 0
+
+        for source in self.sources:
+            tree = parse(source, registry) if isinstance(source, str) else source
+            self.parsed_nodes += count_nodes(tree)
+            tree = fold_constants(tree, registry, frozenset(bound))
+            self.folded_nodes += count_nodes(tree)
+            self.roots.append(self._intern(tree))
+
+        self._steps = [self._step(node) for node in self.nodes]
+
+    def __len__(self):
+        return len(self.roots)
+
+    def _intern(self, tree):
+        """Node id of a tree, adding the nodes not seen before"""
+        kind = tree[0]
+        if kind == 'const':
+            value = tree[1]
+            # 1, 1.0 and -0.0 / 0.0 compare equal but are different results
+            key = ('const', type(value), value.hex() if isinstance(value, float) else value)
+            payload, args = value, ()
+        elif kind == 'var':
+            key = ('var', tree[1])
+            payload, args = tree[1], ()
+        elif kind == 'neg':
+            args = (self._intern(tree[1]),)
+            key = ('neg', args)
+            payload = None
+        else:
+            payload = tree[1]
+            args = tuple(self._intern(arg) for arg in tree[2])
+            if payload in COMMUTATIVE_OPERATIONS:
+                args = tuple(sorted(args))
+            key = ('op', payload, args)
+
+        node_id = self._interned.get(key)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.nodes.append((kind, payload, args))
+            self._interned[key] = node_id
+        return node_id
+
+    def _step(self, node):
+        """Resolve an operation node's callable once"""
+        kind, payload, args = node
+        if kind == 'op':
+            return kind, self.registry.resolve(payload), args
+        return node
+
+    def report(self):
+        """Node counts before and after each optimization"""
+        distinct = len(self.nodes)
+        return {
+            'expressions': len(self.roots),
+            'parsed_nodes': self.parsed_nodes,
+            'after_folding': self.folded_nodes,
+            'distinct_nodes': distinct,
+            'folded_away': self.parsed_nodes - self.folded_nodes,
+            'shared_away': self.folded_nodes - distinct,
+            'eliminated': self.parsed_nodes - distinct,
+        }
+
+    def evaluate(self, env=None):
+        """Evaluate every formula; returns (results, errors by formula index)
+
+        Each distinct subexpression is computed once. A formula whose
+        evaluation fails has None as its result and its message in errors.
+        """
+        env = env or {}
+        values = [None] * len(self._steps)
+        failures = {}  # node id -> error message
+
+        for node_id, (kind, payload, args) in enumerate(self._steps):
+            if failures and any(arg in failures for arg in args):
+                failures[node_id] = next(failures[arg] for arg in args if arg in failures)
+                continue
+            try:
+                if kind == 'op':
+                    if len(args) == 2:
+                        values[node_id] = payload(values[args[0]], values[args[1]])
+                    else:
+                        values[node_id] = payload(*[values[arg] for arg in args])
+                elif kind == 'const':
+                    values[node_id] = payload
+                elif kind == 'var':
+                    if payload in env:
+                        values[node_id] = env[payload]
+                    elif payload in CONSTANTS:
+                        values[node_id] = CONSTANTS[payload]
+                    else:
+                        raise ValueError(f"Unknown variable: {payload}")
+                else:
+                    values[node_id] = -values[args[0]]
+            except OPERATION_ERRORS as e:
+                failures[node_id] = str(e)
+
+        results = []
+        errors = {}
+        for index, root in enumerate(self.roots):
+            if root in failures:
+                results.append(None)
+                errors[index] = failures[root]
+            else:
+                results.append(values[root])
+        return results, errors
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Calculator Polynomial Module
+Polynomials such as calibration curves: evaluation, calculus and roots.
+
+Coefficients are stored lowest degree first: ``Polynomial([1, -2, 3])`` is
+``3x^2 - 2x + 1``. Evaluation uses Horner's scheme, one multiply and one
+add per degree and no powers at all, so integer coefficients and inputs
+stay exact. NumPy arrays are evaluated in place, a block of values at a
+time so the block stays in cache across all degrees.
+
+Roots are the eigenvalues of the companion matrix (NumPy), polished with
+a Newton step; without NumPy they are found with the Durand-Kerner
+iteration. Roots whose imaginary part is negligible are returned as
+floats.
+"""
+
+import cmath
+import numbers
+from calculator_expressions import parse
+from calculator_optimizer import fold_constants
+
+try:
+    import numpy as np
+except ImportError:  # Horner evaluation and Durand-Kerner work without NumPy
+    np = None
+
+# Values per block when evaluating NumPy arrays
+HORNER_BLOCK = 65_536
+
+# Imaginary parts below this (relative to the root's size) are rounding noise
+ROOT_IMAG_TOLERANCE = 1e-10
+
+DURAND_KERNER_TOLERANCE = 1e-14
+DURAND_KERNER_MAX_ITERATIONS = 1_000
+
+
+class Polynomial:
+    """Polynomial with coefficients in ascending order of degree"""
+
+    __slots__ = ('coefficients',)
+
+    def __init__(self, coefficients):
+        coefficients = list(coefficients)
+        while len(coefficients) > 1 and coefficients[-1] == 0:
+            coefficients.pop()
+        if not coefficients:
+            coefficients = [0]
+        for value in coefficients:
+            if isinstance(value, bool) or not isinstance(value, numbers.Number):
+                raise ValueError("Polynomial coefficients must be numbers!")
+        self.coefficients = tuple(coefficients)
+
+    @classmethod
+    def from_roots(cls, roots, leading=1):
+        """Polynomial leading * (x - r1) (x - r2) ..."""
+        result = cls([leading])
+        for root in roots:
+            result = result * cls([-root, 1])
+        return result
+
+    @classmethod
+    def from_expression(cls, formula, variable='x'):
+        """Polynomial of a calculator formula in one variable, e.g. ``3*x**2 - 2*x + 1``"""
+        return cls._from_tree(fold_constants(parse(formula)), variable, formula)
+
+    @classmethod
+    def _from_tree(cls, tree, variable, formula):
+        kind = tree[0]
+        if kind == 'const':
+            return cls([tree[1]])
+        if kind == 'var':
+            if tree[1] != variable:
+                raise ValueError(f"Not a polynomial in {variable}: unknown variable {tree[1]}")
+            return cls([0, 1])
+        if kind == 'neg':
+            return -cls._from_tree(tree[1], variable, formula)
+
+        name, args = tree[1], tree[2]
+        if name == 'power' and args[1][0] == 'const':
+            exponent = args[1][1]
+            if isinstance(exponent, float) and exponent.is_integer():
+                exponent = int(exponent)
+            if isinstance(exponent, int) and exponent >= 0:
+                return cls._from_tree(args[0], variable, formula) ** exponent
+        elif name == 'divide' and args[1][0] == 'const':
+            if args[1][1] == 0:
+                raise ValueError("Cannot divide by zero!")
+            return cls._from_tree(args[0], variable, formula).scale(1 / args[1][1])
+        elif name in ('add', 'subtract', 'multiply'):
+            left, right = (cls._from_tree(arg, variable, formula) for arg in args)
+            if name == 'add':
+                return left + right
+            return left - right if name == 'subtract' else left * right
+        raise ValueError(f"Not a polynomial in {variable}: {formula}")
+
+    @property
+    def degree(self):
+        return len(self.coefficients) - 1
+
+    def __repr__(self):
+        return f"Polynomial({list(self.coefficients)!r})"
+
+    def __str__(self):
+        terms = []
+        for degree in range(self.degree, -1, -1):
+            coefficient = self.coefficients[degree]
+            if coefficient == 0 and self.degree:
+                continue
+            negative = not isinstance(coefficient, complex) and coefficient < 0
+            size = -coefficient if negative else coefficient
+            power = '' if degree == 0 else 'x' if degree == 1 else f"x^{degree}"
+            if size == 1 and power:
+                number = ''
+            elif isinstance(size, complex):
+                number = f"({size.real:g}{size.imag:+g}j)"
+            else:
+                number = f"{size:g}" if isinstance(size, float) else str(size)
+            terms.append(('- ' if negative else '+ ') + number + power)
+        text = ' '.join(terms)
+        return text[2:] if text.startswith('+') else '-' + text[2:]
+
+    def __eq__(self, other):
+        return isinstance(other, Polynomial) and self.coefficients == other.coefficients
+
+    def __hash__(self):
+        return hash(self.coefficients)
+
+    def __neg__(self):
+        return Polynomial([-c for c in self.coefficients])
+
+    def __add__(self, other):
+        other = _as_polynomial(other)
+        a, b = self.coefficients, other.coefficients
+        if len(a) < len(b):
+            a, b = b, a
+        return Polynomial([x + y for x, y in zip(a, b)] + list(a[len(b):]))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self + (-_as_polynomial(other))
+
+    def __rsub__(self, other):
+        return _as_polynomial(other) - self
+
+    def __mul__(self, other):
+        other = _as_polynomial(other)
+        product = [0] * (len(self.coefficients) + len(other.coefficients) - 1)
+        for i, x in enumerate(self.coefficients):
+            if x:
+                for j, y in enumerate(other.coefficients):
+                    product[i + j] += x * y
+        return Polynomial(product)
+
+    __rmul__ = __mul__
+
+    def __pow__(self, exponent):
+        """Repeated squaring with polynomial products"""
+        if not isinstance(exponent, int) or exponent < 0:
+            raise ValueError("Polynomial powers must be non-negative integers!")
+        result, base = Polynomial([1]), self
+        while exponent:
+            if exponent & 1:
+                result = result * base
+            exponent >>= 1
+            if exponent:
+                base = base * base
+        return result
+
+    def scale(self, factor):
+        """Every coefficient multiplied by a number"""
+        return Polynomial([c * factor for c in self.coefficients])
+
+    def __call__(self, x):
+        """Value at x: a number, a list of numbers or a NumPy array"""
+        coefficients = self.coefficients
+        if np is not None and isinstance(x, np.ndarray):
+            return self._evaluate_array(x)
+        if isinstance(x, (list, tuple)):
+            return [self(value) for value in x]
+        result = coefficients[-1]
+        for coefficient in coefficients[-2::-1]:
+            result = result * x + coefficient
+        return result
+
+    def _evaluate_array(self, x):
+        """Horner's scheme in place over blocks of an array"""
+        coefficients = np.asarray(self.coefficients)
+        if coefficients.dtype == object:  # Integers too large for NumPy
+            return np.array([self(value) for value in x.ravel().tolist()]).reshape(x.shape)
+        dtype = np.result_type(x.dtype, coefficients.dtype, np.float64)
+        flat = x.reshape(-1)
+        result = np.empty(flat.shape, dtype=dtype)
+        leading = coefficients[-1]
+        rest = coefficients[-2::-1].tolist()
+        for start in range(0, len(flat), HORNER_BLOCK):
+            block = flat[start:start + HORNER_BLOCK]
+            out = result[start:start + HORNER_BLOCK]
+            out.fill(leading)
+            for coefficient in rest:
+                out *= block
+                out += coefficient
+        return result.reshape(x.shape)
+
+    def derivative(self, order=1):
+        """Derivative of the given order"""
+        if order < 0 or int(order) != order:
+            raise ValueError("Derivative order must be a non-negative integer!")
+        coefficients = list(self.coefficients)
+        for _ in range(int(order)):
+            coefficients = [k * c for k, c in enumerate(coefficients)][1:]
+        return Polynomial(coefficients)
+
+    def integral(self, constant=0):
+        """Antiderivative whose value at 0 is ``constant``"""
+        return Polynomial([constant] + [c / (k + 1) for k, c in enumerate(self.coefficients)])
+
+    def definite_integral(self, lower, upper):
+        """Exact integral between two bounds"""
+        antiderivative = self.integral()
+        return antiderivative(upper) - antiderivative(lower)
+
+    def roots(self, use_numpy=None):
+        """All complex roots, with multiplicity; sorted, real ones as floats"""
+        if self.degree == 0:
+            if self.coefficients[0] == 0:
+                raise ValueError("Every number is a root of the zero polynomial!")
+            return []
+        # Zero constant terms are exact roots at 0
+        coefficients = list(self.coefficients)
+        zeros = 0
+        while coefficients[0] == 0:
+            coefficients.pop(0)
+            zeros += 1
+        reduced = Polynomial(coefficients)
+
+        roots = []
+        if reduced.degree:
+            if use_numpy is None:
+                use_numpy = np is not None
+            if use_numpy and np is None:
+                raise ValueError("NumPy is not installed!")
+            roots = reduced._companion_roots() if use_numpy else reduced._durand_kerner()
+        roots = [_clean_root(root) for root in roots] + [0.0] * zeros
+        return sorted(roots, key=lambda root: (complex(root).real, complex(root).imag))
+
+    def _companion_roots(self):
+        """Eigenvalues of the companion matrix, polished with one Newton step"""
+        n = self.degree
+        monic = np.asarray(self.coefficients, dtype=complex) / self.coefficients[-1]
+        companion = np.zeros((n, n), dtype=complex)
+        companion[1:, :-1] = np.eye(n - 1)
+        companion[:, -1] = -monic[:-1]
+        if np.isrealobj(np.asarray(self.coefficients)):
+            companion = companion.real
+        roots = np.linalg.eigvals(companion).astype(complex)
+
+        slope = self.derivative()
+        with np.errstate(all='ignore'):
+            step = self._evaluate_array(roots) / slope._evaluate_array(roots)
+        polished = roots - np.where(np.isfinite(step), step, 0)
+        # Keep a polished root only if it fits the polynomial better
+        better = np.abs(self._evaluate_array(polished)) < np.abs(self._evaluate_array(roots))
+        return np.where(better, polished, roots).tolist()
+
+    def _durand_kerner(self):
+        """Simultaneous iteration for all roots (Weierstrass / Durand-Kerner)"""
+        n = self.degree
+        leading = self.coefficients[-1]
+        monic = Polynomial([c / leading for c in self.coefficients])
+        # Start on a circle enclosing every root (Cauchy's bound), off the real axis
+        radius = 1 + max(abs(c) for c in monic.coefficients[:-1])
+        roots = [radius * cmath.exp(2j * cmath.pi * (k + 0.25) / n) for k in range(n)]
+        for _ in range(DURAND_KERNER_MAX_ITERATIONS):
+            largest_step = 0.0
+            for i, root in enumerate(roots):
+                denominator = 1
+                for j, other in enumerate(roots):
+                    if i != j:
+                        denominator *= root - other
+                step = monic(root) / denominator if denominator else 0
+                roots[i] = root - step
+                largest_step = max(largest_step, abs(step))
+            if largest_step <= DURAND_KERNER_TOLERANCE * max(1.0, max(map(abs, roots))):
+                break
+        return roots
+
+
+def _as_polynomial(value):
+    if isinstance(value, Polynomial):
+        return value
+    if isinstance(value, numbers.Number) and not isinstance(value, bool):
+        return Polynomial([value])
+    raise ValueError(f"Cannot combine a polynomial with {value!r}")
+
+
+def _clean_root(root):
+    """A float for roots that are real up to rounding"""
+    root = complex(root) + 0.0  # No negative zeros
+    if abs(root.imag) <= ROOT_IMAG_TOLERANCE * max(1.0, abs(root)):
+        return root.real
+    return root
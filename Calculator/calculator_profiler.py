@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Calculator Profiler Module
+Opt-in instrumentation: per-operation counters and latency histograms,
+compute vs. persistence time and cache hit rates.
+
+Enable with the CALCULATOR_PROFILE=1 environment variable or the --profile
+flag. When disabled, hooks are a single attribute check.
+"""
+
+import functools
+import json
+import os
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" values)
+LATENCY_BUCKETS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3,
+                   1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+_NULL_TIMER = nullcontext()
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    __slots__ = ('counts', 'count', 'total', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def record(self, seconds):
+        """Add one observation"""
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        if self.minimum is None or seconds < self.minimum:
+            self.minimum = seconds
+        if self.maximum is None or seconds > self.maximum:
+            self.maximum = seconds
+
+    def to_dict(self):
+        """Return the histogram as plain data"""
+        return {
+            'count': self.count,
+            'total_seconds': self.total,
+            'mean_seconds': self.total / self.count if self.count else None,
+            'min_seconds': self.minimum,
+            'max_seconds': self.maximum,
+            'buckets': {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.counts)},
+        }
+
+
+class _Timer:
+    """Context manager recording one timed section"""
+
+    __slots__ = ('instrumentation', 'name', 'category', 'start')
+
+    def __init__(self, instrumentation, name, category):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start,
+                                    self.category, failed=exc_type is not None)
+        return False
+
+
+class Instrumentation:
+    """Collects counters, latency histograms and cache statistics"""
+
+    ENV_VAR = "CALCULATOR_PROFILE"
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get(self.ENV_VAR, '').lower() in ['1', 'true', 'yes', 'on']
+        self.enabled = enabled
+        self.reset()
+
+    def enable(self):
+        """Turn instrumentation on"""
+        self.enabled = True
+
+    def disable(self):
+        """Turn instrumentation off (collected data is kept)"""
+        self.enabled = False
+
+    def reset(self):
+        """Discard all collected data"""
+        self.started = datetime.now()
+        self.counters = {}
+        self.errors = {}
+        self.histograms = {}
+        self.operation_categories = {}
+        self.category_seconds = {}
+        self.cache_hits = {}
+        self.cache_misses = {}
+
+    # Recording
+
+    def count(self, name, amount=1):
+        """Increment an event counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, seconds, category='compute', failed=False):
+        """Record one timed call of an operation"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+            self.operation_categories[name] = category
+        histogram.record(seconds)
+        self.category_seconds[category] = self.category_seconds.get(category, 0.0) + seconds
+        if failed:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def record_cache(self, cache_name, hit):
+        """Record a cache lookup"""
+        if self.enabled:
+            stats = self.cache_hits if hit else self.cache_misses
+            stats[cache_name] = stats.get(cache_name, 0) + 1
+
+    def timer(self, name, category='compute'):
+        """Context manager timing a section; a shared no-op when disabled"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, category)
+
+    def timed(self, name=None, category='compute'):
+        """Decorator timing every call of a function"""
+        def decorator(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, label, category):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def instrument_methods(self, obj, prefix, category='compute'):
+        """Wrap the public methods of an object (e.g. an operations class) with timers"""
+        for attr in dir(obj):
+            method = getattr(obj, attr)
+            if attr.startswith('_') or not callable(method):
+                continue
+            setattr(obj, attr, self.timed(f"{prefix}.{attr}", category)(method))
+        return obj
+
+    # Reporting
+
+    def snapshot(self):
+        """Return all collected data as plain data"""
+        caches = {}
+        for cache_name in sorted(set(self.cache_hits) | set(self.cache_misses)):
+            hits = self.cache_hits.get(cache_name, 0)
+            misses = self.cache_misses.get(cache_name, 0)
+            caches[cache_name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / (hits + misses) if hits + misses else None,
+            }
+
+        return {
+            'enabled': self.enabled,
+            'collected_since': self.started.isoformat(),
+            'counters': dict(sorted(self.counters.items())),
+            'category_seconds': dict(sorted(self.category_seconds.items())),
+            'operations': {
+                name: dict(histogram.to_dict(),
+                           category=self.operation_categories[name],
+                           errors=self.errors.get(name, 0))
+                for name, histogram in sorted(self.histograms.items())
+            },
+            'caches': caches,
+        }
+
+    def to_json(self):
+        """Render collected data as JSON"""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Render collected data in the Prometheus text exposition format"""
+        lines = [
+            "# HELP calculator_operation_seconds Latency of instrumented calculator operations",
+            "# TYPE calculator_operation_seconds histogram",
+        ]
+        for name, histogram in sorted(self.histograms.items()):
+            labels = f'operation="{_escape(name)}",category="{_escape(self.operation_categories[name])}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'calculator_operation_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"calculator_operation_seconds_sum{{{labels}}} {histogram.total!r}")
+            lines.append(f"calculator_operation_seconds_count{{{labels}}} {histogram.count}")
+
+        lines += ["# HELP calculator_operation_errors_total Failed instrumented calls",
+                  "# TYPE calculator_operation_errors_total counter"]
+        for name, count in sorted(self.errors.items()):
+            lines.append(f'calculator_operation_errors_total{{operation="{_escape(name)}"}} {count}')
+
+        lines += ["# HELP calculator_category_seconds_total Time spent per category",
+                  "# TYPE calculator_category_seconds_total counter"]
+        for category, seconds in sorted(self.category_seconds.items()):
+            lines.append(f'calculator_category_seconds_total{{category="{_escape(category)}"}} {seconds!r}')
+
+        lines += ["# HELP calculator_events_total Event counters",
+                  "# TYPE calculator_events_total counter"]
+        for name, count in sorted(self.counters.items()):
+            lines.append(f'calculator_events_total{{event="{_escape(name)}"}} {count}')
+
+        lines += ["# HELP calculator_cache_requests_total Cache lookups by result",
+                  "# TYPE calculator_cache_requests_total counter"]
+        for cache_name in sorted(set(self.cache_hits) | set(self.cache_misses)):
+            for result, stats in [('hit', self.cache_hits), ('miss', self.cache_misses)]:
+                lines.append(f'calculator_cache_requests_total{{cache="{_escape(cache_name)}",'
+                             f'result="{result}"}} {stats.get(cache_name, 0)}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, filename, fmt='json'):
+        """Write collected data to a local file as 'json' or 'prometheus'"""
+        if fmt == 'json':
+            content = self.to_json()
+        elif fmt == 'prometheus':
+            content = self.to_prometheus()
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+
+        with open(filename, 'w') as f:
+            f.write(content)
+        return filename
+
+    def show_stats(self):
+        """Display collected statistics"""
+        if not self.enabled and not self.histograms:
+            print("\n📉 Profiling is disabled.")
+            print(f"💡 Set {self.ENV_VAR}=1 or start with --profile to collect statistics.")
+            return
+
+        print("\n⏱️  PERFORMANCE STATISTICS")
+        print("=" * 70)
+
+        if self.category_seconds:
+            print("\n🧮 Time by Category:")
+            for category, seconds in sorted(self.category_seconds.items()):
+                print(f"   {category.title()}: {seconds * 1000:.3f} ms")
+
+        if self.histograms:
+            print(f"\n🔧 Operations:")
+            print(f"   {'name':32} {'calls':>7} {'mean':>10} {'max':>10}")
+            for name, histogram in sorted(self.histograms.items()):
+                mean = histogram.total / histogram.count
+                print(f"   {name:32} {histogram.count:7d} {mean * 1e6:8.1f}µs "
+                      f"{histogram.maximum * 1e6:8.1f}µs")
+
+        if self.counters:
+            print(f"\n📈 Counters:")
+            for name, count in sorted(self.counters.items()):
+                print(f"   {name}: {count}")
+
+        caches = self.snapshot()['caches']
+        if caches:
+            print(f"\n🗄️  Caches:")
+            for cache_name, stats in caches.items():
+                print(f"   {cache_name}: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.1%} hit rate)")
+
+
+def _escape(value):
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Shared instrumentation used across the calculator
+instrumentation = Instrumentation()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Calculator Registry Module
+Central registry of operations with their metadata. Menus, batch mode and
+caches dispatch through it with O(1) lookups; operation groups (classes)
+are imported and instantiated on first use.
+"""
+
+import hashlib
+import importlib
+import inspect
+from calculator_profiler import instrumentation
+
+# Cost classes, cheapest first
+COST_CLASSES = ('constant', 'linear', 'superlinear')
+
+
+class OperationSpec:
+    """Metadata describing one registered operation"""
+
+    __slots__ = ('name', 'group', 'method_name', 'arity', 'label', 'prompts', 'defaults',
+                 'input_kind', 'operation_type', 'unit', 'pure', 'vectorizable', 'cost',
+                 'modules')
+
+    def __init__(self, name, group, arity, label, prompts=(), input_kind='number',
+                 operation_type='basic', unit=None, pure=True, vectorizable=False,
+                 cost='constant', method_name=None, defaults=None, modules=()):
+        if cost not in COST_CLASSES:
+            raise ValueError(f"Unknown cost class: {cost}")
+        self.name = name
+        self.group = group
+        self.method_name = method_name or name
+        self.arity = arity
+        self.label = label
+        self.prompts = tuple(prompts)
+        # Prompt index -> value used when the answer is 0
+        self.defaults = dict(defaults or {})
+        self.input_kind = input_kind
+        self.operation_type = operation_type
+        self.unit = unit
+        self.pure = pure
+        self.vectorizable = vectorizable
+        self.cost = cost
+        # Modules besides the group's that implement the operation
+        self.modules = tuple(modules)
+
+    def __repr__(self):
+        return f"OperationSpec({self.name!r}, group={self.group!r}, arity={self.arity})"
+
+
+class OperationRegistry:
+    """Registry of operation groups and operations"""
+
+    def __init__(self):
+        self.specs = {}
+        self.groups = {}
+        self._instances = {}
+        self._callables = {}
+        self._required = {}
+        self._versions = {}
+        self._module_versions = {}
+        self.result_cache = None
+
+    def register_group(self, group, module_name, class_name):
+        """Register a class providing a group of operations (loaded lazily)"""
+        self.groups[group] = (module_name, class_name)
+
+    def register(self, name, group, arity, label, **metadata):
+        """Register an operation of a previously registered group"""
+        if group not in self.groups:
+            raise ValueError(f"Unknown operation group: {group}")
+        spec = OperationSpec(name, group, arity, label, **metadata)
+        self.specs[name] = spec
+        self._callables.pop(name, None)
+        self._required.pop(name, None)
+        self._versions.pop(name, None)
+        return spec
+
+    def get(self, name):
+        """Return the spec of an operation"""
+        spec = self.specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown operation: {name}")
+        return spec
+
+    def is_loaded(self, group):
+        """Whether a group has been instantiated"""
+        return group in self._instances
+
+    def load_group(self, group):
+        """Import and instantiate a group on first use"""
+        instance = self._instances.get(group)
+        if instance is None:
+            module_name, class_name = self.groups[group]
+            cls = getattr(importlib.import_module(module_name), class_name)
+            instance = cls()
+            if instrumentation.enabled:
+                instrumentation.instrument_methods(instance, group)
+            self._instances[group] = instance
+        return instance
+
+    def resolve(self, name):
+        """Return the callable implementing an operation"""
+        func = self._callables.get(name)
+        if func is None:
+            spec = self.get(name)
+            func = getattr(self.load_group(spec.group), spec.method_name)
+            self._callables[name] = func
+        return func
+
+    def required_arguments(self, name):
+        """Number of arguments an operation needs (parameters without defaults)
+        
+        Read from the method's signature without instantiating its group.
+        """
+        required = self._required.get(name)
+        if required is None:
+            spec = self.get(name)
+            module_name, class_name = self.groups[spec.group]
+            cls = getattr(importlib.import_module(module_name), class_name)
+            parameters = list(inspect.signature(getattr(cls, spec.method_name))
+                              .parameters.values())[1:]  # Skip self
+            required = sum(1 for parameter in parameters
+                           if parameter.default is parameter.empty
+                           and parameter.kind in (parameter.POSITIONAL_ONLY,
+                                                  parameter.POSITIONAL_OR_KEYWORD))
+            self._required[name] = required
+        return required
+
+    def code_version(self, name):
+        """Hash of the source of the modules implementing an operation
+        
+        Covers the group's module and the spec's ``modules``; a change to
+        any of them invalidates cached results.
+        """
+        version = self._versions.get(name)
+        if version is None:
+            spec = self.get(name)
+            modules = (self.groups[spec.group][0],) + spec.modules
+            digest = hashlib.sha256()
+            for module_name in modules:
+                digest.update(self._module_version(module_name).encode('ascii'))
+            version = digest.hexdigest()[:16]
+            self._versions[name] = version
+        return version
+    
+    def _module_version(self, module_name):
+        """Hash of one module's source"""
+        version = self._module_versions.get(module_name)
+        if version is None:
+            module = importlib.import_module(module_name)
+            try:
+                source = inspect.getsource(module)
+            except (OSError, TypeError):
+                source = getattr(module, '__file__', None) or module.__name__
+            version = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+            self._module_versions[module_name] = version
+        return version
+    
+    def enable_cache(self, cache):
+        """Cache results of expensive pure operations (see calculator_cache)"""
+        self.result_cache = cache
+    
+    def call(self, name, *args, **kwargs):
+        """Call an operation by name"""
+        func = self.resolve(name)
+        cache = self.result_cache
+        if cache is None or kwargs:
+            return func(*args, **kwargs)
+        
+        spec = self.specs[name]
+        if not spec.pure or spec.cost == 'constant' or _work_size(args) < cache.min_work:
+            return func(*args)
+        return cache.call(name, self.code_version(name), func, args)
+
+    def call_many(self, name, argument_tuples):
+        """Batch mode: apply one operation to many argument tuples"""
+        func = self.resolve(name)
+        return [func(*args) for args in argument_tuples]
+
+    def names(self, group=None):
+        """Registered operation names, optionally for a single group"""
+        return [name for name, spec in self.specs.items() if group is None or spec.group == group]
+
+
+def _work_size(args):
+    """Rough amount of work in a call: list lengths plus integer magnitudes"""
+    size = 0
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            size += len(arg)
+        elif isinstance(arg, int):
+            size += abs(arg)  # e.g. factorial(n) or an exponent
+        else:
+            size += 1
+    return size
+
+
+def register_default_operations(registry):
+    """Populate a registry from the classes in calculator_operations"""
+    registry.register_group('basic', 'calculator_operations', 'BasicOperations')
+    registry.register_group('advanced', 'calculator_operations', 'AdvancedOperations')
+    registry.register_group('statistical', 'calculator_operations', 'StatisticalOperations')
+    registry.register_group('financial', 'calculator_operations', 'FinancialOperations')
+
+    two_numbers = ("Enter first number: ", "Enter second number: ")
+    register = registry.register
+
+    # Basic arithmetic
+    register('add', 'basic', 2, "Addition (+)", prompts=two_numbers, vectorizable=True)
+    register('subtract', 'basic', 2, "Subtraction (-)", prompts=two_numbers, vectorizable=True)
+    register('multiply', 'basic', 2, "Multiplication (*)", prompts=two_numbers, vectorizable=True)
+    register('divide', 'basic', 2, "Division (/)", prompts=two_numbers)
+    register('modulus', 'basic', 2, "Modulus (%)", prompts=two_numbers)
+    register('integer_divide', 'basic', 2, "Integer Division (//)", prompts=two_numbers)
+
+    # Advanced
+    register('power', 'advanced', 2, "Power (**)", operation_type='advanced',
+             prompts=("Enter base: ", "Enter exponent: "), cost='linear')
+    coefficients_prompt = ("Enter coefficients, highest degree first: ",)
+    register('polynomial_evaluate', 'advanced', 2, "Polynomial Value", operation_type='advanced',
+             prompts=coefficients_prompt + ("Enter x: ",), input_kind='series', cost='linear',
+             modules=('calculator_polynomial',))
+    register('polynomial_roots', 'advanced', 1, "Polynomial Roots", operation_type='advanced',
+             prompts=coefficients_prompt, input_kind='numbers', cost='superlinear',
+             modules=('calculator_polynomial',))
+    register('square_root', 'advanced', 1, "Square Root (sqrt)", operation_type='advanced',
+             prompts=("Enter number: ",))
+    register('factorial', 'advanced', 1, "Factorial (!)", operation_type='advanced',
+             prompts=("Enter positive integer: ",), input_kind='integer', cost='superlinear')
+    register('logarithm', 'advanced', 2, "Logarithm (log)", operation_type='advanced',
+             prompts=("Enter number: ", "Enter base (default 10): "), defaults={1: 10})
+
+    for name, label in [('sine', "Sin"), ('cosine', "Cos"), ('tangent', "Tan")]:
+        register(name, 'advanced', 1, label, operation_type='trigonometry',
+                 prompts=("Enter angle in degrees: ",))
+
+    register('rectangle_area', 'advanced', 2, "Rectangle", operation_type='area',
+             prompts=("Enter length: ", "Enter width: "))
+    register('circle_area', 'advanced', 1, "Circle", operation_type='area',
+             prompts=("Enter radius: ",))
+    register('triangle_area', 'advanced', 2, "Triangle", operation_type='area',
+             prompts=("Enter base: ", "Enter height: "))
+
+    # Conversions
+    register('celsius_to_fahrenheit', 'advanced', 1, "Celsius to Fahrenheit",
+             operation_type='conversion', unit='degF', vectorizable=True,
+             prompts=("Enter temperature in Celsius: ",))
+    register('fahrenheit_to_celsius', 'advanced', 1, "Fahrenheit to Celsius",
+             operation_type='conversion', unit='degC', vectorizable=True,
+             prompts=("Enter temperature in Fahrenheit: ",))
+    register('meters_to_feet', 'advanced', 1, "Meters to Feet", operation_type='conversion',
+             unit='ft', prompts=("Enter length in meters: ",))
+    register('feet_to_meters', 'advanced', 1, "Feet to Meters", operation_type='conversion',
+             unit='m', prompts=("Enter length in feet: ",))
+    register('kg_to_pounds', 'advanced', 1, "Kg to Pounds", operation_type='conversion',
+             unit='lb', prompts=("Enter weight in kg: ",))
+    register('pounds_to_kg', 'advanced', 1, "Pounds to Kg", operation_type='conversion',
+             unit='kg', prompts=("Enter weight in pounds: ",))
+    register('convert_units', 'advanced', 3, "Other Units", operation_type='conversion',
+             vectorizable=True, modules=('calculator_units',))
+
+    # Statistics over a list of numbers
+    numbers_prompt = ("Enter numbers separated by commas: ",)
+    register('mean', 'statistical', 1, "Mean", operation_type='statistics',
+             prompts=numbers_prompt, input_kind='numbers', cost='linear')
+    register('median', 'statistical', 1, "Median", operation_type='statistics',
+             prompts=numbers_prompt, input_kind='numbers', cost='superlinear')
+    register('mode', 'statistical', 1, "Mode", operation_type='statistics',
+             prompts=numbers_prompt, input_kind='numbers', cost='linear')
+    register('standard_deviation', 'statistical', 1, "Standard Deviation",
+             operation_type='statistics', prompts=numbers_prompt, input_kind='numbers',
+             cost='linear')
+    register('range_calc', 'statistical', 1, "Range", operation_type='statistics',
+             prompts=numbers_prompt, input_kind='numbers', cost='linear')
+    
+    # Paired data
+    pairs_prompts = ("Enter x values separated by commas: ", "Enter y values separated by commas: ")
+    for name, label in [('covariance', "Covariance"), ('correlation', "Correlation"),
+                        ('spearman_correlation', "Spearman Correlation"),
+                        ('linear_regression', "Linear Regression")]:
+        register(name, 'statistical', 2, label, operation_type='statistics',
+                 prompts=pairs_prompts, input_kind='numbers',
+                 cost='superlinear' if name == 'spearman_correlation' else 'linear',
+                 modules=('calculator_regression', 'calculator_matrix'))
+    
+    # Rolling-window statistics over a series
+    window_prompts = numbers_prompt + ("Enter window size: ",)
+    for name, label in [('moving_average', "Moving Average"),
+                        ('moving_standard_deviation', "Moving Std Dev"),
+                        ('moving_min', "Moving Min"), ('moving_max', "Moving Max")]:
+        register(name, 'statistical', 2, label, operation_type='statistics',
+                 prompts=window_prompts, input_kind='series', cost='linear', vectorizable=True,
+                 modules=('calculator_timeseries',))
+    register('exponential_moving_average', 'statistical', 2, "Exponential Moving Average",
+             operation_type='statistics', prompts=numbers_prompt + ("Enter smoothing factor (0-1]: ",),
+             input_kind='series', cost='linear', vectorizable=True,
+             modules=('calculator_timeseries',))
+
+    # Financial
+    register('simple_interest', 'financial', 3, "Simple Interest", operation_type='financial',
+             prompts=("Enter principal: ", "Enter annual rate (%): ", "Enter time (years): "))
+    register('compound_interest', 'financial', 4, "Compound Interest", operation_type='financial',
+             prompts=("Enter principal: ", "Enter annual rate (%): ", "Enter time (years): ",
+                      "Enter compounds per year: "), cost='linear')
+    register('compound_interest_rate', 'financial', 4, "Interest Rate Solver",
+             operation_type='financial',
+             prompts=("Enter principal: ", "Enter interest earned: ", "Enter time (years): ",
+                      "Enter compounds per year: "), modules=('calculator_numerics',))
+    register('percentage_change', 'financial', 2, "Percentage Change", operation_type='financial',
+             prompts=("Enter old value: ", "Enter new value: "))
+    register('tip_calculator', 'financial', 3, "Tip Calculator", operation_type='financial',
+             prompts=("Enter bill amount: ", "Enter tip percentage: ", "Enter number of people: "))
+    return registry
+
+
+# Shared registry used by the calculator
+operation_registry = register_default_operations(OperationRegistry())
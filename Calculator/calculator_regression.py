@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Calculator Regression Module
+Paired-data statistics: covariance, Pearson and Spearman correlation,
+simple and multiple linear regression.
+
+Everything is derived from one accumulator of count, means and
+co-moments (sums of products of deviations from the means) of several
+variables. Rows are added one at a time with Welford's update, or a chunk
+at a time: NumPy computes the chunk's centered co-moments with one matrix
+product, and chunks (or accumulators built in other processes) are
+combined with Chan's pairwise merge. Deviations are always taken from
+the running means, so there is no catastrophic cancellation as with
+sums of squares.
+
+Regression coefficients solve the centered normal equations with LU
+decomposition (calculator_matrix); ``r_squared`` is the explained share
+of the response's variance.
+
+Spearman correlation is Pearson correlation of the ranks (ties get their
+average rank), so it needs all values at once rather than a stream.
+"""
+
+import math
+import calculator_matrix
+
+try:
+    import numpy as np
+except ImportError:  # Rows are accumulated in pure Python without NumPy
+    np = None
+
+# Rows per NumPy chunk: bounds the temporary centered copy of the data
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+
+class MomentAccumulator:
+    """Count, means and co-moments of several variables; single pass, mergeable"""
+
+    __slots__ = ('dimensions', 'count', 'means', 'comoments')
+
+    def __init__(self, dimensions=2):
+        if dimensions < 1:
+            raise ValueError("Need at least one variable!")
+        self.dimensions = dimensions
+        self.count = 0
+        self.means = [0.0] * dimensions
+        # comoments[i][j]: sum of (x_i - mean_i) * (x_j - mean_j)
+        self.comoments = [[0.0] * dimensions for _ in range(dimensions)]
+
+    def add(self, row):
+        """Add one observation (a value per variable)"""
+        if len(row) != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions} values, got {len(row)}!")
+        self.count += 1
+        before = [value - mean for value, mean in zip(row, self.means)]
+        self.means = [mean + delta / self.count for mean, delta in zip(self.means, before)]
+        after = [value - mean for value, mean in zip(row, self.means)]
+        for i, comoment in enumerate(self.comoments):
+            delta = before[i]
+            for j in range(self.dimensions):
+                comoment[j] += delta * after[j]
+
+    def add_rows(self, rows, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Add many observations: a 2-D NumPy array (vectorized) or a sequence of rows"""
+        if np is None or not isinstance(rows, np.ndarray):
+            for row in rows:
+                self.add(row)
+            return
+        if rows.ndim != 2 or rows.shape[1] != self.dimensions:
+            raise ValueError(f"Expected rows of {self.dimensions} values!")
+        for start in range(0, len(rows), chunk_rows):
+            chunk = np.asarray(rows[start:start + chunk_rows], dtype=float)
+            means = chunk.mean(axis=0)
+            centered = chunk - means
+            self.merge(self._from_moments(len(chunk), means.tolist(),
+                                          (centered.T @ centered).tolist()))
+
+    def _from_moments(self, count, means, comoments):
+        other = MomentAccumulator(self.dimensions)
+        other.count, other.means, other.comoments = count, means, comoments
+        return other
+
+    def merge(self, other):
+        """Combine with an accumulator of other rows of the same variables (Chan et al.)"""
+        if other.dimensions != self.dimensions:
+            raise ValueError("Cannot merge statistics of different variables!")
+        if not other.count:
+            return
+        if not self.count:
+            self.count = other.count
+            self.means = list(other.means)
+            self.comoments = [list(row) for row in other.comoments]
+            return
+        count = self.count + other.count
+        delta = [b - a for a, b in zip(self.means, other.means)]
+        weight = self.count * other.count / count
+        for i in range(self.dimensions):
+            row, other_row = self.comoments[i], other.comoments[i]
+            for j in range(self.dimensions):
+                row[j] += other_row[j] + delta[i] * delta[j] * weight
+        self.means = [mean + d * other.count / count for mean, d in zip(self.means, delta)]
+        self.count = count
+
+    def _require(self, minimum, what):
+        if self.count < minimum:
+            raise ValueError(f"Need at least {minimum} pairs for {what}!")
+
+    def variance(self, i=0):
+        """Sample variance of one variable"""
+        self._require(2, "variance")
+        return self.comoments[i][i] / (self.count - 1)
+
+    def covariance(self, i=0, j=1):
+        """Sample covariance of two variables"""
+        self._require(2, "covariance")
+        return self.comoments[i][j] / (self.count - 1)
+
+    def covariance_matrix(self):
+        """Sample covariances of every pair of variables"""
+        self._require(2, "covariance")
+        return [[value / (self.count - 1) for value in row] for row in self.comoments]
+
+    def correlation(self, i=0, j=1):
+        """Pearson correlation coefficient of two variables"""
+        self._require(2, "correlation")
+        spread = math.sqrt(self.comoments[i][i] * self.comoments[j][j])
+        if spread == 0:
+            raise ValueError("Cannot calculate correlation: a variable is constant!")
+        # Rounding can push a perfect correlation just past +-1
+        return max(-1.0, min(1.0, self.comoments[i][j] / spread))
+
+    def regression(self, response=None):
+        """Least-squares fit of one variable (default: the last) on all the others
+
+        Returns coefficients (one per predictor, in order), intercept,
+        r_squared, residual_standard_error and count.
+        """
+        response = self.dimensions - 1 if response is None else response
+        predictors = [i for i in range(self.dimensions) if i != response]
+        if not predictors:
+            raise ValueError("Regression needs at least one predictor!")
+        self._require(len(predictors) + 1, "regression")
+
+        # Solve in correlation scale so predictors of very different sizes
+        # do not look singular: (D^-1 Sxx D^-1) (D b) = D^-1 Sxy, D = sqrt(diag Sxx)
+        scales = [math.sqrt(self.comoments[i][i]) for i in predictors]
+        if min(scales) == 0:
+            raise ValueError("Predictors are constant or linearly dependent!")
+        scaled = [[self.comoments[i][j] / (si * sj) for j, sj in zip(predictors, scales)]
+                  for i, si in zip(predictors, scales)]
+        sxy = [[self.comoments[i][response]] for i in predictors]
+        factors = calculator_matrix.lu_decompose(scaled)
+        if factors is None:
+            raise ValueError("Predictors are constant or linearly dependent!")
+        solution = calculator_matrix.lu_solve(factors, [[row[0] / s] for row, s in zip(sxy, scales)])
+        coefficients = [row[0] / s for row, s in zip(solution, scales)]
+
+        intercept = self.means[response] - math.fsum(
+            b * self.means[i] for b, i in zip(coefficients, predictors))
+        total = self.comoments[response][response]
+        explained = math.fsum(b * row[0] for b, row in zip(coefficients, sxy))
+        residual = max(total - explained, 0.0)
+        degrees = self.count - len(predictors) - 1
+        return {
+            'coefficients': coefficients,
+            'intercept': intercept,
+            'r_squared': explained / total if total > 0 else 1.0,
+            'residual_standard_error': math.sqrt(residual / degrees) if degrees > 0 else math.nan,
+            'count': self.count,
+        }
+
+
+def _pairs(xs, ys):
+    """Validate paired samples"""
+    if len(xs) != len(ys):
+        raise ValueError(f"Got {len(xs)} x values for {len(ys)} y values!")
+
+
+def accumulate(*columns):
+    """A MomentAccumulator over equal-length columns (NumPy arrays are vectorized)"""
+    for column in columns[1:]:
+        _pairs(columns[0], column)
+    accumulator = MomentAccumulator(len(columns))
+    if np is not None and any(isinstance(column, np.ndarray) for column in columns):
+        accumulator.add_rows(np.column_stack(columns).astype(float, copy=False))
+    else:
+        accumulator.add_rows(zip(*columns))
+    return accumulator
+
+
+def ranks(values):
+    """1-based ranks, ties sharing their average rank"""
+    if np is not None and isinstance(values, np.ndarray):
+        order = np.argsort(values, kind='stable')
+        ordered = values[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        counts = np.diff(np.r_[starts, len(values)])
+        result = np.empty(len(values))
+        result[order] = np.repeat(starts + (counts + 1) / 2, counts)
+        return result
+
+    order = sorted(range(len(values)), key=values.__getitem__)
+    result = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and values[order[end]] == values[order[start]]:
+            end += 1
+        rank = (start + end + 1) / 2  # Average of ranks start + 1 .. end
+        for index in order[start:end]:
+            result[index] = rank
+        start = end
+    return result
+
+
+def spearman_correlation(xs, ys):
+    """Spearman rank correlation: Pearson correlation of the ranks"""
+    _pairs(xs, ys)
+    return accumulate(ranks(xs), ranks(ys)).correlation()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Calculator Segments Module
+Time-partitioned history storage: one JSON-lines segment file per day plus
+a small manifest recording each segment's timestamp range and per-type
+counts. Date-range queries open only the segments they need, and old
+segments can be compressed (archived) independently.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from calculator_journal import FileLock, atomic_write_json
+
+MANIFEST_NAME = "manifest.json"
+
+
+class SegmentedHistoryStore:
+    """Per-day history segments with a manifest"""
+
+    def __init__(self, directory="calculator_history_segments"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.lock = FileLock(os.path.join(directory, "manifest.lock"))
+        self.manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        """Load the manifest (empty if the store is new)"""
+        if not os.path.exists(self.manifest_path):
+            return {'version': 1, 'segments': {}}
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def _segment_path(self, info):
+        """Full path of a segment file"""
+        return os.path.join(self.directory, info['file'])
+
+    # Writing
+
+    def append(self, entries):
+        """Append entries to their day's segment and update the manifest"""
+        by_day = {}
+        for entry in entries:
+            # ISO timestamps start with the date, so no parsing is needed
+            by_day.setdefault(entry['timestamp'][:10], []).append(entry)
+        if not by_day:
+            return
+
+        with self.lock.acquire():
+            self.manifest = self._read_manifest()
+            segments = self.manifest['segments']
+
+            for day, day_entries in by_day.items():
+                info = segments.get(day)
+                if info is None:
+                    info = segments[day] = {
+                        'file': f"{day}.jsonl", 'count': 0, 'compressed': False,
+                        'min_timestamp': day_entries[0]['timestamp'],
+                        'max_timestamp': day_entries[0]['timestamp'], 'types': {},
+                    }
+                if info['compressed']:
+                    self._decompress(info)
+
+                with open(self._segment_path(info), 'a') as f:
+                    f.write(''.join(json.dumps(entry) + '\n' for entry in day_entries))
+
+                for entry in day_entries:
+                    timestamp = entry['timestamp']
+                    if timestamp < info['min_timestamp']:
+                        info['min_timestamp'] = timestamp
+                    if timestamp > info['max_timestamp']:
+                        info['max_timestamp'] = timestamp
+                    op_type = entry.get('operation_type', 'basic')
+                    info['types'][op_type] = info['types'].get(op_type, 0) + 1
+                info['count'] += len(day_entries)
+
+            atomic_write_json(self.manifest_path, self.manifest)
+
+    def archive(self, before_date):
+        """Compress all segments for days before ``before_date`` (YYYY-MM-DD)"""
+        archived = []
+        with self.lock.acquire():
+            self.manifest = self._read_manifest()
+            for day, info in sorted(self.manifest['segments'].items()):
+                if day < before_date and not info['compressed']:
+                    source = self._segment_path(info)
+                    target = source + ".gz"
+                    with open(source, 'rb') as f_in, gzip.open(target, 'wb') as f_out:
+                        f_out.writelines(f_in)
+                    info['file'] += ".gz"
+                    info['compressed'] = True
+                    atomic_write_json(self.manifest_path, self.manifest)
+                    os.remove(source)
+                    archived.append(day)
+        return archived
+
+    def _decompress(self, info):
+        """Turn an archived segment back into a plain file (hold the lock)"""
+        source = self._segment_path(info)
+        target = source[:-len(".gz")]
+        with gzip.open(source, 'rb') as f_in, open(target, 'wb') as f_out:
+            f_out.writelines(f_in)
+        info['file'] = info['file'][:-len(".gz")]
+        info['compressed'] = False
+        atomic_write_json(self.manifest_path, self.manifest)
+        os.remove(source)
+
+    # Reading
+
+    def refresh(self):
+        """Re-read the manifest written by other processes"""
+        self.manifest = self._read_manifest()
+
+    def segments_in_range(self, start=None, end=None):
+        """Days whose segments overlap [start, end] (ISO date or timestamp strings)"""
+        days = []
+        for day, info in sorted(self.manifest['segments'].items()):
+            if start is not None and info['max_timestamp'] < start:
+                continue
+            if end is not None and info['min_timestamp'][:len(end)] > end:
+                continue
+            days.append(day)
+        return days
+
+    def iter_range(self, start=None, end=None):
+        """Yield entries with start <= timestamp <= end, opening only overlapping segments"""
+        for day in self.segments_in_range(start, end):
+            info = self.manifest['segments'][day]
+            opener = gzip.open if info['compressed'] else open
+            with opener(self._segment_path(info), 'rt') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    timestamp = entry['timestamp']
+                    if start is not None and timestamp < start:
+                        continue
+                    if end is not None and timestamp[:len(end)] > end:
+                        continue
+                    yield entry
+
+    def last_days(self, days=7, today=None):
+        """Yield entries from the last ``days`` calendar days"""
+        today = today or datetime.now().date()
+        start = (today - timedelta(days=days - 1)).isoformat()
+        return self.iter_range(start=start)
+
+    def daily_counts(self, start=None, end=None):
+        """Calculations per day, answered from the manifest alone"""
+        return {day: self.manifest['segments'][day]['count']
+                for day in self.segments_in_range(start, end)}
+
+    def type_counts(self, start=None, end=None):
+        """Calculations per operation type over whole days, from the manifest alone"""
+        totals = {}
+        for day in self.segments_in_range(start, end):
+            for op_type, count in self.manifest['segments'][day]['types'].items():
+                totals[op_type] = totals.get(op_type, 0) + count
+        return totals
+
+    def export(self, filename, start=None, end=None):
+        """Stream entries in a date range to a JSON-lines file; returns the count"""
+        count = 0
+        with open(filename, 'w') as f:
+            for entry in self.iter_range(start, end):
+                f.write(json.dumps(entry) + '\n')
+                count += 1
+        return count
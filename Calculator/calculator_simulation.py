@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Calculator Simulation Module
+Monte Carlo distributions of financial outcomes under random rates.
+
+A model draws random rate or return paths and evaluates a financial
+formula for each of them, e.g. the compound interest earned when each
+year's rate is drawn around a mean. The paths are split into chunks, so
+memory stays bounded by the chunk size whatever the number of paths:
+
+- Every chunk draws from its own NumPy ``Generator``, seeded from one
+  ``SeedSequence(seed).spawn(...)`` child per chunk. A seeded run gives
+  the same result whether it runs in one process or in a pool.
+- Each chunk is reduced to summary statistics (count, mean, variance,
+  min, max), merged with Chan's parallel update, and to a quantile sketch,
+  so no outcome array outlives its chunk.
+- With ``workers > 1`` chunks are simulated in a process pool and their
+  summaries merged in chunk order.
+
+Usage:
+    python calculator_simulation.py compound 10000 --rate 5 --volatility 2 --years 10
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from calculator_operations import FinancialOperations
+
+try:
+    import numpy as np
+except ImportError:  # Simulations need NumPy's random generators
+    np = None
+
+DEFAULT_CHUNK_PATHS = 250_000
+DEFAULT_RESOLUTION = 1_000
+DEFAULT_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+class SummaryStatistics:
+    """Count, mean, variance, min and max, mergeable across chunks"""
+
+    __slots__ = ('count', 'mean', 'm2', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def update(self, values):
+        """Add a chunk of values"""
+        chunk = SummaryStatistics()
+        chunk.count = len(values)
+        if not chunk.count:
+            return
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(np.square(values - chunk.mean).sum())
+        chunk.minimum = float(values.min())
+        chunk.maximum = float(values.max())
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Combine with another summary (Chan et al. parallel variance)"""
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self):
+        """Sample variance (NaN below two values)"""
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def standard_deviation(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """Approximate quantiles from weighted points, mergeable across chunks
+
+    A chunk larger than the resolution is kept as ``resolution`` evenly
+    spaced quantiles, each standing for an equal share of its values; the
+    points are recompressed the same way when they pile up. Quantiles are
+    interpolated from the points' cumulative weights, so the rank error is
+    about ``1 / resolution``.
+    """
+
+    __slots__ = ('resolution', 'count', '_values', '_weights')
+
+    def __init__(self, resolution=DEFAULT_RESOLUTION):
+        if resolution < 2:
+            raise ValueError("Resolution must be at least 2!")
+        self.resolution = resolution
+        self.count = 0
+        self._values = []
+        self._weights = []
+
+    def _grid(self):
+        return (np.arange(self.resolution) + 0.5) / self.resolution
+
+    def update(self, values):
+        """Add a chunk of values"""
+        size = len(values)
+        if not size:
+            return
+        if size <= self.resolution:
+            self._add(np.sort(values), np.ones(size))
+        else:
+            self._add(np.quantile(values, self._grid()),
+                      np.full(self.resolution, size / self.resolution))
+
+    def merge(self, other):
+        """Combine with another sketch"""
+        for values, weights in zip(other._values, other._weights):
+            self._add(values, weights)
+
+    def _add(self, values, weights):
+        self._values.append(values)
+        self._weights.append(weights)
+        self.count += int(round(weights.sum()))
+        if sum(map(len, self._values)) > 8 * self.resolution:
+            self._compress()
+
+    def _points(self):
+        """Pooled points in order, the rank at each and the total weight"""
+        values = np.concatenate(self._values)
+        weights = np.concatenate(self._weights)
+        order = np.argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        cumulative = np.cumsum(weights)
+        return values, cumulative - weights / 2, cumulative[-1]
+
+    def _compress(self):
+        values, ranks, total = self._points()
+        self._values = [np.interp(self._grid() * total, ranks, values)]
+        self._weights = [np.full(self.resolution, total / self.resolution)]
+
+    def quantile(self, q):
+        """Value below which a fraction q of the values lie"""
+        if not self.count:
+            raise ValueError("No values to compute quantiles from!")
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1!")
+        values, ranks, total = self._points()
+        return float(np.interp(q * total, ranks, values))
+
+
+class CompoundGrowthModel:
+    """Compound interest earned when each year's rate (%) is normally distributed"""
+
+    def __init__(self, principal, mean_rate, volatility, years, compounds_per_year=1,
+                 floor_rate=None):
+        if principal < 0 or volatility < 0 or years <= 0 or compounds_per_year <= 0:
+            raise ValueError("Invalid input values!")
+        self.principal = principal
+        self.mean_rate = mean_rate
+        self.volatility = volatility
+        self.years = years
+        self.compounds_per_year = compounds_per_year
+        self.floor_rate = floor_rate  # Drawn rates below this are clipped to it (%)
+
+    def sample(self, rng, paths):
+        """Interest earned on each of ``paths`` random rate paths"""
+        periods = math.ceil(self.years)
+        rates = rng.normal(self.mean_rate, self.volatility, size=(paths, periods))
+        # A period cannot lose more than the whole amount
+        floor = -100.0 * self.compounds_per_year
+        np.maximum(rates, floor if self.floor_rate is None else max(floor, self.floor_rate),
+                   out=rates)
+        # Years are compounded in full; the last one may be a fraction of a year
+        exponents = np.full(periods, float(self.compounds_per_year))
+        exponents[-1] *= self.years - (periods - 1)
+        growth = np.log1p(rates / 100 / self.compounds_per_year) @ exponents
+        return self.principal * np.expm1(growth)
+
+    def expected(self):
+        """Deterministic outcome at the mean rate"""
+        return FinancialOperations().compound_interest(
+            self.principal, self.mean_rate, self.years, self.compounds_per_year)
+
+
+class PercentageChangeModel:
+    """Percentage change of a value after periods of lognormal returns"""
+
+    def __init__(self, initial_value, mean_return, volatility, periods):
+        if initial_value == 0:
+            raise ValueError("Cannot calculate percentage change from zero!")
+        if volatility < 0 or periods <= 0 or int(periods) != periods:
+            raise ValueError("Invalid input values!")
+        self.initial_value = initial_value
+        self.mean_return = mean_return  # Mean return per period (%)
+        self.volatility = volatility  # Standard deviation of the return per period (%)
+        self.periods = int(periods)
+
+    def sample(self, rng, paths):
+        """Percentage change on each of ``paths`` random return paths"""
+        # Log-returns whose exponentials have the requested mean and deviation
+        mean = 1 + self.mean_return / 100
+        if mean <= 0:
+            raise ValueError("Mean return must be above -100%!")
+        sigma2 = math.log1p((self.volatility / 100 / mean) ** 2)
+        mu = math.log(mean) - sigma2 / 2
+        # The sum of normal log-returns is itself normal: one draw per path
+        total = rng.normal(mu * self.periods, math.sqrt(sigma2 * self.periods), size=paths)
+        final = self.initial_value * np.exp(total)
+        return FinancialOperations().percentage_change(self.initial_value, final)
+
+    def expected(self):
+        """Deterministic outcome at the mean return"""
+        final = self.initial_value * (1 + self.mean_return / 100) ** self.periods
+        return FinancialOperations().percentage_change(self.initial_value, final)
+
+
+def _simulate_chunk(model, seed, paths, resolution):
+    """Summary and quantile sketch of one chunk of paths"""
+    outcomes = model.sample(np.random.default_rng(seed), paths)
+    summary = SummaryStatistics()
+    summary.update(outcomes)
+    sketch = QuantileSketch(resolution)
+    sketch.update(outcomes)
+    return summary, sketch
+
+
+class SimulationResult:
+    """Merged statistics of a simulation run"""
+
+    def __init__(self, summary, sketch, chunks, seconds, quantiles=DEFAULT_QUANTILES):
+        self.summary = summary
+        self.sketch = sketch
+        self.chunks = chunks
+        self.seconds = seconds
+        self.quantile_levels = tuple(quantiles)
+
+    @property
+    def paths(self):
+        return self.summary.count
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def report(self):
+        """Plain dict of the statistics"""
+        return {
+            'paths': self.paths,
+            'mean': self.summary.mean,
+            'standard_deviation': self.summary.standard_deviation,
+            'min': self.summary.minimum,
+            'max': self.summary.maximum,
+            'quantiles': {q: self.quantile(q) for q in self.quantile_levels},
+            'chunks': self.chunks,
+            'seconds': self.seconds,
+            'paths_per_second': self.paths / self.seconds if self.seconds > 0 else None,
+        }
+
+
+class MonteCarloSimulation:
+    """Runs a model over many random paths in chunks, optionally in parallel"""
+
+    def __init__(self, model, paths, seed=None, chunk_paths=DEFAULT_CHUNK_PATHS, workers=1,
+                 resolution=DEFAULT_RESOLUTION):
+        if np is None:
+            raise ValueError("NumPy is not installed!")
+        if paths <= 0 or chunk_paths <= 0:
+            raise ValueError("Number of paths and chunk size must be positive!")
+        if workers < 1:
+            raise ValueError("Number of workers must be positive!")
+        self.model = model
+        self.paths = int(paths)
+        self.seed = seed
+        self.chunk_paths = int(chunk_paths)
+        self.workers = workers
+        self.resolution = resolution
+
+    def _chunks(self):
+        """(seed, paths) of every chunk; one independent substream each"""
+        count = -(-self.paths // self.chunk_paths)
+        seeds = np.random.SeedSequence(self.seed).spawn(count)
+        sizes = [self.chunk_paths] * (count - 1) + [self.paths - self.chunk_paths * (count - 1)]
+        return list(zip(seeds, sizes))
+
+    def run(self, quantiles=DEFAULT_QUANTILES):
+        """Simulate every path; returns a SimulationResult"""
+        started = time.perf_counter()
+        chunks = self._chunks()
+        summary = SummaryStatistics()
+        sketch = QuantileSketch(self.resolution)
+
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as pool:
+                parts = pool.map(_simulate_chunk, *zip(*[
+                    (self.model, seed, size, self.resolution) for seed, size in chunks]))
+                for chunk_summary, chunk_sketch in parts:  # In chunk order: reproducible
+                    summary.merge(chunk_summary)
+                    sketch.merge(chunk_sketch)
+        else:
+            for seed, size in chunks:
+                chunk_summary, chunk_sketch = _simulate_chunk(self.model, seed, size,
+                                                              self.resolution)
+                summary.merge(chunk_summary)
+                sketch.merge(chunk_sketch)
+
+        return SimulationResult(summary, sketch, len(chunks), time.perf_counter() - started,
+                                quantiles)
+
+
+def print_report(result, expected=None):
+    """Show a simulation's statistics"""
+    report = result.report()
+    print(f"\n🎲 {report['paths']:,} paths in {report['seconds']:.2f}s "
+          f"({report['paths_per_second'] or 0:,.0f} paths/s)")
+    if expected is not None:
+        print(f"  At the mean rate:   {expected:,.4f}")
+    print(f"  Mean:               {report['mean']:,.4f}")
+    print(f"  Standard deviation: {report['standard_deviation']:,.4f}")
+    print(f"  Min / Max:          {report['min']:,.4f} / {report['max']:,.4f}")
+    for q, value in report['quantiles'].items():
+        print(f"  {q * 100:g}th percentile: {value:,.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of financial outcomes")
+    parser.add_argument('model', choices=['compound', 'change'],
+                        help="compound: interest earned; change: percentage change of a value")
+    parser.add_argument('paths', type=int)
+    parser.add_argument('--amount', type=float, default=1000.0, help="principal or initial value")
+    parser.add_argument('--rate', type=float, default=5.0, help="mean rate or return per period (%%)")
+    parser.add_argument('--volatility', type=float, default=2.0, help="its standard deviation (%%)")
+    parser.add_argument('--years', type=float, default=10, help="years or periods")
+    parser.add_argument('--compounds', type=int, default=1, help="compounds per year")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--chunk-paths', type=int, default=DEFAULT_CHUNK_PATHS)
+    parser.add_argument('--workers', type=int, default=1,
+                        help=f"processes to use (this machine has {os.cpu_count()})")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.model == 'compound':
+            model = CompoundGrowthModel(args.amount, args.rate, args.volatility, args.years,
+                                        args.compounds)
+        else:
+            model = PercentageChangeModel(args.amount, args.rate, args.volatility, args.years)
+        result = MonteCarloSimulation(model, args.paths, args.seed, args.chunk_paths,
+                                      args.workers).run()
+    except ValueError as e:
+        print(f"❌ Simulation failed: {e}")
+        return 1
+
+    print_report(result, model.expected())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Calculator Time Series Module
+Rolling-window and exponentially weighted statistics over long series.
+
+Streaming classes take one sample at a time in O(1) amortized work, no
+matter how large the window: sums are kept with Neumaier compensation and
+minimum/maximum with monotonic deques. The ``rolling_*`` functions apply
+the same statistics to a whole series, vectorized with NumPy when it is
+installed and the input is an array.
+
+Sums for means and standard deviations are taken relative to a local
+centre that moves with the data (re-centred every window for streams,
+every block of positions for arrays), so a trend or a large offset does
+not cancel away the variance.
+
+Until a window has filled, statistics cover the samples seen so far; a
+standard deviation of fewer than two samples is NaN.
+"""
+
+import math
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; streaming classes work without it
+    np = None
+
+# Positions per block of the vectorized mean and standard deviation: each
+# block's window sums come from a cumulative sum centred on that block
+ROLLING_BLOCK = 1024
+
+
+class CompensatedSum:
+    """Running sum with Neumaier compensation (supports removing values)"""
+
+    __slots__ = ('total', 'compensation')
+
+    def __init__(self):
+        self.total = 0.0
+        self.compensation = 0.0
+
+    def add(self, value):
+        """Add a value (subtract by adding its negation)"""
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    @property
+    def value(self):
+        return self.total + self.compensation
+
+
+class RollingMean:
+    """Moving average over the last ``window`` samples"""
+
+    def __init__(self, window):
+        if window < 1:
+            raise ValueError("Window size must be at least 1!")
+        self.window = window
+        self.values = deque()
+        self.sum = CompensatedSum()
+
+    def update(self, value):
+        """Add a sample; returns the mean of the current window"""
+        self.values.append(value)
+        self.sum.add(value)
+        if len(self.values) > self.window:
+            self.sum.add(-self.values.popleft())
+        return self.sum.value / len(self.values)
+
+
+class RollingStd:
+    """Moving (sample) standard deviation over the last ``window`` samples
+
+    Sums of values and squares are taken relative to a shift. Every
+    ``window`` samples the shift moves to the window's mean and the sums
+    are recomputed exactly, so neither a large offset nor a trend cancels
+    away the variance (O(1) amortized per sample).
+    """
+
+    def __init__(self, window, ddof=1):
+        if window < 1:
+            raise ValueError("Window size must be at least 1!")
+        self.window = window
+        self.ddof = ddof
+        self.values = deque()
+        self.shift = None
+        self.sum = CompensatedSum()
+        self.sum_squares = CompensatedSum()
+        self.until_recenter = window
+
+    def _recenter(self):
+        """Move the shift to the window's mean and recompute the sums"""
+        mean = math.fsum(self.values) / len(self.values)
+        self.shift += mean
+        self.values = deque(value - mean for value in self.values)
+        self.sum = CompensatedSum()
+        self.sum.add(math.fsum(self.values))
+        self.sum_squares = CompensatedSum()
+        self.sum_squares.add(math.fsum(value * value for value in self.values))
+        self.until_recenter = self.window
+
+    def update(self, value):
+        """Add a sample; returns the standard deviation of the current window"""
+        if self.shift is None:
+            self.shift = value
+        centered = value - self.shift
+        self.values.append(centered)
+        self.sum.add(centered)
+        self.sum_squares.add(centered * centered)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.sum.add(-old)
+            self.sum_squares.add(-old * old)
+        self.until_recenter -= 1
+        if not self.until_recenter:
+            self._recenter()
+
+        count = len(self.values)
+        if count <= self.ddof:
+            return math.nan
+        total = self.sum.value
+        variance = (self.sum_squares.value - total * total / count) / (count - self.ddof)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class _RollingExtreme:
+    """Moving minimum or maximum with a monotonic deque"""
+
+    def __init__(self, window, keep):
+        if window < 1:
+            raise ValueError("Window size must be at least 1!")
+        self.window = window
+        self.keep = keep  # keep(candidate, newer): whether candidate stays useful
+        self.candidates = deque()  # (index, value), values monotonic
+        self.index = 0
+
+    def update(self, value):
+        """Add a sample; returns the extreme of the current window"""
+        candidates = self.candidates
+        while candidates and not self.keep(candidates[-1][1], value):
+            candidates.pop()
+        candidates.append((self.index, value))
+        if candidates[0][0] <= self.index - self.window:
+            candidates.popleft()
+        self.index += 1
+        return candidates[0][1]
+
+
+class RollingMin(_RollingExtreme):
+    """Moving minimum over the last ``window`` samples"""
+
+    def __init__(self, window):
+        super().__init__(window, lambda candidate, value: candidate < value)
+
+
+class RollingMax(_RollingExtreme):
+    """Moving maximum over the last ``window`` samples"""
+
+    def __init__(self, window):
+        super().__init__(window, lambda candidate, value: candidate > value)
+
+
+class EWMA:
+    """Exponentially weighted moving average: y = alpha * x + (1 - alpha) * y"""
+
+    def __init__(self, alpha=None, span=None):
+        if alpha is None:
+            if span is None:
+                raise ValueError("Give either alpha or span!")
+            alpha = 2 / (span + 1)
+        if not 0 < alpha <= 1:
+            raise ValueError("Alpha must be in (0, 1]!")
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, value):
+        """Add a sample; returns the updated average"""
+        if self.value is None:
+            self.value = float(value)
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+def _is_array(values):
+    return np is not None and isinstance(values, np.ndarray)
+
+
+def _stream(statistic, values):
+    """Run a streaming statistic over a series"""
+    update = statistic.update
+    return [update(value) for value in values]
+
+
+def _window_sums(values, window):
+    """Per-position sums over the trailing window (partial at the start)"""
+    cumulative = np.cumsum(values)
+    sums = cumulative.copy()
+    sums[window:] -= cumulative[:-window]
+    return sums
+
+
+def _centered_window_sums(values, window, squares=False):
+    """Trailing-window sums of values minus a per-block shift
+
+    Returns (shifts, sums, sums_squares); sums_squares is None unless
+    requested. Each block of positions takes its cumulative sums over just
+    the samples its windows cover, centred on their mean, so rounding
+    errors stay at the scale of the local spread of the data.
+    """
+    size = values.size
+    shifts = np.empty(size)
+    sums = np.empty(size)
+    sums_squares = np.empty(size) if squares else None
+    block = max(ROLLING_BLOCK, window)
+    for start in range(0, size, block):
+        stop = min(start + block, size)
+        first = max(0, start - window + 1)  # Earliest sample in the block's windows
+        segment = values[first:stop]
+        shift = segment.mean()
+        centered = segment - shift
+        skip = start - first
+        shifts[start:stop] = shift
+        sums[start:stop] = _window_sums(centered, window)[skip:]
+        if squares:
+            centered *= centered
+            sums_squares[start:stop] = _window_sums(centered, window)[skip:]
+    return shifts, sums, sums_squares
+
+
+def rolling_mean(values, window):
+    """Moving average of a series (vectorized for NumPy arrays)"""
+    if not _is_array(values):
+        return _stream(RollingMean(window), values)
+    if window < 1:
+        raise ValueError("Window size must be at least 1!")
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    counts = np.minimum(np.arange(1, values.size + 1), window)
+    shifts, sums, _ = _centered_window_sums(values, window)
+    return sums / counts + shifts
+
+
+def rolling_std(values, window, ddof=1):
+    """Moving standard deviation of a series (vectorized for NumPy arrays)"""
+    if not _is_array(values):
+        return _stream(RollingStd(window, ddof), values)
+    if window < 1:
+        raise ValueError("Window size must be at least 1!")
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return values
+    counts = np.minimum(np.arange(1, values.size + 1), window).astype(float)
+    _, sums, sums_squares = _centered_window_sums(values, window, squares=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (sums_squares - sums * sums / counts) / (counts - ddof)
+    return np.sqrt(np.where(counts > ddof, np.maximum(variance, 0.0), np.nan))
+
+
+def _rolling_extreme(values, window, ufunc, fill):
+    """Van Herk/Gil-Werman moving min/max: O(n) for any window size"""
+    values = np.asarray(values, dtype=float)
+    size = values.size
+    if size == 0:
+        return values
+    window = min(window, size)
+    # Pad the front so every position has a full window, then split into blocks
+    padded = np.concatenate([np.full(window - 1, fill), values])
+    blocks = -(-padded.size // window)
+    padded = np.concatenate([padded, np.full(blocks * window - padded.size, fill)])
+    shaped = padded.reshape(blocks, window)
+    prefix = ufunc.accumulate(shaped, axis=1).ravel()
+    suffix = ufunc.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].ravel()
+    # Window [i, i + window) = suffix of one block + prefix of the next
+    return ufunc(suffix[:size], prefix[window - 1:window - 1 + size])
+
+
+def rolling_min(values, window):
+    """Moving minimum of a series (vectorized for NumPy arrays)"""
+    if not _is_array(values):
+        return _stream(RollingMin(window), values)
+    if window < 1:
+        raise ValueError("Window size must be at least 1!")
+    return _rolling_extreme(values, window, np.minimum, np.inf)
+
+
+def rolling_max(values, window):
+    """Moving maximum of a series (vectorized for NumPy arrays)"""
+    if not _is_array(values):
+        return _stream(RollingMax(window), values)
+    if window < 1:
+        raise ValueError("Window size must be at least 1!")
+    return _rolling_extreme(values, window, np.maximum, -np.inf)
+
+
+def ewma(values, alpha=None, span=None):
+    """Exponentially weighted moving average of a series (vectorized for NumPy arrays)"""
+    statistic = EWMA(alpha, span)
+    if not _is_array(values):
+        return _stream(statistic, values)
+
+    values = np.asarray(values, dtype=float)
+    result = np.empty_like(values)
+    if values.size == 0:
+        return result
+    decay = 1.0 - statistic.alpha
+    if decay == 0.0:
+        result[:] = values
+        return result
+
+    # y[t] = decay**(t+1) * y[-1] + alpha * sum(decay**(t-k) * x[k]) within a block;
+    # blocks are short enough that decay**-k stays below 1e150
+    block = max(1, min(values.size, int(-150 / math.log10(decay))))
+    previous = values[0]
+    for start in range(0, values.size, block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(chunk.size)
+        if start == 0:
+            # The first sample starts the average (weight 1, not alpha)
+            weighted = np.cumsum(chunk[1:] / powers[1:]) * statistic.alpha
+            result[0] = chunk[0]
+            result[1:chunk.size] = powers[1:] * (chunk[0] + weighted)
+        else:
+            weighted = np.cumsum(chunk / powers) * statistic.alpha
+            result[start:start + chunk.size] = powers * decay * previous + powers * weighted
+        previous = result[start + chunk.size - 1]
+    return result
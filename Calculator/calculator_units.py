@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Calculator Units Module
+Unit registry with dimensions, SI prefixes and affine units (temperature).
+Converting between two units compiles once into a single scale/offset pair.
+"""
+
+import sys
+from fractions import Fraction
+from calculator_profiler import instrumentation
+
+
+class Unit:
+    """A unit expressed relative to its dimension's base unit
+
+    A value ``v`` in this unit equals ``v * scale + offset`` base units.
+    Scales and offsets may be Fractions so compiled converters stay exact.
+    """
+
+    __slots__ = ('name', 'dimension', 'scale', 'offset')
+
+    def __init__(self, name, dimension, scale, offset=0.0):
+        self.name = name
+        self.dimension = dimension
+        self.scale = scale
+        self.offset = offset
+
+    def __repr__(self):
+        return f"Unit({self.name!r}, {self.dimension!r}, {self.scale!r}, {self.offset!r})"
+
+
+class Converter:
+    """Compiled conversion: ``result = value * scale + offset``"""
+
+    __slots__ = ('from_unit', 'to_unit', 'scale', 'offset')
+
+    def __init__(self, from_unit, to_unit, scale, offset):
+        self.from_unit = from_unit
+        self.to_unit = to_unit
+        self.scale = scale
+        self.offset = offset
+
+    def __call__(self, values):
+        """Convert a scalar, a list/tuple or a NumPy array"""
+        scale, offset = self.scale, self.offset
+
+        # NumPy is optional and only loaded by callers that pass arrays
+        np = sys.modules.get('numpy')
+        if np is not None and isinstance(values, np.ndarray):
+            result = np.multiply(values, scale, dtype=np.result_type(values, float))
+            if offset:
+                np.add(result, offset, out=result)
+            return result
+
+        if isinstance(values, (list, tuple)):
+            if offset:
+                return [value * scale + offset for value in values]
+            return [value * scale for value in values]
+
+        return values * scale + offset
+
+    def convert_inplace(self, array):
+        """Convert a floating point NumPy array in place and return it"""
+        try:
+            import numpy as np
+        except ImportError:
+            raise ValueError("In-place conversion requires NumPy!") from None
+        np.multiply(array, self.scale, out=array)
+        if self.offset:
+            np.add(array, self.offset, out=array)
+        return array
+
+    def __repr__(self):
+        return (f"Converter({self.from_unit!r} -> {self.to_unit!r}: "
+                f"x * {self.scale!r} + {self.offset!r})")
+
+
+class UnitRegistry:
+    """Registry of units grouped by dimension"""
+
+    # Power-of-ten exponents; longest prefixes first so 'da' wins over 'd'
+    PREFIXES = {
+        'da': 1, 'Y': 24, 'Z': 21, 'E': 18, 'P': 15, 'T': 12, 'G': 9, 'M': 6,
+        'k': 3, 'h': 2, 'd': -1, 'c': -2, 'm': -3, 'u': -6, 'µ': -6, 'n': -9,
+        'p': -12, 'f': -15,
+    }
+
+    def __init__(self, load_defaults=True):
+        self.units = {}
+        self.prefixable = set()
+        self._prefixed_units = {}
+        self._converters = {}
+        if load_defaults:
+            self.load_default_units()
+
+    def define(self, name, dimension, scale=1.0, offset=0.0, aliases=(), prefixable=False):
+        """Define a unit (and its aliases) relative to the dimension's base unit"""
+        if scale == 0:
+            raise ValueError("Unit scale cannot be zero!")
+
+        unit = Unit(name, dimension, scale, offset)
+        for unit_name in (name,) + tuple(aliases):
+            self.units[unit_name] = unit
+        if prefixable:
+            self.prefixable.add(name)
+
+        self._prefixed_units.clear()
+        self._converters.clear()
+        return unit
+
+    def get_unit(self, name):
+        """Look up a unit by name, resolving SI prefixes on prefixable units"""
+        unit = self.units.get(name) or self._prefixed_units.get(name)
+        if unit is not None:
+            return unit
+
+        for prefix, exponent in self.PREFIXES.items():
+            if name.startswith(prefix):
+                base_name = name[len(prefix):]
+                if base_name in self.prefixable:
+                    base = self.units[base_name]
+                    scale = Fraction(base.scale) * Fraction(10) ** exponent
+                    unit = Unit(name, base.dimension, scale, base.offset)
+                    self._prefixed_units[name] = unit
+                    return unit
+
+        raise ValueError(f"Unknown unit: {name}")
+
+    def compile(self, from_unit, to_unit):
+        """Compile a conversion between two units into a cached Converter"""
+        key = (from_unit, to_unit)
+        converter = self._converters.get(key)
+        instrumentation.record_cache('units', converter is not None)
+        if converter is not None:
+            return converter
+
+        source = self.get_unit(from_unit)
+        target = self.get_unit(to_unit)
+        if source.dimension != target.dimension:
+            raise ValueError(f"Cannot convert {source.dimension} ({from_unit}) "
+                             f"to {target.dimension} ({to_unit})!")
+
+        # value * s1 + o1 = base = result * s2 + o2, solved exactly and
+        # rounded once so that e.g. 100 degC -> degF gives exactly 212
+        scale = Fraction(source.scale) / Fraction(target.scale)
+        offset = (Fraction(source.offset) - Fraction(target.offset)) / Fraction(target.scale)
+        converter = Converter(from_unit, to_unit, float(scale), float(offset))
+        self._converters[key] = converter
+        return converter
+
+    def convert(self, values, from_unit, to_unit):
+        """Convert a scalar, list or NumPy array between compatible units"""
+        return self.compile(from_unit, to_unit)(values)
+
+    def dimensions(self):
+        """Return a mapping of dimension -> sorted unit names"""
+        grouped = {}
+        for name, unit in self.units.items():
+            if name == unit.name:
+                grouped.setdefault(unit.dimension, []).append(name)
+        return {dimension: sorted(names) for dimension, names in sorted(grouped.items())}
+
+    def load_default_units(self):
+        """Register the built-in units"""
+        # Length (base: meter)
+        self.define('m', 'length', 1.0, aliases=('meter', 'meters'), prefixable=True)
+        self.define('in', 'length', 0.0254, aliases=('inch', 'inches'))
+        self.define('ft', 'length', 0.3048, aliases=('foot', 'feet'))
+        self.define('yd', 'length', 0.9144, aliases=('yard', 'yards'))
+        self.define('mi', 'length', 1609.344, aliases=('mile', 'miles'))
+        self.define('nmi', 'length', 1852.0, aliases=('nautical_mile',))
+
+        # Mass (base: kilogram, prefixes apply to gram)
+        self.define('g', 'mass', Fraction(1, 1000), aliases=('gram', 'grams'), prefixable=True)
+        self.define('t', 'mass', 1000.0, aliases=('tonne', 'tonnes'))
+        self.define('lb', 'mass', 0.45359237, aliases=('lbs', 'pound', 'pounds'))
+        self.define('oz', 'mass', 0.028349523125, aliases=('ounce', 'ounces'))
+        self.define('st', 'mass', 6.35029318, aliases=('stone',))
+
+        # Time (base: second)
+        self.define('s', 'time', 1.0, aliases=('sec', 'second', 'seconds'), prefixable=True)
+        self.define('min', 'time', 60.0, aliases=('minute', 'minutes'))
+        self.define('h', 'time', 3600.0, aliases=('hr', 'hour', 'hours'))
+        self.define('day', 'time', 86400.0, aliases=('days',))
+
+        # Temperature (base: kelvin) - affine units
+        self.define('K', 'temperature', 1.0, aliases=('kelvin',))
+        self.define('degC', 'temperature', 1, Fraction(27315, 100), aliases=('C', '°C', 'celsius'))
+        self.define('degF', 'temperature', Fraction(5, 9), Fraction(45967, 180),
+                    aliases=('F', '°F', 'fahrenheit'))
+        self.define('degR', 'temperature', Fraction(5, 9), aliases=('R', 'rankine'))
+
+        # Pressure (base: pascal)
+        self.define('Pa', 'pressure', 1.0, aliases=('pascal',), prefixable=True)
+        self.define('bar', 'pressure', 1e5, prefixable=True)
+        self.define('atm', 'pressure', 101325.0)
+        self.define('psi', 'pressure', 6894.757293168361)
+        self.define('mmHg', 'pressure', 133.322387415)
+
+        # Volume (base: cubic meter)
+        self.define('m3', 'volume', 1.0)
+        self.define('L', 'volume', Fraction(1, 1000), aliases=('l', 'liter', 'liters'), prefixable=True)
+        self.define('gal', 'volume', 3.785411784e-3, aliases=('gallon', 'gallons'))
+        self.define('floz', 'volume', 2.95735295625e-5)
+
+        # Energy (base: joule)
+        self.define('J', 'energy', 1.0, aliases=('joule',), prefixable=True)
+        self.define('cal', 'energy', 4.184, prefixable=True)
+        self.define('Wh', 'energy', 3600.0, prefixable=True)
+        self.define('BTU', 'energy', 1055.05585262)
+
+        # Speed (base: meter per second)
+        self.define('m/s', 'speed', 1.0)
+        self.define('km/h', 'speed', Fraction(1000, 3600), aliases=('kph',))
+        self.define('mph', 'speed', Fraction(1609344, 3600000))
+        self.define('kn', 'speed', Fraction(1852, 3600), aliases=('knot', 'knots'))
+
+
+# Shared registry used by the calculator
+default_registry = UnitRegistry()
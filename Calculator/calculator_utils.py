@@ -4,11 +4,143 @@ Calculator Utilities Module
 Contains utility functions for input validation, formatting, and display
 """
 
+import decimal
+import math
 import os
 import sys
 import re
 from datetime import datetime
 
+# Integers with more digits are shown as summaries; the digits are only
+# expanded on request (str() is quadratic and limited to 4300 digits)
+BIG_INT_DIGITS = 1000
+BIG_INT_BITS = int(BIG_INT_DIGITS / math.log10(2))
+
+# Below this many bits, Decimal(int) converts directly
+_DECIMAL_CHUNK_BITS = 1000
+
+
+def int_to_decimal_string(n):
+    """Decimal digits of an integer in sub-quadratic time, without the str() limit
+    
+    Splits the binary representation recursively and recombines the halves
+    as exact Decimals, whose multiplication is sub-quadratic.
+    """
+    with decimal.localcontext() as ctx:
+        ctx.prec = decimal.MAX_PREC
+        ctx.Emax = decimal.MAX_EMAX
+        ctx.Emin = decimal.MIN_EMIN
+        ctx.traps[decimal.Inexact] = True
+        powers = {}
+        
+        def power_of_two(bits):
+            result = powers.get(bits)
+            if result is None:
+                if bits <= _DECIMAL_CHUNK_BITS:
+                    result = decimal.Decimal(1 << bits)
+                else:
+                    half = power_of_two(bits >> 1)
+                    result = half * half
+                    if bits & 1:
+                        result *= 2
+                powers[bits] = result
+            return result
+        
+        def convert(value, bits):
+            if bits <= _DECIMAL_CHUNK_BITS:
+                return decimal.Decimal(value)
+            low_bits = bits >> 1
+            high = value >> low_bits
+            low = value - (high << low_bits)
+            return convert(low, low_bits) + convert(high, bits - low_bits) * power_of_two(low_bits)
+        
+        digits = format(convert(abs(n), n.bit_length()), 'f')
+    return '-' + digits if n < 0 else digits
+
+
+def _leading_digits(n, count, guard=20):
+    """Return (first ``count`` digits, total digit count) of a positive integer
+    
+    Multiplies the top bits of n by a rounded power of two in a Decimal
+    context just ``guard`` digits wider than needed. The result is only
+    trusted when the guard digits cannot hide a carry; otherwise the exact
+    (slower) integer computation is used.
+    """
+    shift = max(0, n.bit_length() - 4 * (count + 2 * guard))
+    if shift:
+        with decimal.localcontext() as ctx:
+            ctx.prec = count + guard
+            ctx.Emax = decimal.MAX_EMAX
+            ctx.Emin = decimal.MIN_EMIN
+            approx = decimal.Decimal(n >> shift) * decimal.Decimal(2) ** shift
+        sign, digit_tuple, exponent = approx.as_tuple()
+        guard_digits = set(digit_tuple[count:count + guard - 5])
+        if guard_digits != {0} and guard_digits != {9}:
+            total = len(digit_tuple) + exponent
+            return ''.join(map(str, digit_tuple[:count])), total
+    
+    # Exact: 2**(bits-1) <= n < 2**bits, so the count is one of two candidates
+    lower = int((n.bit_length() - 1) * math.log10(2)) + 1
+    total = lower + 1 if n >= 10 ** lower else lower
+    return str(n // 10 ** max(0, total - count)), total
+
+
+def count_digits(n):
+    """Number of decimal digits of an integer, without converting it"""
+    n = abs(n)
+    if n < 10:
+        return 1
+    return _leading_digits(n, 1)[1]
+
+
+def summarize_integer(n, leading_digits=15):
+    """Scientific summary with exact (truncated) leading digits and the digit count"""
+    if abs(n).bit_length() <= BIG_INT_BITS:
+        digits = str(abs(n))
+        if len(digits) <= leading_digits:
+            return str(n)
+        leading, total = digits[:leading_digits], len(digits)
+    else:
+        leading, total = _leading_digits(abs(n), leading_digits)
+    sign = '-' if n < 0 else ''
+    return f"{sign}{leading[0]}.{leading[1:]}…e+{total - 1} ({total:,} digits)"
+
+
+class LargeInteger:
+    """Huge integer result: a summary for display, full digits computed on request"""
+    
+    def __init__(self, value):
+        self.value = value
+        self._digits = None
+    
+    @property
+    def digit_count(self):
+        """Number of decimal digits"""
+        return count_digits(self.value)
+    
+    def summary(self, leading_digits=15):
+        """Scientific-notation summary"""
+        return summarize_integer(self.value, leading_digits)
+    
+    def expand(self):
+        """Full decimal expansion (computed once)"""
+        if self._digits is None:
+            self._digits = int_to_decimal_string(self.value)
+        return self._digits
+    
+    def __str__(self):
+        return self.summary()
+    
+    def __repr__(self):
+        return f"LargeInteger({self.summary()})"
+
+
+def is_large_integer(value):
+    """Whether an int is too big to render with str() directly"""
+    return (isinstance(value, int) and not isinstance(value, bool)
+            and value.bit_length() > BIG_INT_BITS)
+
+
 class Calculator_Utils:
     """Utility functions for the calculator"""
     
@@ -100,6 +232,10 @@ class Calculator_Utils:
         if decimal_places is None:
             decimal_places = self.decimal_places
         
+        # Huge integers would overflow float formatting (and str is quadratic)
+        if is_large_integer(number):
+            return summarize_integer(number, 4)
+        
         # Handle very large or very small numbers
         if abs(number) >= 1e6 or (abs(number) < 1e-3 and number != 0):
             return f"{number:.3e}"
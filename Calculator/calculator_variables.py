@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Calculator Variables Module
+Spreadsheet-style named variables: inputs (``r = 3``) and formulas that
+refer to other variables (``area = pi * r ** 2``).
+
+Every formula's references are kept as edges of a dependency graph. When a
+variable changes only the variables downstream of it are visited, in
+topological order, and a formula is re-evaluated only if one of its inputs
+actually changed value; everything else keeps its memoized value. Cycles
+are rejected when a formula is defined.
+"""
+
+import keyword
+from calculator_expressions import CONSTANTS, compile_scalar, parse, to_source, variables
+from calculator_registry import operation_registry
+
+
+def parse_assignment(line):
+    """Split ``name = formula`` into its parts"""
+    name, separator, formula = line.partition('=')
+    name = name.strip()
+    if not separator or not formula.strip():
+        raise ValueError("Use the form: name = formula")
+    validate_name(name)
+    return name, formula.strip()
+
+
+def validate_name(name):
+    """Reject names that cannot be used as variables"""
+    if not name.isidentifier() or keyword.iskeyword(name):
+        raise ValueError(f"Invalid variable name: {name}")
+    if name in CONSTANTS:
+        raise ValueError(f"{name} is a constant and cannot be redefined")
+
+
+class Cell:
+    """One variable: its formula, compiled evaluator and references"""
+
+    __slots__ = ('name', 'source', 'tree', 'dependencies', 'evaluate')
+
+    def __init__(self, name, source, tree, registry):
+        self.name = name
+        self.source = source
+        self.tree = tree
+        self.dependencies = frozenset(variables(tree) - set(CONSTANTS))
+        self.evaluate = compile_scalar(tree, registry)
+
+    @property
+    def is_input(self):
+        return self.tree[0] == 'const'
+
+    @property
+    def formula(self):
+        return self.source if self.source is not None else to_source(self.tree)
+
+
+class VariableSheet:
+    """Named variables and formulas with incremental recomputation"""
+
+    def __init__(self, registry=operation_registry):
+        self.registry = registry
+        self.cells = {}
+        self.values = {}
+        self.errors = {}
+        self.dependents = {}  # name -> names of the formulas referring to it
+        self.recomputed = 0  # Formulas evaluated by the last change
+
+    def __contains__(self, name):
+        return name in self.cells
+
+    def __len__(self):
+        return len(self.cells)
+
+    def names(self):
+        """Variable names in definition order"""
+        return list(self.cells)
+
+    def get(self, name):
+        """Current value of a variable (ValueError if it has none)"""
+        if name in self.errors:
+            raise ValueError(f"{name}: {self.errors[name]}")
+        if name not in self.values:
+            raise ValueError(f"Unknown variable: {name}")
+        return self.values[name]
+
+    def set(self, name, definition):
+        """Define or change a variable (a number or a formula); returns the names whose value changed"""
+        return self.update({name: definition})
+
+    def update(self, assignments):
+        """Apply several definitions, then recompute once; returns the names whose value changed"""
+        cells = {}
+        for name, definition in assignments.items():
+            validate_name(name)
+            if isinstance(definition, bool) or not isinstance(definition, (int, float, str)):
+                raise ValueError(f"{name} must be a number or a formula")
+            if isinstance(definition, str):
+                source, tree = definition.strip(), parse(definition, self.registry)
+            else:
+                source, tree = None, ('const', definition)
+            cells[name] = Cell(name, source, tree, self.registry)
+
+        previous = {name: self.cells.get(name) for name in cells}
+        self._replace(cells)
+        try:
+            # The old graph was acyclic, so any cycle runs through a new formula
+            order = self._downstream_order(cells)
+        except ValueError:
+            self._replace(previous)
+            raise
+        return self._recalculate(cells, order)
+
+    def remove(self, name):
+        """Delete a variable; formulas that used it report an error; returns the changed names"""
+        if name not in self.cells:
+            raise ValueError(f"Unknown variable: {name}")
+        self._unlink(name)
+        del self.cells[name]
+        self.values.pop(name, None)
+        self.errors.pop(name, None)
+        dependents = self.dependents.get(name, ())
+        return [name] + self._recalculate(dependents, self._downstream_order(dependents))
+
+    def _replace(self, cells):
+        """Install cells (None removes one), keeping the dependency edges in step"""
+        for name, cell in cells.items():
+            self._unlink(name)
+            if cell is None:
+                self.cells.pop(name, None)
+                if not self.dependents.get(name):
+                    self.dependents.pop(name, None)
+                continue
+            self.cells[name] = cell
+            for dependency in cell.dependencies:
+                self.dependents.setdefault(dependency, set()).add(name)
+
+    def _unlink(self, name):
+        """Drop the dependency edges of a variable's current formula"""
+        old = self.cells.get(name)
+        if old is None:
+            return
+        for dependency in old.dependencies:
+            dependents = self.dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(name)
+                if not dependents and dependency not in self.cells:
+                    del self.dependents[dependency]
+
+    def _downstream_order(self, roots):
+        """The roots and everything depending on them, in topological order
+
+        Iterative depth-first search; reaching a variable that is still on
+        the search path means a circular reference (ValueError).
+        """
+        order = []
+        visited = set()
+        on_path = set()
+        dependents = self.dependents
+        for root in roots:
+            if root in visited:
+                continue
+            visited.add(root)
+            on_path.add(root)
+            stack = [(root, iter(dependents.get(root, ())))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if child in on_path:
+                        raise ValueError(f"Circular reference: {child} depends on itself")
+                    if child not in visited:
+                        visited.add(child)
+                        on_path.add(child)
+                        stack.append((child, iter(dependents.get(child, ()))))
+                        break
+                else:
+                    stack.pop()
+                    on_path.discard(node)
+                    order.append(node)
+        order.reverse()
+        return order
+
+    def _evaluate(self, cell):
+        """Compute a cell's value or error from the current values of its inputs"""
+        name = cell.name
+        self.values.pop(name, None)
+        self.errors.pop(name, None)
+        for dependency in cell.dependencies:
+            if dependency in self.errors:
+                self.errors[name] = f"depends on {dependency}, which has an error"
+                return
+            if dependency not in self.values:
+                self.errors[name] = f"Unknown variable: {dependency}"
+                return
+        try:
+            self.values[name] = cell.evaluate(self.values)
+        except (ValueError, TypeError, ZeroDivisionError, OverflowError) as e:
+            self.errors[name] = str(e)
+
+    def _recalculate(self, dirty, order):
+        """Recompute dirty cells and, where a value changed, their dependents"""
+        dirty = set(dirty)
+        changed = []
+        self.recomputed = 0
+        missing = object()
+        for name in order:
+            if name not in dirty:
+                continue  # No input of this formula changed: memoized value stands
+            cell = self.cells.get(name)
+            if cell is None:
+                continue
+            before = (self.values.get(name, missing), self.errors.get(name))
+            self._evaluate(cell)
+            self.recomputed += 1
+            after = (self.values.get(name, missing), self.errors.get(name))
+            if after != before or type(after[0]) is not type(before[0]):
+                changed.append(name)
+                dirty.update(self.dependents.get(name, ()))
+        return changed
+
+    def describe(self, name):
+        """One display line: name = formula -> value"""
+        cell = self.cells[name]
+        if name in self.errors:
+            result = f"❌ {self.errors[name]}"
+        else:
+            result = self.values[name]
+        if cell.is_input:
+            return f"{name} = {result}"
+        return f"{name} = {cell.formula} → {result}"
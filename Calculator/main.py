@@ -4,18 +4,67 @@ Complex Calculator - Main Program
 Day 3 Project - Enhanced Calculator with Multiple Files
 """
 
-from calculator_operations import BasicOperations, AdvancedOperations
-from calculator_utils import Calculator_Utils
+from calculator_utils import Calculator_Utils, LargeInteger, is_large_integer
 from calculator_history import CalculatorHistory
+from calculator_units import default_registry
+from calculator_profiler import instrumentation
+from calculator_registry import operation_registry
+from datetime import datetime
+import os
 import sys
 
+# The cache, dataset, variable, batch and simulation modules (and NumPy,
+# sqlite3 and multiprocessing through them) are imported when their menu
+# entry is first chosen, so the menu appears without loading them.
+
 class ComplexCalculator:
+    # Main menu numbers that run a single registered operation
+    MENU_OPERATIONS = {
+        1: 'add',
+        2: 'subtract',
+        3: 'multiply',
+        4: 'divide',
+        5: 'modulus',
+        6: 'integer_divide',
+        7: 'power',
+        8: 'square_root',
+        9: 'factorial',
+        10: 'logarithm'
+    }
+    
+    # Main menu numbers that open a sub-menu: (label, method name)
+    MENU_SUBMENUS = {
+        11: ("Sin, Cos, Tan", 'trigonometric_menu'),
+        12: ("Area Calculator", 'area_calculator_menu'),
+        13: ("Unit Converter", 'unit_converter_menu'),
+        14: ("Statistics", 'statistics_menu'),
+        15: ("Financial Calculator", 'financial_menu')
+    }
+    
     def __init__(self):
-        self.basic_ops = BasicOperations()
-        self.advanced_ops = AdvancedOperations()
+        self.basic_ops = operation_registry.load_group('basic')
+        self.advanced_ops = operation_registry.load_group('advanced')
         self.utils = Calculator_Utils()
-        self.history = CalculatorHistory()
+        self.history = CalculatorHistory(segment_dir=os.environ.get('CALCULATOR_SEGMENT_DIR'),
+                                         archive_file=os.environ.get('CALCULATOR_ARCHIVE_FILE'))
         self.running = True
+        self.last_large_result = None
+        self._variables = None
+        
+        # Menu number -> action, so dispatch is a single dict lookup
+        self.menu_actions = {}
+        for number, name in self.MENU_OPERATIONS.items():
+            self.menu_actions[number] = lambda name=name: self.execute_operation(name)
+        for number, (label, method_name) in self.MENU_SUBMENUS.items():
+            self.menu_actions[number] = getattr(self, method_name)
+    
+    @property
+    def variables(self):
+        """Variable sheet shared by 'vars' and 'batch' (created on first use)"""
+        if self._variables is None:
+            from calculator_variables import VariableSheet
+            self._variables = VariableSheet()
+        return self._variables
     
     def display_welcome(self):
         """Display welcome message and menu"""
@@ -25,25 +74,29 @@ class ComplexCalculator:
         print("=" * 60)
         print("\n📋 AVAILABLE OPERATIONS:")
         print("\n🔢 Basic Operations:")
-        print("  1. Addition (+)")
-        print("  2. Subtraction (-)")
-        print("  3. Multiplication (*)")
-        print("  4. Division (/)")
-        print("  5. Modulus (%)")
-        print("  6. Integer Division (//)")
+        for number in range(1, 7):
+            print(f"  {number}. {operation_registry.get(self.MENU_OPERATIONS[number]).label}")
         
         print("\n🧠 Advanced Operations:")
-        print("  7. Power (**)")
-        print("  8. Square Root (sqrt)")
-        print("  9. Factorial (!)")
-        print("  10. Logarithm (log)")
-        print("  11. Sin, Cos, Tan")
-        print("  12. Area Calculator")
-        print("  13. Unit Converter")
+        for number in range(7, 11):
+            print(f"  {number}. {operation_registry.get(self.MENU_OPERATIONS[number]).label}")
+        for number in range(11, 14):
+            print(f"  {number}. {self.MENU_SUBMENUS[number][0]}")
+        
+        print("\n📈 Data & Finance:")
+        for number in range(14, 16):
+            print(f"  {number}. {self.MENU_SUBMENUS[number][0]}")
         
         print("\n📊 Utility Options:")
         print("  h. Show History")
         print("  c. Clear History")
+        print("  stats. Show Performance Stats")
+        print("  digits. Show All Digits of the Last Huge Result")
+        print("  data. Evaluate a Formula over a CSV File")
+        print("  vars. Variables and Formulas (e.g. area = pi * r ** 2)")
+        print("  batch. Evaluate Several Formulas Together")
+        print("  sim. Monte Carlo Simulation of Interest or Returns")
+        print("  poly. Polynomial Value and Roots")
         print("  help. Show Help")
         print("  q. Quit")
         print("-" * 60)
@@ -61,198 +114,286 @@ class ComplexCalculator:
                 return 'clear'
             elif choice == 'help':
                 return 'help'
-            elif choice.isdigit() and 1 <= int(choice) <= 13:
+            elif choice == 'stats':
+                return 'stats'
+            elif choice == 'digits':
+                return 'digits'
+            elif choice in ['data', 'dataset']:
+                return 'dataset'
+            elif choice in ['vars', 'variables']:
+                return 'variables'
+            elif choice == 'batch':
+                return 'batch'
+            elif choice in ['sim', 'simulate']:
+                return 'simulate'
+            elif choice in ['poly', 'polynomial']:
+                return 'polynomial'
+            elif choice.isdigit() and int(choice) in self.menu_actions:
                 return int(choice)
             else:
                 print("❌ Invalid choice! Please try again.")
     
-    def execute_basic_operation(self, choice):
-        """Execute basic arithmetic operations"""
-        operations = {
-            1: ('+', self.basic_ops.add),
-            2: ('-', self.basic_ops.subtract),
-            3: ('*', self.basic_ops.multiply),
-            4: ('/', self.basic_ops.divide),
-            5: ('%', self.basic_ops.modulus),
-            6: ('//', self.basic_ops.integer_divide)
-        }
-        
-        if choice in operations:
-            symbol, operation = operations[choice]
-            num1 = self.utils.get_number("Enter first number: ")
-            num2 = self.utils.get_number("Enter second number: ")
-            
-            try:
-                result = operation(num1, num2)
-                calculation = f"{num1} {symbol} {num2} = {result}"
-                print(f"\n✅ Result: {calculation}")
-                self.history.add_calculation(calculation)
-                return True
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                return False
+    def read_operands(self, spec):
+        """Prompt for the operands of a registered operation"""
+        operands = []
+        for index, prompt in enumerate(spec.prompts):
+            # A series is a list of numbers followed by plain number parameters
+            if spec.input_kind == 'numbers' or (spec.input_kind == 'series' and not operands):
+                operands.append(self.utils.get_multiple_numbers(prompt))
+            elif spec.input_kind == 'integer':
+                operands.append(int(self.utils.get_number(prompt)))
+            else:
+                number = self.utils.get_number(prompt)
+                default = spec.defaults.get(index)
+                operands.append(default if default is not None and not number else number)
+        return operands
     
-    def execute_advanced_operation(self, choice):
-        """Execute advanced mathematical operations"""
+    def execute_operation(self, name, operands=None, unit=None):
+        """Run a registered operation, prompting for operands if none are given"""
+        spec = operation_registry.get(name)
+        if operands is None:
+            operands = self.read_operands(spec)
+        
         try:
-            if choice == 7:  # Power
-                base = self.utils.get_number("Enter base: ")
-                exponent = self.utils.get_number("Enter exponent: ")
-                result = self.advanced_ops.power(base, exponent)
-                calculation = f"{base} ** {exponent} = {result}"
-                
-            elif choice == 8:  # Square Root
-                num = self.utils.get_number("Enter number: ")
-                result = self.advanced_ops.square_root(num)
-                calculation = f"√{num} = {result}"
-                
-            elif choice == 9:  # Factorial
-                num = int(self.utils.get_number("Enter positive integer: "))
-                result = self.advanced_ops.factorial(num)
-                calculation = f"{num}! = {result}"
-                
-            elif choice == 10:  # Logarithm
-                num = self.utils.get_number("Enter number: ")
-                base = self.utils.get_number("Enter base (default 10): ") or 10
-                result = self.advanced_ops.logarithm(num, base)
-                calculation = f"log_{base}({num}) = {result}"
-                
-            elif choice == 11:  # Trigonometric
-                self.trigonometric_menu()
-                return True
-                
-            elif choice == 12:  # Area Calculator
-                self.area_calculator_menu()
-                return True
-                
-            elif choice == 13:  # Unit Converter
-                self.unit_converter_menu()
-                return True
-            
-            print(f"\n✅ Result: {calculation}")
-            self.history.add_calculation(calculation)
-            return True
-            
+            result = operation_registry.call(name, *operands)
         except Exception as e:
             print(f"❌ Error: {e}")
             return False
+        
+        self.record_result(name, operands, result, unit=unit or spec.unit,
+                           operation_type=spec.operation_type)
+        return True
     
-    def trigonometric_menu(self):
-        """Handle trigonometric operations"""
-        print("\n📐 Trigonometric Functions:")
-        print("1. Sin    2. Cos    3. Tan")
+    def operation_menu(self, title, options):
+        """Show a sub-menu of registered operations and run the chosen one"""
+        print(f"\n{title}")
+        print("   ".join(f"{key}. {operation_registry.get(name).label}"
+                         for key, name in options.items()))
         
-        choice = input("Choose function (1-3): ").strip()
-        if choice not in ['1', '2', '3']:
+        choice = input(f"Choose (1-{len(options)}): ").strip()
+        if choice not in options:
             print("❌ Invalid choice!")
             return
         
-        angle = self.utils.get_number("Enter angle in degrees: ")
-        
-        functions = {
-            '1': ('sin', self.advanced_ops.sine),
-            '2': ('cos', self.advanced_ops.cosine),
-            '3': ('tan', self.advanced_ops.tangent)
-        }
-        
-        func_name, func = functions[choice]
-        result = func(angle)
-        calculation = f"{func_name}({angle}°) = {result}"
-        
-        print(f"\n✅ Result: {calculation}")
-        self.history.add_calculation(calculation)
+        self.execute_operation(options[choice])
+    
+    def trigonometric_menu(self):
+        """Handle trigonometric operations"""
+        self.operation_menu("📐 Trigonometric Functions:",
+                            {'1': 'sine', '2': 'cosine', '3': 'tangent'})
     
     def area_calculator_menu(self):
         """Handle area calculations"""
-        print("\n📏 Area Calculator:")
-        print("1. Rectangle   2. Circle   3. Triangle")
-        
-        choice = input("Choose shape (1-3): ").strip()
-        
-        if choice == '1':  # Rectangle
-            length = self.utils.get_number("Enter length: ")
-            width = self.utils.get_number("Enter width: ")
-            result = self.advanced_ops.rectangle_area(length, width)
-            calculation = f"Rectangle Area: {length} × {width} = {result}"
-            
-        elif choice == '2':  # Circle
-            radius = self.utils.get_number("Enter radius: ")
-            result = self.advanced_ops.circle_area(radius)
-            calculation = f"Circle Area: π × {radius}² = {result}"
-            
-        elif choice == '3':  # Triangle
-            base = self.utils.get_number("Enter base: ")
-            height = self.utils.get_number("Enter height: ")
-            result = self.advanced_ops.triangle_area(base, height)
-            calculation = f"Triangle Area: ½ × {base} × {height} = {result}"
-            
-        else:
-            print("❌ Invalid choice!")
-            return
-        
-        print(f"\n✅ Result: {calculation}")
-        self.history.add_calculation(calculation)
+        self.operation_menu("📏 Area Calculator:",
+                            {'1': 'rectangle_area', '2': 'circle_area', '3': 'triangle_area'})
+    
+    def statistics_menu(self):
+        """Handle statistical operations"""
+        self.operation_menu("📈 Statistics:",
+                            {'1': 'mean', '2': 'median', '3': 'mode',
+                             '4': 'standard_deviation', '5': 'range_calc',
+                             '6': 'moving_average', '7': 'moving_standard_deviation',
+                             '8': 'moving_min', '9': 'moving_max',
+                             '10': 'exponential_moving_average', '11': 'covariance',
+                             '12': 'correlation', '13': 'spearman_correlation',
+                             '14': 'linear_regression'})
+    
+    def financial_menu(self):
+        """Handle financial calculations"""
+        self.operation_menu("💰 Financial Calculator:",
+                            {'1': 'simple_interest', '2': 'compound_interest',
+                             '3': 'percentage_change', '4': 'tip_calculator',
+                             '5': 'compound_interest_rate'})
+    
+    def polynomial_menu(self):
+        """Handle polynomial evaluation and root finding"""
+        self.operation_menu("📉 Polynomials:",
+                            {'1': 'polynomial_evaluate', '2': 'polynomial_roots'})
     
     def unit_converter_menu(self):
         """Handle unit conversions"""
+        conversions = {
+            '1': ("Temperature", {'a': 'celsius_to_fahrenheit', 'b': 'fahrenheit_to_celsius'}),
+            '2': ("Length", {'a': 'meters_to_feet', 'b': 'feet_to_meters'}),
+            '3': ("Weight", {'a': 'kg_to_pounds', 'b': 'pounds_to_kg'})
+        }
+        
         print("\n🔄 Unit Converter:")
-        print("1. Temperature   2. Length   3. Weight")
+        print("1. Temperature   2. Length   3. Weight   4. Other Units")
         
-        choice = input("Choose conversion type (1-3): ").strip()
+        choice = input("Choose conversion type (1-4): ").strip()
         
-        if choice == '1':  # Temperature
-            print("a. Celsius to Fahrenheit   b. Fahrenheit to Celsius")
-            temp_choice = input("Choose (a/b): ").strip().lower()
+        if choice in conversions:
+            label, options = conversions[choice]
+            print("   ".join(f"{key}. {operation_registry.get(name).label}"
+                             for key, name in options.items()))
+            sub_choice = input("Choose (a/b): ").strip().lower()
             
-            if temp_choice == 'a':
-                celsius = self.utils.get_number("Enter temperature in Celsius: ")
-                result = self.advanced_ops.celsius_to_fahrenheit(celsius)
-                calculation = f"{celsius}°C = {result}°F"
-            elif temp_choice == 'b':
-                fahrenheit = self.utils.get_number("Enter temperature in Fahrenheit: ")
-                result = self.advanced_ops.fahrenheit_to_celsius(fahrenheit)
-                calculation = f"{fahrenheit}°F = {result}°C"
-            else:
+            if sub_choice not in options:
                 print("❌ Invalid choice!")
                 return
+            self.execute_operation(options[sub_choice])
                 
-        elif choice == '2':  # Length
-            print("a. Meters to Feet   b. Feet to Meters")
-            length_choice = input("Choose (a/b): ").strip().lower()
+        elif choice == '4':  # Any registered units
+            for dimension, units in default_registry.dimensions().items():
+                print(f"  {dimension.title()}: {', '.join(units)}")
+            print("💡 SI prefixes work on metric units (e.g. kPa, mm, kWh)")
             
-            if length_choice == 'a':
-                meters = self.utils.get_number("Enter length in meters: ")
-                result = self.advanced_ops.meters_to_feet(meters)
-                calculation = f"{meters}m = {result}ft"
-            elif length_choice == 'b':
-                feet = self.utils.get_number("Enter length in feet: ")
-                result = self.advanced_ops.feet_to_meters(feet)
-                calculation = f"{feet}ft = {result}m"
-            else:
-                print("❌ Invalid choice!")
+            from_unit = input("Convert from unit: ").strip()
+            to_unit = input("Convert to unit: ").strip()
+            value = self.utils.get_number(f"Enter value in {from_unit}: ")
+            self.execute_operation('convert_units', (value, from_unit, to_unit), unit=to_unit)
+        else:
+            print("❌ Invalid choice!")
+    
+    def record_result(self, operation, operands, result, unit=None, operation_type='basic'):
+        """Store a structured result in history and show it"""
+        entry = self.history.add_record(operation, operands, result, unit=unit,
+                                        operation_type=operation_type)
+        print(f"\n✅ Result: {self.history.format_calculation(entry)}")
+        if is_large_integer(result):
+            self.last_large_result = LargeInteger(result)
+            print("💡 Type 'digits' to see every digit.")
+    
+    def show_all_digits(self, max_print_digits=10_000):
+        """Expand the last huge integer result (saved to a file if very long)"""
+        if self.last_large_result is None:
+            print("\n📝 No huge result to expand yet!")
+            return
+        
+        digits = self.last_large_result.expand()
+        if len(digits) <= max_print_digits:
+            print(f"\n🔢 {digits}")
+            return
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"calculator_result_{timestamp}.txt"
+        try:
+            with open(filename, 'w') as f:
+                f.write(digits + "\n")
+            print(f"✅ Saved {len(digits):,} digits to {filename}")
+        except Exception as e:
+            print(f"❌ Could not save digits: {e}")
+    
+    def evaluate_dataset(self):
+        """Apply a formula to every row of a CSV file"""
+        input_path = input("CSV file: ").strip()
+        if not os.path.exists(input_path):
+            print(f"❌ File not found: {input_path}")
+            return
+        formula = input("Formula over the column names (e.g. price * qty): ").strip()
+        default_output = os.path.splitext(input_path)[0] + "_result.csv"
+        output_path = input(f"Output file (default {default_output}): ").strip() or default_output
+        
+        from calculator_dataset import DatasetEvaluator
+        try:
+            stats = DatasetEvaluator(formula).evaluate_file(input_path, output_path)
+        except (OSError, ValueError) as e:
+            print(f"❌ Evaluation failed: {e}")
+            return
+        
+        print(f"✅ Evaluated {stats['rows']:,} rows into {output_path} "
+              f"in {stats['seconds']:.2f}s ({stats['rows_per_second'] or 0:,.0f} rows/s)")
+        if stats['errors']:
+            print(f"⚠️  {stats['errors']:,} rows could not be evaluated (left empty)")
+    
+    def variables_menu(self):
+        """Define variables and formulas; dependents update automatically"""
+        print("\n📐 VARIABLES")
+        print("Enter 'name = value or formula', 'del name', 'list' or an empty line to return.")
+        while True:
+            line = input("📐 ").strip()
+            if not line:
                 return
-                
-        elif choice == '3':  # Weight
-            print("a. Kg to Pounds   b. Pounds to Kg")
-            weight_choice = input("Choose (a/b): ").strip().lower()
+            from calculator_variables import parse_assignment
+            try:
+                if line == 'list':
+                    if not len(self.variables):
+                        print("📝 No variables defined yet!")
+                    for name in self.variables.names():
+                        print(f"  {self.variables.describe(name)}")
+                    continue
+                if line.startswith('del '):
+                    changed = self.variables.remove(line[4:].strip())
+                else:
+                    name, formula = parse_assignment(line)
+                    try:
+                        definition = float(formula)
+                    except ValueError:
+                        definition = formula
+                    changed = self.variables.set(name, definition)
+            except ValueError as e:
+                print(f"❌ Error: {e}")
+                continue
             
-            if weight_choice == 'a':
-                kg = self.utils.get_number("Enter weight in kg: ")
-                result = self.advanced_ops.kg_to_pounds(kg)
-                calculation = f"{kg}kg = {result}lbs"
-            elif weight_choice == 'b':
-                pounds = self.utils.get_number("Enter weight in pounds: ")
-                result = self.advanced_ops.pounds_to_kg(pounds)
-                calculation = f"{pounds}lbs = {result}kg"
+            for name in changed:
+                if name in self.variables:
+                    print(f"  ✅ {self.variables.describe(name)}")
+            print(f"  🔁 {self.variables.recomputed} formula(s) recomputed")
+    
+    def evaluate_batch(self):
+        """Evaluate several formulas at once, sharing common subexpressions"""
+        print("\n📦 Enter one formula per line (variables from 'vars' can be used),")
+        print("an empty line to evaluate:")
+        formulas = []
+        while True:
+            line = input(f"  {len(formulas) + 1}> ").strip()
+            if not line:
+                break
+            formulas.append(line)
+        if not formulas:
+            return
+        
+        from calculator_optimizer import OptimizedBatch
+        bound = set(self.variables.values)
+        try:
+            batch = OptimizedBatch(formulas, bound=bound)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            return
+        results, errors = batch.evaluate(self.variables.values)
+        
+        for index, formula in enumerate(formulas):
+            if index in errors:
+                print(f"  ❌ {formula}: {errors[index]}")
             else:
-                print("❌ Invalid choice!")
-                return
-        else:
+                print(f"  ✅ {formula} = {self.utils.format_number(results[index])}")
+        report = batch.report()
+        print(f"\n⚡ {report['parsed_nodes']} nodes → {report['distinct_nodes']} evaluated "
+              f"({report['folded_away']} folded, {report['shared_away']} shared)")
+    
+    def simulate_financial(self):
+        """Distribution of compound interest or percentage change under random rates"""
+        from calculator_simulation import (CompoundGrowthModel, PercentageChangeModel,
+                                           MonteCarloSimulation, print_report)
+        print("\n🎲 Monte Carlo Simulation:")
+        print("1. Compound Interest (random yearly rate)   2. Percentage Change (random returns)")
+        choice = input("Choose (1-2): ").strip()
+        if choice not in ['1', '2']:
             print("❌ Invalid choice!")
             return
         
-        print(f"\n✅ Result: {calculation}")
-        self.history.add_calculation(calculation)
+        try:
+            if choice == '1':
+                model = CompoundGrowthModel(
+                    self.utils.get_number("Enter principal: "),
+                    self.utils.get_number("Enter mean rate (%): "),
+                    self.utils.get_number("Enter rate volatility (%): "),
+                    self.utils.get_number("Enter time (years): "),
+                    self.utils.get_number("Enter compounds per year: "))
+            else:
+                model = PercentageChangeModel(
+                    self.utils.get_number("Enter initial value: "),
+                    self.utils.get_number("Enter mean return per period (%): "),
+                    self.utils.get_number("Enter return volatility (%): "),
+                    int(self.utils.get_number("Enter number of periods: ")))
+            paths = int(self.utils.get_number("Enter number of paths: "))
+            workers = int(self.utils.get_number(f"Enter worker processes (1-{os.cpu_count()}): "))
+            result = MonteCarloSimulation(model, paths, workers=workers).run()
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            return
+        print_report(result, model.expected())
     
     def run(self):
         """Main calculator loop"""
@@ -261,6 +402,7 @@ class ComplexCalculator:
         while self.running:
             try:
                 choice = self.get_menu_choice()
+                instrumentation.count(f"menu.{choice}")
                 
                 if choice == 'quit':
                     self.quit_calculator()
@@ -271,10 +413,22 @@ class ComplexCalculator:
                     print("🗑️ History cleared!")
                 elif choice == 'help':
                     self.display_welcome()
-                elif 1 <= choice <= 6:
-                    self.execute_basic_operation(choice)
-                elif 7 <= choice <= 13:
-                    self.execute_advanced_operation(choice)
+                elif choice == 'stats':
+                    self.show_performance_stats()
+                elif choice == 'digits':
+                    self.show_all_digits()
+                elif choice == 'dataset':
+                    self.evaluate_dataset()
+                elif choice == 'variables':
+                    self.variables_menu()
+                elif choice == 'batch':
+                    self.evaluate_batch()
+                elif choice == 'simulate':
+                    self.simulate_financial()
+                elif choice == 'polynomial':
+                    self.polynomial_menu()
+                elif choice in self.menu_actions:
+                    self.menu_actions[choice]()
                 
                 # Ask if user wants to continue
                 if choice not in ['quit', 'help']:
@@ -289,6 +443,26 @@ class ComplexCalculator:
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
     
+    def show_performance_stats(self):
+        """Show instrumentation data and offer to export it"""
+        instrumentation.show_stats()
+        if not instrumentation.enabled:
+            return
+        
+        print("\n📤 Export: 1. JSON   2. Prometheus   3. Skip")
+        choice = input("Choose (1-3): ").strip()
+        formats = {'1': ('json', 'json'), '2': ('prometheus', 'prom')}
+        
+        if choice in formats:
+            fmt, extension = formats[choice]
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"calculator_stats_{timestamp}.{extension}"
+            try:
+                instrumentation.export(filename, fmt)
+                print(f"✅ Statistics exported to {filename}")
+            except Exception as e:
+                print(f"❌ Export failed: {e}")
+    
     def quit_calculator(self):
         """Exit the calculator"""
         print("\n" + "=" * 60)
@@ -300,6 +474,12 @@ class ComplexCalculator:
 
 def main():
     """Main function to run the calculator"""
+    if '--profile' in sys.argv[1:]:
+        instrumentation.enable()
+    cache_file = os.environ.get('CALCULATOR_CACHE_FILE')
+    if cache_file or '--cache' in sys.argv[1:]:
+        from calculator_cache import ResultCache, DEFAULT_CACHE_FILE
+        operation_registry.enable_cache(ResultCache(cache_file or DEFAULT_CACHE_FILE))
     calculator = ComplexCalculator()
     calculator.run()
 
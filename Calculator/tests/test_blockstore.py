@@ -0,0 +1,67 @@
+"""Compressed block archive (calculator_blockstore)"""
+
+import json
+import os
+
+import pytest
+
+from calculator_blockstore import BlockHistoryReader, append_to_block_file, write_block_file
+from calculator_history import CalculatorHistory
+
+
+def _entries(first, last):
+    return [{'id': i, 'timestamp': f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}",
+             'calculation': f"{i} + 0 = {i}"} for i in range(first, last + 1)]
+
+
+def test_appends_add_only_their_own_index(tmp_path):
+    path = str(tmp_path / "archive.blk")
+    write_block_file(path, _entries(1, 100), block_size=10)
+    growth = []
+    for start in range(101, 1001, 100):
+        size = os.path.getsize(path)
+        append_to_block_file(path, _entries(start, start + 99), block_size=10)
+        growth.append(os.path.getsize(path) - size)
+
+    reader = BlockHistoryReader(path)
+    assert [entry['id'] for entry in reader] == list(range(1, 1001))
+    assert reader.get_by_id(777)['calculation'] == "777 + 0 = 777"
+    assert max(growth) - min(growth) < 0.1 * min(growth)  # Not growing with the archive
+
+
+def test_torn_append_falls_back_to_previous_footer(tmp_path):
+    path = str(tmp_path / "archive.blk")
+    write_block_file(path, _entries(1, 50))
+    append_to_block_file(path, _entries(51, 100))
+    with open(path, 'ab') as f:  # A crash part way through the next append
+        f.write(b"\x78\x9c partial block" + json.dumps({'codec': 'zlib'}).encode()[:7])
+
+    reader = BlockHistoryReader(path)
+    assert len(reader) == 100
+    assert reader.get_by_id(100)['id'] == 100
+
+    append_to_block_file(path, _entries(101, 150))
+    reader = BlockHistoryReader(path)
+    assert [entry['id'] for entry in reader] == list(range(1, 151))
+
+
+def test_appended_ids_must_increase(tmp_path):
+    path = str(tmp_path / "archive.blk")
+    write_block_file(path, _entries(1, 10))
+    with pytest.raises(ValueError):
+        append_to_block_file(path, _entries(12, 12) + _entries(11, 11))
+
+
+def test_repeated_legacy_ids_are_renumbered(tmp_path):
+    # Old history files numbered entries len() + 1, repeating ids after undo or the cap
+    path = tmp_path / "history.json"
+    legacy = [{'id': calc_id, 'calculation': f"calc {index}", 'result': index,
+               'operation_type': 'basic', 'timestamp': f"2025-01-01T00:00:{index:02d}",
+               'session_id': "2025-01-01T00:00:00"}
+              for index, calc_id in enumerate([1, 2, 3, 3, 3, 2])]
+    path.write_text(json.dumps({'calculations': legacy}))
+
+    history = CalculatorHistory(str(path))
+    assert [entry['id'] for entry in history.calculations] == [1, 2, 3, 4, 5, 6]
+    assert history.get_calculation_by_id(5)['calculation'] == "calc 4"
+    assert history.add_record('add', (1, 1), 2)['id'] == 7
@@ -0,0 +1,86 @@
+"""Compiled formulas agree with the interpreted ones (calculator_codegen)"""
+
+import math
+
+import pytest
+
+from calculator_codegen import compile_formula
+from calculator_dataset import DatasetEvaluator
+from calculator_expressions import Expression
+
+FORMULAS = [
+    "a + b - c * a", "a / b", "a % b", "a // b", "a ** b", "-a + -(b * c)",
+    "sqrt(a * a + b * b) / c", "log(a)", "log(a, 2)", "ln(a) + log(b, e)",
+    "sin(a) + cos(b) * tan(c)", "factorial(c)", "power(a, c) - percentage_change(a, b)",
+    "pi * a ** 2", "(a + b) * (a + b) / (a + b)",
+    # Folded constants: overflow, NaN and negative literals
+    "1e308 * 10 + a", "1e308 * 10 - 1e308 * 10 + a", "-3 * a % -2 + 2 ** -1", "a - -0.5",
+]
+
+ENVIRONMENTS = [
+    {'a': 3.0, 'b': 4.0, 'c': 2},
+    {'a': -2.5, 'b': 0.5, 'c': 5},
+    # Error paths: zero divisors, negative square roots and logarithms
+    {'a': 0.0, 'b': 0.0, 'c': 0},
+    {'a': -1.0, 'b': -4.0, 'c': -3},
+]
+
+
+def _outcome(function, env):
+    try:
+        return 'value', function(env)
+    except (ValueError, ZeroDivisionError, OverflowError, TypeError) as e:
+        return type(e).__name__, str(e)
+
+
+def _same(compiled, interpreted):
+    if compiled[0] != 'value' or interpreted[0] != 'value':
+        return compiled == interpreted
+    x, y = compiled[1], interpreted[1]
+    if isinstance(x, float) and isinstance(y, float) and math.isnan(x) and math.isnan(y):
+        return True
+    return x == y or x == pytest.approx(y, rel=1e-12)
+
+
+@pytest.mark.parametrize('formula', FORMULAS)
+@pytest.mark.parametrize('env', ENVIRONMENTS, ids=['plain', 'negative', 'zeros', 'domain'])
+def test_compiled_matches_interpreted(formula, env):
+    compiled = _outcome(compile_formula(formula), env)
+    interpreted = _outcome(Expression(formula).evaluate, env)
+    assert _same(compiled, interpreted), (compiled, interpreted)
+
+
+def test_folded_non_finite_constants_are_bound():
+    assert compile_formula("1e308 * 10 + x")({'x': 1.0}) == math.inf
+    assert math.isnan(compile_formula("1e308 * 10 - 1e308 * 10 + x")({'x': 1.0}))
+    assert "inf" not in compile_formula("1e308 * 10 + x").source_code
+
+
+def test_divide_checks_are_inlined():
+    source = compile_formula("a / b").source_code
+    assert 'if v_b == 0: raise ValueError("Cannot divide by zero!")' in source
+    with pytest.raises(ValueError, match="Cannot divide by zero!"):
+        compile_formula("a / b")({'a': 1.0, 'b': 0})
+
+
+def test_missing_variables_are_named():
+    with pytest.raises(ValueError, match="Unknown variable: y"):
+        compile_formula("pi + y", bound={'pi'})({})
+    assert compile_formula("pi + y", bound={'pi'})({'y': 1.0}) == pytest.approx(math.pi + 1)
+    assert compile_formula("pi + y", bound={'pi'})({'pi': 3.0, 'y': 1.0}) == 4.0
+
+
+def test_compiled_formulas_are_cached():
+    first = compile_formula("a * b + 1")
+    assert compile_formula("  a * b + 1 ") is first
+    assert compile_formula("a * b + 1", bound={'e'}) is not first
+
+
+def test_dataset_with_overflowing_constant(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("x\n1\n2\n")
+    output = tmp_path / "out.csv"
+    stats = DatasetEvaluator("1e308 * 10 + x", use_numpy=False, compiled=True).evaluate_file(
+        str(source), str(output))
+    assert stats['errors'] == 0
+    assert output.read_text().splitlines() == ['result', 'inf', 'inf']
@@ -0,0 +1,26 @@
+"""Formulas over CSV rows (calculator_dataset)"""
+
+import pytest
+
+from calculator_dataset import DatasetEvaluator, np
+
+MODES = [{'use_numpy': False}, {'use_numpy': False, 'compiled': True}]
+if np is not None:
+    MODES.append({'use_numpy': True})
+
+
+@pytest.mark.parametrize('options', MODES)
+def test_constant_named_columns_and_nan_cells(tmp_path, options):
+    source = tmp_path / "data.csv"
+    source.write_text("a,b,e\n1,2,3\nnan,2,3\n4,,3\n5,inf,3\n")
+    output = tmp_path / "out.csv"
+
+    stats = DatasetEvaluator("a * pi + e", **options).evaluate_file(str(source), str(output))
+    lines = output.read_text().splitlines()
+    assert stats['errors'] == 1
+    assert lines[1] == repr(1 * 3.141592653589793 + 3)
+    assert lines[2:] == ['', repr(4 * 3.141592653589793 + 3), repr(5 * 3.141592653589793 + 3)]
+
+    stats = DatasetEvaluator("a * b - e", **options).evaluate_file(str(source), str(output))
+    assert stats['errors'] == 2
+    assert output.read_text().splitlines()[1:] == ['-1.0', '', '', 'inf']
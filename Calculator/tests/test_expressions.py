@@ -0,0 +1,23 @@
+"""Formula parsing (calculator_expressions)"""
+
+import pytest
+
+from calculator_expressions import Expression
+
+
+@pytest.mark.parametrize('formula', ["power(2)", "sqrt()", "log()", "simple_interest(1, 2)"])
+def test_too_few_arguments_fail_at_parse_time(formula):
+    with pytest.raises(ValueError, match="takes at least"):
+        Expression(formula)
+
+
+@pytest.mark.parametrize('formula', ["power(2, 3, 4)", "sqrt(1, 2)"])
+def test_too_many_arguments_fail_at_parse_time(formula):
+    with pytest.raises(ValueError, match="takes at most"):
+        Expression(formula)
+
+
+def test_optional_arguments_may_be_left_out():
+    assert Expression("log(100)").evaluate() == pytest.approx(2.0)
+    assert Expression("log(8, 2)").evaluate() == pytest.approx(3.0)
+    assert Expression("ln(x)").evaluate({'x': 1.0}) == 0.0
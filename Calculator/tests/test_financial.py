@@ -0,0 +1,25 @@
+"""Financial operations (calculator_operations.FinancialOperations)"""
+
+import pytest
+
+from calculator_operations import FinancialOperations
+
+
+def test_interest_rate_with_huge_growth():
+    rate = FinancialOperations().compound_interest_rate(1000, 1e9, 30, 365)
+    assert rate == pytest.approx(46.0808, rel=1e-5)
+    assert 1000 * (1 + rate / 100 / 365) ** (365 * 30) == pytest.approx(1e9 + 1000, rel=1e-9)
+
+
+def test_interest_rate_out_of_range_is_a_value_error():
+    with pytest.raises(ValueError):
+        FinancialOperations().compound_interest_rate(1e-300, 1e300, 1e-300)
+
+
+def test_interest_rate_batches():
+    np = pytest.importorskip('numpy')
+    rates = FinancialOperations().compound_interest_rate(
+        np.array([1000.0, 1000.0, 1e-300]), np.array([500.0, 1e9, 1e300]),
+        np.array([5.0, 30.0, 1e-300]), 12)
+    assert rates[0] == pytest.approx(FinancialOperations().compound_interest_rate(1000, 500, 5, 12))
+    assert rates[1] > 0 and np.isnan(rates[2])
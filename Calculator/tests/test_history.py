@@ -0,0 +1,41 @@
+"""Calculation history (calculator_history)"""
+
+import contextlib
+import io
+
+from calculator_history import CalculatorHistory
+
+
+def _history(path, **options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return CalculatorHistory(str(path), **options)
+
+
+def test_batch_ids_all_belong_to_stored_calculations(tmp_path):
+    history = _history(tmp_path / "history.json")
+    history.add_calculation("1 + 1 = 2", 2)
+    total = history.MAX_ENTRIES + 500
+    assert history.add_calculations(f"{n} + 1" for n in range(total)) == total
+
+    ids = [entry['id'] for entry in history.calculations]
+    assert ids == list(range(ids[0], ids[0] + len(ids)))
+    assert history.calculations[-1]['calculation'] == f"{total - 1} + 1"
+    for calc_id in ids:
+        assert history.get_calculation_by_id(calc_id)['id'] == calc_id
+
+    reloaded = _history(tmp_path / "history.json")
+    assert [entry['id'] for entry in reloaded.calculations] == ids
+
+
+def test_batches_with_an_archive_keep_every_record(tmp_path):
+    history = _history(tmp_path / "history.json", archive_file=str(tmp_path / "archive.blk"))
+    total = history.MAX_ENTRIES * 2 + 10
+    history.add_calculations(f"{n} * 2" for n in range(total))
+
+    # Archived, or still in the snapshot and journal until the next compaction
+    archived = list(history.archive.iter_range(None, None))
+    _, stored = history.journal.load()
+    kept = {entry['id']: entry['calculation'] for entry in archived + stored}
+    assert sorted(kept.values(), key=lambda text: int(text.split()[0])) == \
+        [f"{n} * 2" for n in range(total)]
+    assert history.get_calculation_by_id(archived[0]['id'])['calculation'] == "0 * 2"
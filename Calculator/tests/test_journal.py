@@ -0,0 +1,71 @@
+"""Several processes sharing one history file (calculator_journal)"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+from datetime import datetime
+
+from calculator_history import CalculatorHistory
+
+WORKERS = 4
+ENTRIES_PER_WORKER = 300
+
+
+def _writer(path, worker, count):
+    with contextlib.redirect_stdout(io.StringIO()):
+        history = CalculatorHistory(path)
+        for index in range(count):
+            history.add_record('add', (worker, index), worker + index)
+
+
+def _run_writers(path):
+    processes = [multiprocessing.Process(target=_writer, args=(path, worker, ENTRIES_PER_WORKER))
+                 for worker in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0] * WORKERS
+
+
+def test_concurrent_writers_keep_every_entry(tmp_path):
+    path = str(tmp_path / "shared_history.json")
+    _run_writers(path)
+
+    history = CalculatorHistory(path)
+    total = WORKERS * ENTRIES_PER_WORKER
+    kept = min(total, CalculatorHistory.MAX_ENTRIES)
+    ids = [entry['id'] for entry in history.calculations]
+    assert sorted(ids) == list(range(total - kept + 1, total + 1))
+    assert len({tuple(entry['operands']) for entry in history.calculations}) == kept
+
+
+def test_journal_is_in_timestamp_order(tmp_path):
+    path = str(tmp_path / "shared_history.json")
+    _run_writers(path)
+
+    history = CalculatorHistory(path)
+    timestamps = [entry['timestamp'] for entry in history.calculations]
+    assert timestamps == sorted(timestamps)
+    with open(path + ".journal") as f:
+        journal = [json.loads(line)['timestamp'] for line in f]
+    assert journal == sorted(journal)
+
+
+def test_skewed_timestamps_are_not_propagated(tmp_path):
+    # Another writer whose clock runs ahead appended an entry
+    path = str(tmp_path / "history.json")
+    future = "2999-01-01T00:00:00.000001"
+    history = CalculatorHistory(path)
+    history.add_record('add', (1, 2), 3)
+    with open(path + ".journal", 'a') as f:
+        f.write(json.dumps({'id': 2, 'operation': 'add', 'operands': [2, 2], 'result': 4,
+                            'operation_type': 'basic', 'timestamp': future,
+                            'session_id': future}) + "\n")
+
+    before = datetime.now().isoformat()
+    entry = history.add_record('add', (3, 4), 7)
+    assert entry['id'] == 3
+    assert before <= entry['timestamp'] <= datetime.now().isoformat()
+    assert CalculatorHistory(path).calculations[-1]['timestamp'] == entry['timestamp']
@@ -0,0 +1,33 @@
+"""Matrix operations (calculator_operations.MatrixOperations)"""
+
+import random
+
+import pytest
+
+from calculator_operations import MatrixOperations
+
+
+def _near_singular(n, seed=2):
+    rng = random.Random(seed)
+    rows = [[rng.gauss(0, 1) for _ in range(n)] for _ in range(n - 1)]
+    rows.append([sum(column) + rng.gauss(0, 1e-15) for column in zip(*rows)])
+    return rows
+
+
+@pytest.mark.parametrize('n', [3, 4, 8, 40])
+def test_near_singular_matrices_raise_on_every_path(n):
+    matrices = [_near_singular(n)]
+    operations = MatrixOperations()
+    if operations.np is not None:
+        matrices.append(operations.np.array(matrices[0]))
+    for matrix in matrices:
+        with pytest.raises(ValueError, match="Matrix is singular!"):
+            operations.solve(matrix, [1.0] * n)
+        with pytest.raises(ValueError, match="Matrix is singular!"):
+            operations.inverse(matrix)
+
+
+def test_scaled_matrices_are_not_singular():
+    operations = MatrixOperations()
+    tiny = [[1e-200 * (i == j) for j in range(6)] for i in range(6)]
+    assert operations.solve(tiny, [1.0] * 6) == pytest.approx([1e200] * 6)
@@ -0,0 +1,53 @@
+"""Merging history files (calculator_merge)"""
+
+import json
+import random
+
+from calculator_merge import HistoryMerger, sorted_runs
+
+
+def _entry(number, session="2026-01-01T00:00:00"):
+    return {'id': number, 'operation': 'add', 'operands': [number, 1], 'result': number + 1,
+            'operation_type': 'basic', 'session_id': session,
+            'timestamp': f"2026-01-01T00:{number // 60:02d}:{number % 60:02d}"}
+
+
+def _write_lines(path, entries):
+    with open(path, 'w') as f:
+        f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+
+def test_unsorted_input_is_sorted_and_duplicates_dropped(tmp_path):
+    ordered = [_entry(n) for n in range(300)]
+    shuffled = [_entry(n) for n in range(100, 400)]
+    random.Random(3).shuffle(shuffled)
+    exported = [dict(entry, calculation=f"{n} + 1 = {n + 1}")
+                for n, entry in enumerate(ordered[:50])]
+    _write_lines(tmp_path / "a.jsonl", ordered)
+    _write_lines(tmp_path / "b.journal", shuffled)
+    (tmp_path / "c.json").write_text(json.dumps({'calculations': exported}))
+
+    merger = HistoryMerger([str(tmp_path / name) for name in ("a.jsonl", "b.journal", "c.json")])
+    written = merger.write(str(tmp_path / "merged.jsonl"))
+
+    merged = [json.loads(line) for line in open(tmp_path / "merged.jsonl")]
+    assert written == 400 and merger.duplicates == 250
+    assert [entry['operands'][0] for entry in merged] == list(range(400))
+    assert [entry['id'] for entry in merged] == list(range(1, 401))
+
+
+def test_same_id_different_records_are_kept(tmp_path):
+    # Old files could repeat an id within a session
+    first, second = _entry(7), dict(_entry(7), operands=[8, 1], result=9)
+    _write_lines(tmp_path / "a.jsonl", [first, second])
+    assert HistoryMerger([str(tmp_path / "a.jsonl")]).write(str(tmp_path / "out.jsonl")) == 2
+
+
+def test_sorted_runs_spill_large_inputs():
+    rng = random.Random(5)
+    entries = [{'id': n, 'timestamp': f"{rng.random():.9f}"} for n in range(1000)]
+    runs = sorted_runs(entries, run_entries=64)
+    assert len(runs) == 16
+    for run in runs:
+        timestamps = [entry['timestamp'] for entry in run]
+        assert timestamps == sorted(timestamps)
@@ -0,0 +1,35 @@
+"""Batched quadrature (calculator_numerics)"""
+
+import math
+
+import pytest
+
+from calculator_numerics import gauss_kronrod, simpson
+
+np = pytest.importorskip('numpy')
+
+
+@pytest.mark.parametrize('rule', [simpson, gauss_kronrod])
+@pytest.mark.parametrize('max_intervals', [1, 10, 15, 10_000])
+def test_batched_integrals_for_any_batch_size(rule, max_intervals):
+    upper = np.array([np.pi, np.pi / 2, 2 * np.pi])
+    result = rule(np.sin, np.zeros(3), upper, tol=1e-10, max_intervals=max_intervals)
+    assert result.converged.all()
+    assert result.value == pytest.approx([2.0, 1.0, 0.0], abs=1e-9)
+
+
+@pytest.mark.parametrize('rule', [simpson, gauss_kronrod])
+def test_batched_matches_scalar(rule):
+    def f(x, k):
+        return np.exp(-k * x * x) if isinstance(x, np.ndarray) else math.exp(-k * x * x)
+
+    ks = np.array([0.5, 1.0, 4.0])
+    batched = rule(f, -3.0, 3.0, args=(ks,), tol=1e-10)
+    for k, value in zip(ks.tolist(), batched.value.tolist()):
+        assert value == pytest.approx(rule(f, -3.0, 3.0, args=(k,), tol=1e-10).value, abs=1e-9)
+        assert value == pytest.approx(math.sqrt(math.pi / k) * math.erf(3 * math.sqrt(k)), abs=1e-9)
+
+
+def test_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        gauss_kronrod(np.sin, np.array([0.0]), np.array([1.0]), max_intervals=0)
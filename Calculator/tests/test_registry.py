@@ -0,0 +1,17 @@
+"""Operation registry (calculator_registry)"""
+
+from calculator_registry import OperationRegistry, register_default_operations
+
+
+def test_code_version_covers_implementing_modules():
+    registry = register_default_operations(OperationRegistry())
+    before = {name: registry.code_version(name)
+              for name in ('moving_average', 'polynomial_roots', 'correlation', 'mean')}
+
+    # Same registry after an edit to calculator_timeseries only
+    changed = register_default_operations(OperationRegistry())
+    changed._module_versions['calculator_timeseries'] = 'edited'
+    assert changed.code_version('moving_average') != before['moving_average']
+    assert changed.code_version('polynomial_roots') == before['polynomial_roots']
+    assert changed.code_version('mean') == before['mean']
+    assert before['correlation'] != before['mean']
@@ -0,0 +1,73 @@
+"""Paired statistics against reference values (calculator_regression)"""
+
+import pytest
+
+from calculator_operations import StatisticalOperations
+from calculator_regression import np
+
+# Anscombe's quartet, sets I and III (same x)
+ANSCOMBE_X = [10, 8, 13, 9, 11, 14, 6, 4, 12, 7, 5]
+ANSCOMBE_Y1 = [8.04, 6.95, 7.58, 8.81, 8.33, 9.96, 7.24, 4.26, 10.84, 4.82, 5.68]
+ANSCOMBE_Y3 = [7.46, 6.77, 12.74, 7.11, 7.81, 8.84, 6.08, 5.39, 8.15, 6.42, 5.73]
+
+# y on two predictors, fitted by least squares with an intercept
+PREDICTORS = [[1, 2, 3, 4, 5, 6, 7, 8], [2, 1, 4, 3, 6, 5, 8, 9]]
+RESPONSE = [3.1, 4.9, 7.2, 8.8, 11.3, 12.9, 15.1, 17.4]
+
+ARRAYS = [list] + ([np.array] if np is not None else [])
+
+
+@pytest.fixture(params=ARRAYS, ids=lambda kind: kind.__name__)
+def column(request):
+    """Builds input columns as lists, or as NumPy arrays (vectorized path)"""
+    return request.param
+
+
+def test_covariance(column):
+    stats = StatisticalOperations()
+    assert (stats.covariance(column(ANSCOMBE_X), column(ANSCOMBE_Y1))
+            == pytest.approx(5.501, rel=1e-12))
+    assert (stats.covariance(column([1, 2, 3, 4]), column([2, 4, 6, 8]))
+            == pytest.approx(10 / 3, rel=1e-12))
+
+
+def test_pearson_correlation(column):
+    stats = StatisticalOperations()
+    assert (stats.correlation(column(ANSCOMBE_X), column(ANSCOMBE_Y1))
+            == pytest.approx(0.81642051634484, rel=1e-12))
+    assert stats.correlation(column([1, 2, 3]), column([3, 2, 1])) == pytest.approx(-1.0)
+
+
+def test_spearman_correlation(column):
+    stats = StatisticalOperations()
+    # 1 - 6 * sum(d^2) / (n (n^2 - 1)) without ties
+    assert (stats.spearman_correlation(column(ANSCOMBE_X), column(ANSCOMBE_Y1))
+            == pytest.approx(9 / 11, rel=1e-12))
+    assert (stats.spearman_correlation(column(ANSCOMBE_X), column(ANSCOMBE_Y3))
+            == pytest.approx(1 - 6 * 2 / 1320, rel=1e-12))
+    # Ties share their average rank: Pearson correlation of the ranks
+    assert (stats.spearman_correlation(column([1, 2, 2, 3, 5]), column([2, 1, 4, 4, 9]))
+            == pytest.approx(0.7631578947368421, rel=1e-12))
+
+
+def test_linear_regression(column):
+    fit = StatisticalOperations().linear_regression(column(ANSCOMBE_X), column(ANSCOMBE_Y1))
+    assert fit['slope'] == pytest.approx(0.5000909090909091, rel=1e-12)
+    assert fit['intercept'] == pytest.approx(3.0000909090909091, rel=1e-12)
+    assert fit['r_squared'] == pytest.approx(0.6665424595087748, rel=1e-12)
+
+
+def test_multiple_regression(column):
+    fit = StatisticalOperations().multiple_regression(
+        [column(values) for values in PREDICTORS], column(RESPONSE))
+    # Normal equations solved exactly: b = (1259/680, 43/255), a = 487/510
+    assert fit['coefficients'] == pytest.approx([1259 / 680, 43 / 255], rel=1e-12)
+    assert fit['intercept'] == pytest.approx(487 / 510, rel=1e-12)
+    assert fit['r_squared'] == pytest.approx(0.9996650354428904, rel=1e-12)
+    assert fit['residual_standard_error'] == pytest.approx(0.1078761090416263, rel=1e-9)
+    assert fit['count'] == 8
+
+
+def test_dependent_predictors_are_rejected():
+    with pytest.raises(ValueError):
+        StatisticalOperations().multiple_regression([[1, 2, 3, 4], [2, 4, 6, 8]], [1, 2, 3, 5])
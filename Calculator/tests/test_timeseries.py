@@ -0,0 +1,47 @@
+"""Rolling-window statistics (calculator_timeseries)"""
+
+import random
+import statistics
+
+import pytest
+
+from calculator_operations import StatisticalOperations
+from calculator_timeseries import RollingStd, rolling_mean, rolling_std
+
+
+def _trend(size, seed=3):
+    rng = random.Random(seed)
+    return [i + rng.gauss(0, 1) for i in range(size)]
+
+
+def _check_std(output, series, window, step):
+    for i in range(window - 1, len(series), step):
+        expected = statistics.stdev(series[i - window + 1:i + 1])
+        assert output[i] == pytest.approx(expected, rel=1e-6)
+
+
+def test_streaming_std_follows_a_trend():
+    series = _trend(200_000)
+    std = RollingStd(10)
+    output = [std.update(value) for value in series]
+    _check_std(output, series, 10, 997)
+
+
+def test_vectorized_mean_and_std_follow_a_trend():
+    np = pytest.importorskip('numpy')
+    series = _trend(2_000_000)
+    array = np.array(series)
+    _check_std(rolling_std(array, 10), series, 10, 19_997)
+    means = rolling_mean(array, 10)
+    for i in range(9, len(series), 19_997):
+        assert means[i] == pytest.approx(statistics.fmean(series[i - 9:i + 1]), abs=1e-9)
+
+
+@pytest.mark.parametrize('window', [0, -3, 2.5, float('inf'), float('nan'), '3', None])
+def test_invalid_windows_are_rejected(window):
+    with pytest.raises(ValueError, match="Window size must be a positive integer!"):
+        StatisticalOperations().moving_average([1.0, 2.0, 3.0], window)
+
+
+def test_integral_float_windows_are_accepted():
+    assert StatisticalOperations().moving_average([1.0, 2.0, 3.0], 2.0) == [1.0, 1.5, 2.5]